@@ -54,11 +54,31 @@ Decide which of these applies:
        "make the hole bigger"
        "increase the radius of cylinder 1 by 5mm"
        "change hole size to 10"
+       "resize hole 3 to radius 4" -> {"command": "RESIZE_FEATURE", "feature_type": "hole", "index": 2, "new_radius": 4.0}
+   - feature_type is "hole" or "boss"; index is the feature number minus one (hole 1 -> 0).
    - Output JSON example:
        {"command": "RESIZE_FEATURE", "feature_type": "hole", "index": 0, "new_radius": 15.0}
        OR if relative: {"command": "RESIZE_FEATURE", "feature_type": "hole", "index": 0, "scale": 1.5}
 
-6. UNSURE / REPEAT
+6. UNDO / REDO
+   - User wants to take back the last change, or re-apply a change they took back.
+   - Input examples:
+       "undo that" -> {"command": "UNDO"}
+       "go back" -> {"command": "UNDO"}
+       "redo" -> {"command": "REDO"}
+   - Output JSON example:
+       {"command": "UNDO"}
+
+7. SAVE
+   - User wants to save / export / download the modified model as a STEP file.
+   - Set "compress": true only if they ask for a compressed or zipped file.
+   - Input examples:
+       "save the model" -> {"command": "SAVE"}
+       "export it as a compressed step file" -> {"command": "SAVE", "compress": true}
+   - Output JSON example:
+       {"command": "SAVE"}
+
+8. UNSURE / REPEAT
    - If the user's speech is gibberish, broken, cut off, or semantically meaningless (e.g. "deleted the blah blah").
    - If you are not 100% sure what the user wants.
    - Example inputs:
@@ -69,6 +89,17 @@ Decide which of these applies:
    - Output JSON example:
        {"command": "UNSURE"}
 
+SEVERAL COMMANDS IN ONE SENTENCE
+   - If the user asks for more than one change, return them in spoken order under "commands".
+   - Input example:
+       "scale by 2, rotate 90 about Z and move up 10"
+   - Output JSON example:
+       {"commands": [
+           {"command": "SCALE", "factor": 2.0},
+           {"command": "ROTATE", "axis": "Z", "angle_degrees": 90},
+           {"command": "MOVE", "dx": 0.0, "dy": 0.0, "dz": 10.0}
+       ]}
+
 If the instruction is unclear, garbage, or unsupported, return:
    {"command": "UNSURE"}
 """
@@ -83,7 +114,7 @@ def _get_client() -> Groq:
 def interpret_command(text: str) -> dict:
     """
     For Phase 2 (modification): interpret natural language as
-    QUESTION / SCALE / MOVE / DELETE / RESIZE_FEATURE / UNKNOWN.
+    QUESTION / SCALE / MOVE / DELETE / RESIZE_FEATURE / UNDO / REDO / SAVE / UNKNOWN.
     """
     client = _get_client()
 
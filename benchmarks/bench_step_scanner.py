@@ -0,0 +1,106 @@
+# benchmarks/bench_step_scanner.py
+# Compare the streaming STEP scanner against the old two-pass regex parser.
+#
+# Usage: python benchmarks/bench_step_scanner.py [step_file] [--copies N]
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cad.step_scanner import scan_product_structure, iter_entities
+
+
+def regex_product_structure(filename: str):
+    """
+    The previous parse_step_assembly extraction: f.read() + two re.finditer passes.
+    """
+    with open(filename, 'r', encoding='utf-8', errors='ignore') as f:
+        content = f.read()
+
+    products = {}
+    product_pattern = r'#(\d+)\s*=\s*PRODUCT\s*\(\s*\'([^\']*)\''
+    for match in re.finditer(product_pattern, content):
+        products[match.group(1)] = {'name': match.group(2), 'children': []}
+
+    assembly_pattern = r'#(\d+)\s*=\s*NEXT_ASSEMBLY_USAGE_OCCURRENCE\(\s*\'[^\']*\'\s*,\s*[^,]*,\s*#(\d+)\s*,\s*#(\d+)'
+    for match in re.finditer(assembly_pattern, content):
+        parent_id, child_id = match.group(2), match.group(3)
+        if parent_id in products and child_id in products:
+            products[parent_id]['children'].append(child_id)
+    return products
+
+
+def enlarge_step(src: str, dst: str, copies: int):
+    """
+    Write a synthetic STEP file whose DATA section is 'copies' renumbered
+    repetitions of the source DATA section.
+    """
+    with open(src, 'rb') as f:
+        content = f.read()
+
+    data_start = content.index(b"DATA;") + len(b"DATA;")
+    data_end = content.rindex(b"ENDSEC;")
+    header, body, footer = content[:data_start], content[data_start:data_end], content[data_end:]
+    max_id = max(int(m) for m in re.findall(rb"#(\d+)", body))
+
+    with open(dst, 'wb') as out:
+        out.write(header)
+        for i in range(copies):
+            offset = i * max_id
+            out.write(re.sub(rb"#(\d+)", lambda m: b"#%d" % (int(m.group(1)) + offset), body))
+        out.write(footer)
+
+
+def measure(fn, filename):
+    # Time and memory are measured in separate runs; tracemalloc slows Python code down
+    t0 = time.perf_counter()
+    result = fn(filename)
+    elapsed = time.perf_counter() - t0
+
+    tracemalloc.start()
+    fn(filename)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def count_entities(filename):
+    return sum(1 for _ in iter_entities(filename))
+
+
+def run(filename: str):
+    size_mb = os.path.getsize(filename) / 1e6
+    print(f"\n{os.path.basename(filename)} ({size_mb:.1f} MB)")
+    for label, fn in (
+        ("regex (read + 2 passes)", regex_product_structure),
+        ("streaming scanner", scan_product_structure),
+        ("streaming, all entities", count_entities),
+    ):
+        elapsed, peak, result = measure(fn, filename)
+        detail = f"{result} entities" if isinstance(result, int) else f"{len(result)} products"
+        print(f"  {label:26s} {elapsed * 1000:9.1f} ms   peak {peak / 1e6:8.2f} MB   {detail}")
+
+
+def main():
+    default = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets", "sample.step")
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("step_file", nargs="?", default=default)
+    parser.add_argument("--copies", type=int, default=50, help="repetitions for the enlarged file")
+    args = parser.parse_args()
+
+    run(args.step_file)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        big = os.path.join(tmp, "enlarged.step")
+        enlarge_step(args.step_file, big, args.copies)
+        run(big)
+
+
+if __name__ == "__main__":
+    main()
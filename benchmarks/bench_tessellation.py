@@ -0,0 +1,105 @@
+# benchmarks/bench_tessellation.py
+# Tessellation speedup vs. worker count on the bundled STEP assets.
+#
+# Usage: python benchmarks/bench_tessellation.py [--deflection D] [--copies N]
+#
+# Each asset is meshed once as-is and once as a synthetic assembly of N
+# translated copies, so the solid-level process pool has work to split.
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from OCC.Core.BRep import BRep_Builder
+from OCC.Core.BRepTools import breptools_Clean
+from OCC.Core.TopoDS import TopoDS_Compound
+
+from cad.loader import load_step_shape, get_bounding_box
+from cad.modify import translate_shape
+from cad.mesh import list_solids, mesh_shape, extract_solid_mesh
+from cad import tessellate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ASSETS = [os.path.join(ROOT, "assets", "sample.step"), os.path.join(ROOT, "assets", "model.stp")]
+
+
+def make_assembly(shape, copies: int):
+    """Compound of 'copies' translated copies of 'shape' laid out along X."""
+    dx = get_bounding_box(shape)[6] * 1.1 or 1.0
+    builder = BRep_Builder()
+    comp = TopoDS_Compound()
+    builder.MakeCompound(comp)
+    for i in range(copies):
+        builder.Add(comp, translate_shape(shape, i * dx, 0, 0))
+    return comp
+
+
+def worker_counts():
+    cores = os.cpu_count() or 1
+    counts = []
+    n = 2
+    while n <= cores:
+        counts.append(n)
+        n *= 2
+    if cores > 1 and (not counts or counts[-1] != cores):
+        counts.append(cores)
+    return counts
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    meshes = fn()
+    return time.perf_counter() - t0, sum(len(m["indices"]) for m in meshes)
+
+
+def run(label, shape, deflection):
+    solids = list_solids(shape)
+    print(f"\n{label}: {len(solids)} solids, deflection {deflection}")
+
+    def serial():
+        mesh_shape(shape, deflection, parallel=False)
+        return [extract_solid_mesh(s) for s in solids]
+
+    rows = [
+        ("serial (1 core)", serial, None),
+        ("BRepMesh in-mesher parallel", lambda: tessellate.tessellate_solids(shape, deflection, workers=1), None),
+    ]
+    for workers in worker_counts():
+        rows.append((f"process pool, {workers} workers",
+                     lambda w=workers: tessellate.tessellate_solids(shape, deflection, workers=w), workers))
+
+    baseline = None
+    for name, fn, pool_workers in rows:
+        if pool_workers:
+            # Warm the pool so process start-up is not billed to the run
+            tessellate.get_pool(pool_workers).submit(int, 0).result()
+        breptools_Clean(shape)  # drop triangulations from the previous run
+        elapsed, triangles = timed(fn)
+        baseline = baseline or elapsed
+        print(f"  {name:30s} {elapsed * 1000:9.1f} ms  speedup {baseline / elapsed:5.2f}x  ({triangles} triangles)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--deflection", type=float, default=0.01)
+    parser.add_argument("--copies", type=int, default=16)
+    args = parser.parse_args()
+
+    # Always use the pool when workers > 1, so the numbers show its scaling
+    tessellate.MIN_SOLIDS_FOR_POOL = 2
+
+    try:
+        for path in ASSETS:
+            shape = load_step_shape(path, use_cache=False)
+            name = os.path.basename(path)
+            run(name, shape, args.deflection)
+            run(f"{name} x{args.copies}", make_assembly(shape, args.copies), args.deflection)
+    finally:
+        tessellate.shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
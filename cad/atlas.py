@@ -0,0 +1,132 @@
+# cad/atlas.py
+# One contiguous vertex/index buffer for the whole model plus a range table,
+# so component highlights are array slices instead of mesh-and-write round trips.
+
+import numpy as np
+
+from .export import binary_stl_bytes
+
+
+class MeshAtlas:
+    """
+    Concatenated mesh of all solids.
+
+    Triangles are laid out solid by solid, and within a solid face by face in
+    the same shell/face order cad.tree uses, so every solid, shell and face
+    owns one contiguous triangle range.
+
+    Component paths:
+      ("solid", solid_index)
+      ("shell", solid_index, shell_index)
+      ("face",  solid_index, face_index)   - face index counted across the solid
+    """
+
+    def __init__(self, vertices, normals, indices, solid_ranges, face_ranges, face_shells):
+        self.vertices = vertices          # float32 (N,3)
+        self.normals = normals            # float32 (N,3)
+        self.indices = indices            # uint32  (M,3), global vertex indices
+        self.solid_ranges = solid_ranges  # int64 (S,2) first triangle, count
+        self.face_ranges = face_ranges    # list of int64 (F,2) per solid, global triangle offsets
+        self.face_shells = face_shells    # list of int64 (F,) per solid
+
+    @property
+    def triangle_count(self):
+        return len(self.indices)
+
+    def triangle_range(self, path):
+        """
+        Return (first_triangle, triangle_count) for a component path, or None.
+        """
+        kind, solid = path[0], path[1]
+        if not 0 <= solid < len(self.solid_ranges):
+            return None
+
+        if kind == "solid":
+            start, count = self.solid_ranges[solid]
+            return int(start), int(count)
+
+        if kind == "face":
+            faces = self.face_ranges[solid]
+            if not 0 <= path[2] < len(faces):
+                return None
+            start, count = faces[path[2]]
+            return int(start), int(count)
+
+        if kind == "shell":
+            mask = self.face_shells[solid] == path[2]
+            if not mask.any():
+                return None
+            faces = self.face_ranges[solid][mask]
+            start = int(faces[:, 0].min())
+            end = int((faces[:, 0] + faces[:, 1]).max())
+            return start, end - start
+
+        return None
+
+    def component_mesh(self, path):
+        """
+        Indexed mesh dict for a component, sliced out of the atlas.
+        """
+        rng = self.triangle_range(path)
+        if rng is None:
+            return None
+        start, count = rng
+        tris = self.indices[start:start + count]
+        used, local = np.unique(tris, return_inverse=True)
+        return {
+            "vertices": self.vertices[used],
+            "normals": self.normals[used],
+            "indices": local.reshape(-1, 3).astype(np.uint32),
+        }
+
+    def component_stl(self, path):
+        """
+        Binary STL bytes for a component, or None if the path is unknown.
+        """
+        mesh = self.component_mesh(path)
+        if mesh is None:
+            return None
+        return binary_stl_bytes([mesh])
+
+
+def build_mesh_atlas(meshes):
+    """
+    Build a MeshAtlas from per-solid meshes (see cad.mesh.extract_solid_mesh).
+    """
+    vertices, normals, indices = [], [], []
+    solid_ranges, face_ranges, face_shells = [], [], []
+    n_vertices = 0
+    n_triangles = 0
+
+    for mesh in meshes:
+        tris = np.asarray(mesh["indices"]).reshape(-1, 3)
+        vertices.append(mesh["vertices"])
+        normals.append(mesh["normals"])
+        indices.append(tris + n_vertices)
+
+        faces = np.asarray(mesh["face_ranges"], dtype=np.int64).reshape(-1, 2).copy()
+        faces[:, 0] += n_triangles
+        face_ranges.append(faces)
+        face_shells.append(np.asarray(mesh["face_shells"], dtype=np.int64))
+        solid_ranges.append((n_triangles, len(tris)))
+
+        n_vertices += len(mesh["vertices"])
+        n_triangles += len(tris)
+
+    if meshes:
+        vertices = np.concatenate(vertices).astype(np.float32)
+        normals = np.concatenate(normals).astype(np.float32)
+        indices = np.concatenate(indices).astype(np.uint32)
+    else:
+        vertices = np.zeros((0, 3), dtype=np.float32)
+        normals = np.zeros((0, 3), dtype=np.float32)
+        indices = np.zeros((0, 3), dtype=np.uint32)
+
+    return MeshAtlas(
+        vertices,
+        normals,
+        indices,
+        np.array(solid_ranges, dtype=np.int64).reshape(-1, 2),
+        face_ranges,
+        face_shells,
+    )
@@ -0,0 +1,276 @@
+# cad/cache.py
+# Content-addressed on-disk cache of transferred STEP shapes (BRep + product tree)
+
+import os
+import json
+import uuid
+import hashlib
+import threading
+
+from OCC.Core.TopoDS import TopoDS_Shape
+from OCC.Core.BinTools import bintools_Write, bintools_Read
+
+# Cache location and disk budget (overridable from the environment)
+CACHE_DIR = os.getenv("SHAPE_CACHE_DIR", os.path.join("assets", "cache"))
+CACHE_MAX_BYTES = int(os.getenv("SHAPE_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+
+# Hit/miss counters exposed through the API (parses in worker processes are
+# reported back with record_stats)
+CACHE_STATS = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+_HASH_CHUNK = 1024 * 1024
+_LOCK = threading.Lock()
+
+# (path, size, mtime) -> digest, so the same file is only hashed once
+_DIGEST_MEMO = {}
+
+
+def file_digest(filename: str) -> str:
+    """
+    SHA-256 of the file contents, read in chunks.
+    """
+    st = os.stat(filename)
+    memo_key = (os.path.abspath(filename), st.st_size, st.st_mtime_ns)
+    if memo_key in _DIGEST_MEMO:
+        return _DIGEST_MEMO[memo_key]
+
+    h = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    _DIGEST_MEMO[memo_key] = digest
+    return digest
+
+
+def remember_digest(filename: str, digest: str):
+    """
+    Record a digest computed elsewhere (e.g. while the file was uploaded),
+    so file_digest does not read the file again.
+    """
+    st = os.stat(filename)
+    _DIGEST_MEMO[(os.path.abspath(filename), st.st_size, st.st_mtime_ns)] = digest
+
+
+def write_shape(shape, path: str):
+    """
+    Write a shape in OCC's binary BRep format.
+    """
+    if not bintools_Write(shape, path):
+        raise RuntimeError(f"Error writing BRep file: {path}")
+    return path
+
+
+def read_shape(path: str):
+    """
+    Read a shape written by write_shape.
+    """
+    shape = TopoDS_Shape()
+    if not bintools_Read(shape, path):
+        raise RuntimeError(f"Error reading BRep file: {path}")
+    return shape
+
+
+def _entry_dir(digest: str) -> str:
+    return os.path.join(CACHE_DIR, digest)
+
+
+def _tmp_name(entry: str, name: str) -> str:
+    """
+    Unique temporary file next to 'name': workers in several processes may
+    store the same content at once, and each must replace from its own file.
+    """
+    return os.path.join(entry, f"{name}.{os.getpid()}.{uuid.uuid4().hex}.tmp")
+
+
+def _replace_from(tmp: str, path: str, write):
+    """write(tmp), then move it over 'path'; the temporary file never outlives a failure."""
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _count(counter: str):
+    with _LOCK:
+        CACHE_STATS[counter] += 1
+
+
+def _touch(path: str):
+    """Mark an entry as recently used (mtime is the LRU clock)."""
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+def get_cached_shape(digest: str, count: bool = True):
+    """
+    Return the cached shape for a digest, or None on a miss.
+    With count=False the read is not a lookup of its own (the entry was
+    just stored by a worker that already counted the miss).
+    """
+    entry = _entry_dir(digest)
+    brep_path = os.path.join(entry, "shape.brep")
+    if not os.path.exists(brep_path):
+        if count:
+            _count("misses")
+        return None
+
+    try:
+        shape = read_shape(brep_path)
+    except RuntimeError:
+        # Corrupt or partial entry - drop it and treat as a miss
+        _remove_entry(entry)
+        if count:
+            _count("misses")
+        return None
+
+    _touch(entry)
+    if count:
+        _count("hits")
+    return shape
+
+
+def has_cached_shape(digest: str) -> bool:
+    """True if a transferred shape is stored for this digest."""
+    return os.path.exists(os.path.join(_entry_dir(digest), "shape.brep"))
+
+
+def get_cached_product_tree(digest: str):
+    """
+    Return the cached product tree for a digest.
+    Returns (found, tree); tree may legitimately be None for files without products.
+    """
+    tree_path = os.path.join(_entry_dir(digest), "products.json")
+    if not os.path.exists(tree_path):
+        return False, None
+    try:
+        with open(tree_path, "r", encoding="utf-8") as f:
+            return True, json.load(f)
+    except (OSError, ValueError):
+        return False, None
+
+
+def store_shape(digest: str, shape, product_tree=None):
+    """
+    Store a transferred shape (and optionally its product tree) under its digest,
+    then evict least recently used entries above the disk budget.
+    """
+    entry = _entry_dir(digest)
+    os.makedirs(entry, exist_ok=True)
+
+    # Write to temporary names first so readers never see a partial entry
+    _replace_from(_tmp_name(entry, "shape.brep"), os.path.join(entry, "shape.brep"),
+                  lambda tmp: write_shape(shape, tmp))
+    store_product_tree(digest, product_tree)
+
+    _count("stores")
+    evict_to_budget(keep=digest)
+
+
+def store_product_tree(digest: str, product_tree):
+    """
+    Store the parsed product tree next to a cached shape.
+    """
+    entry = _entry_dir(digest)
+    os.makedirs(entry, exist_ok=True)
+
+    def write(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(product_tree, f)
+
+    _replace_from(_tmp_name(entry, "products.json"), os.path.join(entry, "products.json"), write)
+
+
+def _entry_size(entry: str) -> int:
+    total = 0
+    for name in os.listdir(entry):
+        try:
+            total += os.path.getsize(os.path.join(entry, name))
+        except OSError:
+            pass
+    return total
+
+
+def _remove_entry(entry: str):
+    for name in os.listdir(entry):
+        try:
+            os.remove(os.path.join(entry, name))
+        except OSError:
+            pass
+    try:
+        os.rmdir(entry)
+    except OSError:
+        pass
+
+
+def evict_to_budget(keep=None):
+    """
+    Remove least recently used entries until the cache fits CACHE_MAX_BYTES.
+    The entry named by 'keep' is never evicted.
+    """
+    if not os.path.isdir(CACHE_DIR):
+        return
+
+    with _LOCK:
+        entries = []
+        total = 0
+        for digest in os.listdir(CACHE_DIR):
+            entry = _entry_dir(digest)
+            if not os.path.isdir(entry):
+                continue
+            size = _entry_size(entry)
+            entries.append((os.path.getmtime(entry), digest, entry, size))
+            total += size
+
+        # Oldest first
+        entries.sort()
+        for _, digest, entry, size in entries:
+            if total <= CACHE_MAX_BYTES:
+                break
+            if digest == keep:
+                continue
+            _remove_entry(entry)
+            total -= size
+            CACHE_STATS["evictions"] += 1
+
+
+def record_stats(delta):
+    """
+    Add counters reported by a worker process (see cad.loader.cache_step_file);
+    each process has its own CACHE_STATS, and the API reports the server's.
+    """
+    with _LOCK:
+        for key, n in delta.items():
+            CACHE_STATS[key] += n
+
+
+def cache_stats():
+    """
+    Counters plus current disk usage, for the /api/cache/stats endpoint.
+    """
+    entries = 0
+    size = 0
+    if os.path.isdir(CACHE_DIR):
+        for digest in os.listdir(CACHE_DIR):
+            entry = _entry_dir(digest)
+            if os.path.isdir(entry):
+                entries += 1
+                size += _entry_size(entry)
+
+    with _LOCK:
+        counters = dict(CACHE_STATS)
+    lookups = counters["hits"] + counters["misses"]
+    return {
+        **counters,
+        "hit_rate": (counters["hits"] / lookups) if lookups else 0.0,
+        "entries": entries,
+        "bytes": size,
+        "max_bytes": CACHE_MAX_BYTES,
+    }
@@ -0,0 +1,308 @@
+# cad/columnar_tree.py
+# Array-backed assembly tree: one row per node in parallel NumPy columns,
+# with JSON and binary serialization for the frontend. Only building a tree
+# needs OCC; paging and serializing work on the arrays alone.
+
+import struct
+
+import numpy as np
+
+# Node type codes
+KIND_ROOT, KIND_SOLID, KIND_SHELL, KIND_FACE = 0, 1, 2, 3
+KIND_NAMES = ("root", "solid", "shell", "face")
+KIND_TYPES = ("Assembly", "Part", "Shell", "Face")
+KIND_LABELS = ("", "Solid", "Shell", "Face")
+_KIND_CODES = {name: code for code, name in enumerate(KIND_NAMES)}
+
+# Binary wire format: header, then each column back to back (little endian)
+WIRE_MAGIC = b"CTRE"
+WIRE_VERSION = 1
+_WIRE_HEADER = struct.Struct("<4sHHII")  # magic, version, root type code, node count, name bytes
+
+
+class ColumnarTree:
+    """
+    Assembly tree stored as parallel arrays, rows in breadth-first order
+    (root, solids, shells, faces), so every node's children are one
+    contiguous row range.
+
+    Columns:
+      parent       int32  parent row (-1 for the root)
+      kind         uint8  KIND_* code
+      name_offset  int32  offset into the name table, -1 for generated names
+      name_length  int32  length in the name table
+      shape_index  int32  index in the kind's TopTools_IndexedMapOfShape (0 for root)
+      child_start  int32  first child row
+      child_count  int32  number of children
+
+    Generated names ("Face 12") are not stored; they follow from the row's
+    position among its siblings. Node ids are "root" and "<kind>-<row>":
+    a sub-shape shared by several parents (a face of two shells) has one
+    shape_index but a row, and so an id, under each of them.
+    """
+
+    def __init__(self, parent, kind, name_offset, name_length, shape_index,
+                 child_start, child_count, names: bytes, root_type="Assembly", maps=None, shape=None):
+        self.parent = parent
+        self.kind = kind
+        self.name_offset = name_offset
+        self.name_length = name_length
+        self.shape_index = shape_index
+        self.child_start = child_start
+        self.child_count = child_count
+        self.names = names
+        self.root_type = root_type
+        self.maps = maps or {}
+        self.shape = shape
+
+    def __len__(self):
+        return len(self.parent)
+
+    # ---- ids / names ----
+
+    def node_id(self, row: int) -> str:
+        k = int(self.kind[row])
+        if k == KIND_ROOT:
+            return "root"
+        return f"{KIND_NAMES[k]}-{int(row)}"
+
+    def row_of(self, node_id: str) -> int:
+        """
+        Row for a node id. Raises KeyError for unknown ids.
+        """
+        if node_id == "root":
+            return 0
+        kind_name, _, index = node_id.partition("-")
+        k = _KIND_CODES.get(kind_name)
+        if not k or not index.isdigit():
+            raise KeyError(node_id)
+        row = int(index)
+        if row >= len(self) or int(self.kind[row]) != k:
+            raise KeyError(node_id)
+        return row
+
+    def name(self, row: int) -> str:
+        offset = int(self.name_offset[row])
+        if offset >= 0:
+            return self.names[offset:offset + int(self.name_length[row])].decode("utf-8")
+        position = row - int(self.child_start[self.parent[row]]) + 1
+        return f"{KIND_LABELS[int(self.kind[row])]} {position}"
+
+    def node_type(self, row: int) -> str:
+        k = int(self.kind[row])
+        return self.root_type if k == KIND_ROOT else KIND_TYPES[k]
+
+    def shape_of(self, row: int):
+        k = int(self.kind[row])
+        if k == KIND_ROOT:
+            return self.shape
+        return self.maps[KIND_NAMES[k]].FindKey(int(self.shape_index[row]))
+
+    # ---- traversal helpers ----
+
+    def children(self, row: int):
+        start = int(self.child_start[row])
+        return np.arange(start, start + int(self.child_count[row]))
+
+    def rows_of_kind(self, kind_code: int):
+        return np.flatnonzero(self.kind == kind_code)
+
+    def depths(self):
+        """Depth of every row (root = 0), computed level by level."""
+        depth = np.zeros(len(self), dtype=np.int32)
+        ancestor = self.parent.astype(np.int64)
+        while (ancestor >= 0).any():
+            has = ancestor >= 0
+            depth[has] += 1
+            ancestor = np.where(has, self.parent[np.maximum(ancestor, 0)], -1)
+        return depth
+
+    def descendants(self, row: int):
+        """All rows below 'row', level by level."""
+        out = []
+        frontier = np.array([row])
+        while len(frontier):
+            starts = self.child_start[frontier].astype(np.int64)
+            counts = self.child_count[frontier].astype(np.int64)
+            counts_sum = int(counts.sum())
+            if counts_sum == 0:
+                break
+            # Expand [start, start + count) ranges without a Python loop
+            offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+            frontier = offsets + np.arange(counts_sum)
+            out.append(frontier)
+        return np.concatenate(out) if out else np.zeros(0, dtype=np.int64)
+
+    def edges(self):
+        """(child rows, parent rows) for every non-root node."""
+        rows = np.arange(1, len(self))
+        return rows, self.parent[1:].astype(np.int64)
+
+    def atlas_path(self, row: int):
+        """
+        Mesh atlas path for a row (see cad.atlas.MeshAtlas), or None for the root.
+        Faces of one solid are contiguous across its shells in breadth-first order.
+        """
+        k = int(self.kind[row])
+        solids_start = int(self.child_start[0])
+        if k == KIND_SOLID:
+            return ("solid", row - solids_start)
+        if k == KIND_SHELL:
+            solid = int(self.parent[row])
+            return ("shell", solid - solids_start, row - int(self.child_start[solid]))
+        if k == KIND_FACE:
+            solid = int(self.parent[self.parent[row]])
+            first_shell = int(self.child_start[solid])
+            return ("face", solid - solids_start, row - int(self.child_start[first_shell]))
+        return None
+
+    # ---- serialization ----
+
+    def node_dict(self, row: int, lazy=False):
+        node = {"id": self.node_id(row), "name": self.name(row), "type": self.node_type(row), "children": []}
+        if lazy:
+            count = int(self.child_count[row])
+            node["child_count"] = count
+            node["has_children"] = count > 0
+        return node
+
+    def to_dict(self, row: int = 0, depth=None, lazy=False, page_size=None):
+        """
+        Nested JSON-compatible dict (the format the frontend has always used).
+        depth limits how many levels are expanded; page_size limits children per node.
+        """
+        node = self.node_dict(row, lazy=lazy)
+        if depth is not None and depth <= 0:
+            return node
+        children = self.children(row)
+        if page_size is not None:
+            children = children[:page_size]
+        next_depth = None if depth is None else depth - 1
+        node["children"] = [self.to_dict(int(c), next_depth, lazy, page_size) for c in children]
+        return node
+
+    def page(self, row: int, offset: int = 0, limit: int = 200):
+        """
+        One page of a node's children, as dicts with child counts.
+        """
+        total = int(self.child_count[row])
+        offset = max(int(offset), 0)
+        limit = max(int(limit), 0)
+        start = int(self.child_start[row])
+        rows = range(start + min(offset, total), start + min(offset + limit, total))
+        return {
+            "node_id": self.node_id(row),
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "children": [self.node_dict(r, lazy=True) for r in rows],
+        }
+
+    def to_bytes(self) -> bytes:
+        """
+        Binary columnar wire format:
+          header  <4sHHII  b"CTRE", version, root type (0 Assembly / 1 Part), node count, name bytes
+          int32   parent, shape_index, child_start, child_count, name_offset, name_length
+          uint8   kind (padded to a multiple of 4 bytes)
+          bytes   name table (UTF-8)
+        """
+        n = len(self)
+        kind = self.kind.astype(np.uint8).tobytes()
+        kind += b"\x00" * ((-len(kind)) % 4)
+        root_code = 1 if self.root_type == "Part" else 0
+        parts = [_WIRE_HEADER.pack(WIRE_MAGIC, WIRE_VERSION, root_code, n, len(self.names))]
+        for column in (self.parent, self.shape_index, self.child_start, self.child_count,
+                       self.name_offset, self.name_length):
+            parts.append(column.astype("<i4").tobytes())
+        parts.append(kind)
+        parts.append(self.names)
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        magic, version, root_code, n, name_bytes = _WIRE_HEADER.unpack_from(data, 0)
+        if magic != WIRE_MAGIC or version != WIRE_VERSION:
+            raise ValueError("Not a columnar tree blob")
+        pos = _WIRE_HEADER.size
+        columns = []
+        for _ in range(6):
+            columns.append(np.frombuffer(data, dtype="<i4", count=n, offset=pos).astype(np.int32))
+            pos += 4 * n
+        kind = np.frombuffer(data, dtype=np.uint8, count=n, offset=pos).copy()
+        pos += n + ((-n) % 4)
+        names = bytes(data[pos:pos + name_bytes])
+        parent, shape_index, child_start, child_count, name_offset, name_length = columns
+        return cls(parent, kind, name_offset, name_length, shape_index, child_start, child_count,
+                   names, root_type="Part" if root_code == 1 else "Assembly")
+
+
+def build_columnar_tree(shape, root_name="Assembly", root_type="Assembly", maps=None):
+    """
+    Walk solids -> shells -> faces once and fill the tree columns.
+    Sub-shapes are indexed with TopExp::MapShapes, so no handles are kept per node.
+    'maps' may pass in existing solid/shell/face maps (see cad.topology).
+    """
+    from OCC.Core.TopExp import TopExp_Explorer, topexp
+    from OCC.Core.TopAbs import TopAbs_SOLID, TopAbs_SHELL, TopAbs_FACE
+    from OCC.Core.TopTools import TopTools_IndexedMapOfShape
+
+    kind_topabs = {KIND_SOLID: TopAbs_SOLID, KIND_SHELL: TopAbs_SHELL, KIND_FACE: TopAbs_FACE}
+    if maps is None:
+        maps = {}
+        for code, topabs in kind_topabs.items():
+            shape_map = TopTools_IndexedMapOfShape()
+            topexp.MapShapes(shape, topabs, shape_map)
+            maps[KIND_NAMES[code]] = shape_map
+
+    names = root_name.encode("utf-8")
+    parent = [-1]
+    kind = [KIND_ROOT]
+    shape_index = [0]
+    child_start = [1]
+    child_count = [0]
+
+    level = [(0, shape)]
+    for code in (KIND_SOLID, KIND_SHELL, KIND_FACE):
+        shape_map = maps[KIND_NAMES[code]]
+        next_level = []
+        for row, parent_shape in level:
+            child_start[row] = len(parent)
+            explorer = TopExp_Explorer(parent_shape, kind_topabs[code])
+            count = 0
+            while explorer.More():
+                child = explorer.Current()
+                next_level.append((len(parent), child))
+                parent.append(row)
+                kind.append(code)
+                shape_index.append(shape_map.FindIndex(child))
+                child_start.append(0)
+                child_count.append(0)
+                count += 1
+                explorer.Next()
+            child_count[row] = count
+        level = next_level
+
+    # Leaves point their (empty) child range past the end
+    n = len(parent)
+    starts = np.array(child_start, dtype=np.int32)
+    counts = np.array(child_count, dtype=np.int32)
+    starts[counts == 0] = n
+
+    name_offset = np.full(n, -1, dtype=np.int32)
+    name_length = np.zeros(n, dtype=np.int32)
+    name_offset[0] = 0
+    name_length[0] = len(names)
+
+    return ColumnarTree(
+        np.array(parent, dtype=np.int32),
+        np.array(kind, dtype=np.uint8),
+        name_offset,
+        name_length,
+        np.array(shape_index, dtype=np.int32),
+        starts,
+        counts,
+        names,
+        root_type=root_type,
+        maps=maps,
+        shape=shape,
+    )
@@ -0,0 +1,80 @@
+# cad/command_fusion.py
+# Fuse runs of adjacent affine voice commands (scale/move/rotate/non-uniform
+# scale) into one matrix, so an utterance costs one geometry pass.
+
+import numpy as np
+
+from .modify import scale_trsf, translation_trsf, rotation_trsf
+from .mesh_state import trsf_to_matrix
+
+AFFINE_COMMANDS = {"SCALE", "MOVE", "ROTATE", "SCALE_NON_UNIFORM"}
+
+
+def non_uniform_factors(cmd):
+    """(fx, fy, fz) of a SCALE_NON_UNIFORM command, per-axis or direct form."""
+    if "axis" in cmd:
+        axis = cmd["axis"].upper()
+        val = cmd.get("axis_factor", 1.0)
+        return (val if axis == "X" else 1.0, val if axis == "Y" else 1.0, val if axis == "Z" else 1.0)
+    return cmd.get("factor_x", 1.0), cmd.get("factor_y", 1.0), cmd.get("factor_z", 1.0)
+
+
+def command_matrix(cmd):
+    """4x4 matrix of one affine command."""
+    command = cmd.get("command")
+    m = np.eye(4)
+    if command == "SCALE":
+        m[:3] = trsf_to_matrix(scale_trsf(cmd.get("factor", 1.0)))
+    elif command == "MOVE":
+        m[:3] = trsf_to_matrix(translation_trsf(cmd.get("dx", 0.0), cmd.get("dy", 0.0), cmd.get("dz", 0.0)))
+    elif command == "ROTATE":
+        m[:3] = trsf_to_matrix(rotation_trsf(cmd.get("axis", "Z"), cmd.get("angle_degrees", 90)))
+    elif command == "SCALE_NON_UNIFORM":
+        m[:3, :3] = np.diag(non_uniform_factors(cmd))
+    else:
+        raise ValueError(f"Not an affine command: {command}")
+    return m
+
+
+def describe_command(cmd):
+    """Short spoken description of one affine command."""
+    command = cmd.get("command")
+    if command == "SCALE":
+        return f"scaled by {cmd.get('factor', 1.0)}"
+    if command == "MOVE":
+        return f"moved by ({cmd.get('dx', 0.0)}, {cmd.get('dy', 0.0)}, {cmd.get('dz', 0.0)})"
+    if command == "ROTATE":
+        return f"rotated {cmd.get('angle_degrees', 90)} degrees around {cmd.get('axis', 'Z')}"
+    if command == "SCALE_NON_UNIFORM":
+        return "scaled by ({}, {}, {})".format(*non_uniform_factors(cmd))
+    return command.lower()
+
+
+def fuse_commands(commands):
+    """
+    Split an ordered command list into steps:
+      ("affine", 4x4 matrix, [commands])  - two or more adjacent affine commands
+      ("command", command)                - anything else, run on its own
+    The fused matrix applies the commands in the order they were spoken.
+    """
+    steps = []
+    run = []
+
+    def flush():
+        if len(run) == 1:
+            steps.append(("command", run[0]))
+        elif run:
+            m = np.eye(4)
+            for cmd in run:
+                m = command_matrix(cmd) @ m
+            steps.append(("affine", m, list(run)))
+        run.clear()
+
+    for cmd in commands:
+        if cmd.get("command") in AFFINE_COMMANDS:
+            run.append(cmd)
+        else:
+            flush()
+            steps.append(("command", cmd))
+    flush()
+    return steps
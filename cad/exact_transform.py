@@ -0,0 +1,61 @@
+# cad/exact_transform.py
+# Exact non-uniform (GTransform) edits off the request path: the shape goes
+# to the process pool as BRep and comes back transformed, while the viewer
+# shows the cached mesh transformed with NumPy (MeshState.apply_transform).
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from .cache import write_shape, read_shape
+from .modify import transform_shape_affine
+from . import tessellate
+
+
+def _transform_file(src, dst, matrix):
+    """Worker: read a shape from BRep, transform it exactly and write it back."""
+    write_shape(transform_shape_affine(read_shape(src), matrix), dst)
+    return dst
+
+
+class ExactTransform:
+    """
+    Exact affine transform of a shape running in the tessellation pool.
+    result() blocks until it is done and returns the transformed shape.
+    """
+
+    def __init__(self, shape, matrix, workers=None):
+        self.matrix = np.asarray(matrix, dtype=np.float64)[:3]
+        self.history_index = None  # history entry waiting for the result
+        self._shape = None
+        self._spool = tempfile.mkdtemp(prefix="gtransform_")
+        src = os.path.join(self._spool, "input.brep")
+        write_shape(shape, src)
+        from workers import CAD_POOL
+        tessellate.get_pool(workers)
+        try:
+            self._future = CAD_POOL.submit(_transform_file, src, os.path.join(self._spool, "output.brep"),
+                                           self.matrix.tolist())
+        except Exception:
+            shutil.rmtree(self._spool, ignore_errors=True)
+            raise
+
+    def done(self):
+        return self._shape is not None or self._future.done()
+
+    def result(self):
+        if self._shape is None:
+            try:
+                self._shape = read_shape(self._future.result())
+            finally:
+                shutil.rmtree(self._spool, ignore_errors=True)
+        return self._shape
+
+    def cancel(self):
+        """Drop the job (e.g. a new model was loaded); a running worker finishes unseen."""
+        if self._future.cancel():
+            shutil.rmtree(self._spool, ignore_errors=True)
+        else:
+            self._future.add_done_callback(lambda f: shutil.rmtree(self._spool, ignore_errors=True))
@@ -2,16 +2,22 @@
 # Export functions for Web Viewer (STL/GLB)
 
 import os
+import json
+import struct
+
+import numpy as np
+
 from OCC.Core.StlAPI import StlAPI_Writer
-from OCC.Core.BRepMesh import BRepMesh_IncrementalMesh
 
-def export_to_stl(shape, filename: str, deflection=0.01):
+from .mesh import mesh_shape, extract_meshes, relative_deflection, DEFAULT_DEFLECTION_RATIO
+
+def export_to_stl(shape, filename: str, deflection=None):
     """
     Export the shape to an ASCII or Binary STL file.
-    Must mesh the shape first.
+    Must mesh the shape first; by default at the fine, size-relative deflection.
     """
     # 1. Mesh the shape
-    mesh = BRepMesh_IncrementalMesh(shape, deflection)
+    mesh_shape(shape, deflection or relative_deflection(shape, DEFAULT_DEFLECTION_RATIO))
     
     # 2. Write STL
     writer = StlAPI_Writer()
@@ -19,20 +25,209 @@ def export_to_stl(shape, filename: str, deflection=0.01):
     
     return filename
 
-def export_component_to_stl(component_id: str, filename: str, deflection=0.01):
+def export_component_to_stl(tree, component_id: str, filename: str, deflection=None):
     """
-    Export a specific component to STL by its ID.
+    Export a specific component to STL by its ID in 'tree' (a session's columnar tree).
     """
-    from .tree import SHAPE_REFS
+    from .tree import resolve_node_shape
     
-    if component_id not in SHAPE_REFS:
+    shape = resolve_node_shape(tree, component_id)
+    if shape is None:
         return None
     
-    shape = SHAPE_REFS[component_id]
-    
     # Mesh and export
-    mesh = BRepMesh_IncrementalMesh(shape, deflection)
+    mesh_shape(shape, deflection or relative_deflection(shape, DEFAULT_DEFLECTION_RATIO))
     writer = StlAPI_Writer()
     writer.Write(shape, filename)
     
     return filename
+
+
+# ---- GLB (binary glTF 2.0) ----
+
+_GL_ARRAY_BUFFER = 34962
+_GL_ELEMENT_ARRAY_BUFFER = 34963
+_GL_BYTE = 5120
+_GL_SHORT = 5122
+_GL_UNSIGNED_SHORT = 5123
+_GL_UNSIGNED_INT = 5125
+_GL_FLOAT = 5126
+
+
+def build_glb(meshes, quantize=False) -> bytes:
+    """
+    Pack indexed meshes (see cad.mesh.extract_solid_mesh) into a GLB blob,
+    one node + mesh per solid.
+
+    With quantize=True positions are stored as int16 and normals as int8
+    (KHR_mesh_quantization); each node's scale/translation restores model units.
+    """
+    chunks = []
+    buffer_views = []
+    accessors = []
+    gl_meshes = []
+    nodes = []
+    offset = 0
+
+    def add_view(data: bytes, target, stride=None):
+        nonlocal offset
+        view = {"buffer": 0, "byteOffset": offset, "byteLength": len(data), "target": target}
+        if stride:
+            view["byteStride"] = stride
+        pad = (-len(data)) % 4
+        chunks.append(data)
+        if pad:
+            chunks.append(b"\x00" * pad)
+        offset += len(data) + pad
+        buffer_views.append(view)
+        return len(buffer_views) - 1
+
+    def add_accessor(view, component_type, count, acc_type, normalized=False, vmin=None, vmax=None):
+        accessor = {"bufferView": view, "componentType": component_type, "count": count, "type": acc_type}
+        if normalized:
+            accessor["normalized"] = True
+        if vmin is not None:
+            accessor["min"] = vmin
+            accessor["max"] = vmax
+        accessors.append(accessor)
+        return len(accessors) - 1
+
+    for i, mesh in enumerate(meshes):
+        vertices = np.asarray(mesh["vertices"], dtype=np.float32)
+        normals = np.asarray(mesh["normals"], dtype=np.float32)
+        indices = np.asarray(mesh["indices"]).reshape(-1)
+        if len(indices) == 0:
+            continue
+        n = len(vertices)
+        node = {"mesh": len(gl_meshes), "name": mesh.get("name") or f"Solid {i + 1}"}
+
+        if quantize:
+            lo = vertices.min(axis=0).astype(np.float64)
+            hi = vertices.max(axis=0).astype(np.float64)
+            center = (lo + hi) / 2
+            # One step for all axes: a non-uniform node scale would also skew the normals
+            step = max(float((hi - lo).max()) / 2, 1e-12) / 32767.0
+            q = np.zeros((n, 4), dtype=np.int16)  # padded to 8 bytes for alignment
+            q[:, :3] = np.clip(np.round((vertices - center) / step), -32767, 32767)
+            pos_view = add_view(q.tobytes(), _GL_ARRAY_BUFFER, stride=8)
+            position = add_accessor(pos_view, _GL_SHORT, n, "VEC3",
+                                    vmin=q[:, :3].min(axis=0).tolist(), vmax=q[:, :3].max(axis=0).tolist())
+            qn = np.zeros((n, 4), dtype=np.int8)  # padded to 4 bytes for alignment
+            qn[:, :3] = np.clip(np.round(normals * 127), -127, 127)
+            nrm_view = add_view(qn.tobytes(), _GL_ARRAY_BUFFER, stride=4)
+            normal = add_accessor(nrm_view, _GL_BYTE, n, "VEC3", normalized=True)
+            node["translation"] = center.tolist()
+            node["scale"] = [step] * 3
+        else:
+            pos_view = add_view(vertices.tobytes(), _GL_ARRAY_BUFFER)
+            position = add_accessor(pos_view, _GL_FLOAT, n, "VEC3",
+                                    vmin=vertices.min(axis=0).tolist(), vmax=vertices.max(axis=0).tolist())
+            nrm_view = add_view(normals.tobytes(), _GL_ARRAY_BUFFER)
+            normal = add_accessor(nrm_view, _GL_FLOAT, n, "VEC3")
+
+        if n <= 0xFFFF:
+            idx_view = add_view(indices.astype(np.uint16).tobytes(), _GL_ELEMENT_ARRAY_BUFFER)
+            index = add_accessor(idx_view, _GL_UNSIGNED_SHORT, len(indices), "SCALAR")
+        else:
+            idx_view = add_view(indices.astype(np.uint32).tobytes(), _GL_ELEMENT_ARRAY_BUFFER)
+            index = add_accessor(idx_view, _GL_UNSIGNED_INT, len(indices), "SCALAR")
+
+        gl_meshes.append({
+            "name": node["name"],
+            "primitives": [{
+                "attributes": {"POSITION": position, "NORMAL": normal},
+                "indices": index,
+                "material": 0,
+                "mode": 4,
+            }],
+        })
+        nodes.append(node)
+
+    binary = b"".join(chunks)
+    gltf = {
+        "asset": {"version": "2.0", "generator": "cad-voice-assistant"},
+        "scene": 0,
+        "scenes": [{"nodes": list(range(len(nodes)))}],
+        "nodes": nodes,
+        "meshes": gl_meshes,
+        "materials": [{
+            "name": "default",
+            "pbrMetallicRoughness": {"baseColorFactor": [0.8, 0.8, 0.8, 1.0], "metallicFactor": 0.8, "roughnessFactor": 0.5},
+        }],
+        "accessors": accessors,
+        "bufferViews": buffer_views,
+        "buffers": [{"byteLength": len(binary)}] if binary else [],
+    }
+    if quantize:
+        gltf["extensionsUsed"] = ["KHR_mesh_quantization"]
+        gltf["extensionsRequired"] = ["KHR_mesh_quantization"]
+    if not binary:
+        del gltf["bufferViews"], gltf["accessors"]
+
+    json_bytes = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+    json_bytes += b" " * ((-len(json_bytes)) % 4)
+
+    out = [struct.pack("<I4s", len(json_bytes), b"JSON"), json_bytes]
+    if binary:
+        out += [struct.pack("<I4s", len(binary), b"BIN\x00"), binary]
+    body = b"".join(out)
+    return struct.pack("<4sII", b"glTF", 2, 12 + len(body)) + body
+
+
+def write_glb(meshes, filename: str, quantize=False):
+    """
+    Write indexed meshes to a .glb file.
+    """
+    with open(filename, "wb") as f:
+        f.write(build_glb(meshes, quantize=quantize))
+    return filename
+
+
+def export_to_glb(shape, filename: str, deflection=None, quantize=False):
+    """
+    Export the shape to binary glTF with shared-vertex indexed buffers,
+    one mesh node per solid (by default at the fine, size-relative deflection).
+    """
+    mesh_shape(shape, deflection or relative_deflection(shape, DEFAULT_DEFLECTION_RATIO))
+    return write_glb(extract_meshes(shape), filename, quantize=quantize)
+
+
+# ---- Binary STL straight from mesh arrays ----
+
+_STL_RECORD = np.dtype([
+    ("normal", "<f4", (3,)),
+    ("vertices", "<f4", (3, 3)),
+    ("attr", "<u2"),
+])
+
+
+def binary_stl_bytes(meshes) -> bytes:
+    """
+    Encode indexed meshes as a binary STL blob.
+    """
+    records = []
+    for mesh in meshes:
+        indices = np.asarray(mesh["indices"]).reshape(-1, 3)
+        if len(indices) == 0:
+            continue
+        tris = np.asarray(mesh["vertices"], dtype=np.float32)[indices]
+        normals = np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0])
+        length = np.linalg.norm(normals, axis=1, keepdims=True)
+        length[length == 0] = 1.0
+        rec = np.zeros(len(tris), dtype=_STL_RECORD)
+        rec["normal"] = normals / length
+        rec["vertices"] = tris
+        records.append(rec)
+
+    data = np.concatenate(records) if records else np.zeros(0, dtype=_STL_RECORD)
+    header = b"cad-voice-assistant binary STL".ljust(80, b"\x00")
+    return header + struct.pack("<I", len(data)) + data.tobytes()
+
+
+def write_binary_stl(meshes, filename: str):
+    """
+    Write indexed meshes as a binary STL without going back through OCC.
+    """
+    with open(filename, "wb") as f:
+        f.write(binary_stl_bytes(meshes))
+    return filename
@@ -1,14 +1,11 @@
 # cad/features.py
 # Basic feature detection + simple 3D viewer for the CAD Voice Assistant.
 
-from OCC.Core.TopExp import TopExp_Explorer
-from OCC.Core.TopAbs import TopAbs_FACE
-from OCC.Core.TopoDS import topods  # helper for downcasting
-from OCC.Core.BRepAdaptor import BRepAdaptor_Surface
-from OCC.Core.GeomAbs import GeomAbs_Cylinder
-
 from OCC.Display.SimpleGui import init_display
 
+from .topology import get_topology_index, SURFACE_CYLINDER
+from .recognition import get_feature_table
+
 # ---- GLOBAL VIEWER OBJECTS ----
 _display = None
 _start_display = None
@@ -51,14 +48,8 @@ def list_all_faces(shape):
     """
     Return a list of all faces in the shape.
     """
-    faces = []
-    explorer = TopExp_Explorer(shape, TopAbs_FACE)
-    while explorer.More():
-        # Downcast to Face using topods helper
-        face = topods.Face(explorer.Current())
-        faces.append(face)
-        explorer.Next()
-    return faces
+    index = get_topology_index(shape)
+    return [index.face(row) for row in range(index.face_count)]
 
 
 def find_cylindrical_faces(shape):
@@ -66,39 +57,37 @@ def find_cylindrical_faces(shape):
     Find all cylindrical faces (often holes/bosses).
     Returns list of dicts with radius + axis direction.
     """
-    cylinders = []
-    faces = list_all_faces(shape)
-
-    for face in faces:
-        adaptor = BRepAdaptor_Surface(face, True)
-        surf_type = adaptor.GetType()
-
-        if surf_type == GeomAbs_Cylinder:
-            cyl = adaptor.Cylinder()
-            radius = cyl.Radius()
-            axis = cyl.Axis()
-            direction = axis.Direction()
-            dx, dy, dz = direction.X(), direction.Y(), direction.Z()
+    index = get_topology_index(shape)
+    faces = index.faces
 
-            cylinders.append({
-                "face": face,
-                "radius": radius,
-                "axis_dir": (dx, dy, dz),
-            })
+    cylinders = []
+    for row in index.rows_of_surface(SURFACE_CYLINDER):
+        cylinders.append({
+            "face": index.face(row),
+            "index": int(row),
+            "solid": int(faces["solid"][row]),
+            "radius": float(faces["radius"][row]),
+            "axis_dir": tuple(float(v) for v in faces["axis"][row]),
+        })
 
     return cylinders
 
 def create_feature_summary(shape):
-    faces = list_all_faces(shape)
-    cylinders = find_cylindrical_faces(shape)
+    index = get_topology_index(shape)
+    cylinders = index.rows_of_surface(SURFACE_CYLINDER)
+    return format_feature_summary(index.face_count, len(cylinders), get_feature_table(shape, topology=index))
+
 
+def format_feature_summary(face_count, cylinder_count, table):
+    """
+    Feature summary text from face/cylinder counts and a FeatureTable.
+    """
     summary = []
-    summary.append(f"Total faces: {len(faces)}")
-    summary.append(f"Cylindrical faces (possible holes/bosses): {len(cylinders)}")
+    summary.append(f"Total faces: {face_count}")
+    summary.append(f"Cylindrical faces (possible holes/bosses): {cylinder_count}")
 
-    for i, cyl in enumerate(cylinders):
-        r = cyl['radius']
-        ax = cyl['axis_dir']
-        summary.append(f"Cylinder {i+1}: radius = {r:.2f}, axis direction = {ax}")
+    summary.append(f"Recognized features (numbered per type, refer to them as e.g. 'hole 2'): {len(table)}")
+    for row in range(len(table)):
+        summary.append(table.describe(row))
 
     return "\n".join(summary)
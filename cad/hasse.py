@@ -1,106 +1,232 @@
 # cad/hasse.py
-import networkx as nx
+# Hasse diagram (transitive reduction + layer ranks) of the assembly poset
 
-def generate_hasse_data(assembly_tree):
+import numpy as np
+
+from .columnar_tree import ColumnarTree
+from .step_scanner import scan_product_structure
+
+# Layout hints sent with each node (the frontend may re-layout with Dagre)
+RANK_SPACING = 100
+NODE_SPACING = 200
+
+# Last result, keyed on the model version it was built for
+HASSE_CACHE = {"version": None, "data": None}
+
+
+def _flatten(assembly_tree):
+    """
+    Walk a nested {"id", "name", "type", "children"} tree.
+    Returns (ids, labels, edges) with edges as (child index, parent index) pairs.
+    A node id seen twice (a shared sub-assembly) becomes one node with several parents.
     """
-    Converts a hierarchical assembly tree into a Hasse Diagram (Poset).
-    Returns JSON data suitable for React Flow (nodes, edges).
-    """
-    G = nx.DiGraph()
-    
-    # 1. Flatten tree and build full graph (including transitive edges implied by hierarchy)
-    # Actually, the assembly tree usually GIVES us the "is-child-of" relationships directly.
-    # In a perfect STEP file, Part -> Assembly -> Root is direct.
-    # But sometimes there are nested assemblies or redundant links.
-    
-    # We will walk the tree. 
-    # Nodes: id, label, type, level (calculated later)
-    # Edges: child -> parent (Poset convention: x < y, so arrow from part to assembly)
-    
-    nodes_map = {} # id -> node_data
-    edges_set = set()
-    
-    def traverse(node, parent_id=None):
+    index = {}
+    ids, labels = [], []
+    edges = set()
+
+    stack = [(assembly_tree, -1)]
+    while stack:
+        node, parent = stack.pop()
         node_id = node['id']
-        node_name = node['name']
-        node_type = node['type']
-        
-        # Add to map if not exists (handle shared parts?)
-        if node_id not in nodes_map:
-            nodes_map[node_id] = {
-                "id": node_id, 
-                "label": node_name,
-                "type": node_type
-            }
-        
-        if parent_id:
-            # Direction: Child -> Parent (is-part-of)
-            # This follows the standard "Hasse diagram" convention where lower elements 
-            # are "less than" upper elements.
-            edges_set.add((node_id, parent_id))
-            
-        for child in node.get('children', []):
-            traverse(child, node_id)
-            
-    traverse(assembly_tree)
-    
-    # 2. Build NetworkX Graph
-    G.add_nodes_from(nodes_map.keys())
-    G.add_edges_from(list(edges_set))
-    
-    # 3. Transitive Reduction
-    # Removes shortcuts. If A->B and B->C and A->C exist, remove A->C.
-    # This is the DEFINITION of a Hasse diagram edge set.
-    TR = nx.transitive_reduction(G)
-    
-    # Note: TR is a new graph with same nodes but fewer edges.
-    
-    # 4. Calculate Levels (Longest path from a sink/bottom node)
-    # In a DAG, we can assign levels.
-    # Bottom nodes (in-degree 0 in Child->Parent graph) = Level 0?
-    # Actually, in Child->Parent graph:
-    # Parts have out-degree to Assembly.
-    # Root has out-degree 0 (it is the top).
-    # So "sources" are Parts, "sinks" are Roots.
-    
-    levels = {}
-    # Longest path logic:
-    # For each node, length of longest path to a root? OR from a leaf?
-    # Hasse usually aligns by generic "rank".
-    # Let's use simple topological generation or just longest path from source.
-    
-    for node in G.nodes():
-        # Distance to "top" (Root)
-        # Or distance from "bottom"
-        # Let's allow Dagre on frontend to handle X coordinates, but we can hint ranks.
-        pass
-
-    # Actually, for data transfer, we just send structure. 
-    # NetworkX has no simple "rank" attribute, and Dagre does it better visually.
-    # WE JUST SEND THE REDUCED EDGES.
-    
-    # 5. Format for React Flow
+        i = index.get(node_id)
+        if i is None:
+            i = index[node_id] = len(ids)
+            ids.append(node_id)
+            labels.append(f"{node['name']} ({node['type']})")
+        if parent >= 0:
+            # Direction: Child -> Parent (is-part-of), lower elements point up
+            edges.add((i, parent))
+        for child in reversed(node.get('children', [])):
+            stack.append((child, i))
+
+    return ids, labels, sorted(edges)
+
+
+def _topological_order(n, parents):
+    """
+    Kahn's algorithm on the child -> parent graph, bottom (parts) first.
+    Raises ValueError if the graph has a cycle.
+    """
+    pending = [0] * n  # unprocessed children per node
+    for ps in parents:
+        for p in ps:
+            pending[p] += 1
+    order = [i for i in range(n) if pending[i] == 0]
+    for u in order:
+        for p in parents[u]:
+            pending[p] -= 1
+            if pending[p] == 0:
+                order.append(p)
+    if len(order) != n:
+        raise ValueError("Assembly graph has a cycle")
+    return order
+
+
+def reduce_dag(n, edges):
+    """
+    Transitive reduction of a child -> parent DAG.
+
+    Only nodes with more than one parent can carry a redundant edge
+    (u -> p is redundant iff p is above another parent of u), so the
+    ancestor sets are built once, top down, as integer bitsets and
+    checked just for those nodes.
+    Returns (reduced edges, topological order bottom-up).
+    """
+    parents = [[] for _ in range(n)]
+    for u, p in edges:
+        parents[u].append(p)
+    order = _topological_order(n, parents)
+
+    if all(len(ps) <= 1 for ps in parents):
+        # Tree or forest: nothing to remove
+        return list(edges), order
+
+    above = [0] * n  # bitset of strict ancestors
+    for u in reversed(order):
+        bits = 0
+        for p in parents[u]:
+            bits |= above[p] | (1 << p)
+        above[u] = bits
+
+    reduced = []
+    for u, ps in enumerate(parents):
+        if len(ps) == 1:
+            reduced.append((u, ps[0]))
+            continue
+        for p in ps:
+            # Redundant if p is reachable through one of u's other parents
+            if not any(q != p and (above[q] >> p) & 1 for q in ps):
+                reduced.append((u, p))
+    return reduced, order
+
+
+def layer_ranks(n, edges, order):
+    """
+    Rank of each node = longest path down to a bottom element (parts are 0).
+    """
+    rank = [0] * n
+    position = [0] * n
+    for i, u in enumerate(order):
+        position[u] = i
+    for u, p in sorted(edges, key=lambda e: position[e[0]]):
+        if rank[u] + 1 > rank[p]:
+            rank[p] = rank[u] + 1
+    return rank
+
+
+def _columnar_ranks(tree: ColumnarTree):
+    """
+    Height of every row in a columnar tree, one NumPy pass per tree level.
+    """
+    n = len(tree)
+    rank = np.zeros(n, dtype=np.int64)
+    depth = tree.depths()
+    for d in range(int(depth.max(initial=0)), 0, -1):
+        rows = np.flatnonzero(depth == d)
+        np.maximum.at(rank, tree.parent[rows], rank[rows] + 1)
+    return rank
+
+
+def _format(ids, labels, edges, rank):
+    """
+    React Flow nodes and edges, with ranks and a layered position hint.
+    """
+    slot = {}
     output_nodes = []
-    for nid, data in nodes_map.items():
+    for node_id, label, r in zip(ids, labels, rank):
+        r = int(r)
+        x = slot.get(r, 0)
+        slot[r] = x + 1
         output_nodes.append({
-            "id": nid,
-            "data": { "label": f"{data['label']} ({data['type']})" },
-            "position": { "x": 0, "y": 0 }, # Layout will be handled by Dagre
-            "type": "default" # or custom
+            "id": node_id,
+            "data": {"label": label, "rank": r},
+            "position": {"x": x * NODE_SPACING, "y": -r * RANK_SPACING},
+            "type": "default"
         })
-        
+
     output_edges = []
-    for u, v in TR.edges():
+    for u, v in edges:
+        source, target = ids[u], ids[v]
         output_edges.append({
-            "id": f"e{u}-{v}",
-            "source": u, # Child
-            "target": v, # Parent
+            "id": f"e{source}-{target}",
+            "source": source,  # Child
+            "target": target,  # Parent
             "type": "smoothstep",
             "animated": False,
-            "style": { "stroke": "#333" }
+            "style": {"stroke": "#333"}
         })
-        
+
     return {
         "nodes": output_nodes,
         "edges": output_edges
     }
+
+
+def generate_hasse_data(assembly_tree):
+    """
+    Converts an assembly tree into a Hasse Diagram (Poset).
+    Accepts a ColumnarTree or a nested dict tree (possibly with shared
+    sub-assemblies, i.e. repeated ids). Returns JSON data suitable for
+    React Flow (nodes, edges), each node carrying its layer rank.
+    """
+    if isinstance(assembly_tree, ColumnarTree):
+        # Already a tree: its edges are the Hasse diagram
+        tree = assembly_tree
+        rows = range(len(tree))
+        ids = [tree.node_id(r) for r in rows]
+        labels = [f"{tree.name(r)} ({tree.node_type(r)})" for r in rows]
+        children, parents = tree.edges()
+        return _format(ids, labels, zip(children.tolist(), parents.tolist()), _columnar_ranks(tree))
+
+    ids, labels, edges = _flatten(assembly_tree)
+    reduced, order = reduce_dag(len(ids), edges)
+    return _format(ids, labels, reduced, layer_ranks(len(ids), reduced, order))
+
+
+def generate_product_hasse_data(products):
+    """
+    Hasse diagram of a STEP product structure, as returned by
+    cad.step_scanner.scan_product_structure. Every product is one node, so
+    a sub-assembly used in several assemblies has several parents and the
+    graph is a DAG; redundant edges are removed with reduce_dag.
+    """
+    keys = list(products)
+    index = {key: i for i, key in enumerate(keys)}
+    ids = [f"product-{key}" for key in keys]
+    labels = []
+    for key in keys:
+        product = products[key]
+        labels.append(f"{product['name'] or f'Component {key}'} "
+                      f"({'Assembly' if product['children'] else 'Part'})")
+    edges = sorted({(index[child], index[key])
+                    for key, product in products.items()
+                    for child in product['children'] if child in index})
+    reduced, order = reduce_dag(len(ids), edges)
+    return _format(ids, labels, reduced, layer_ranks(len(ids), reduced, order))
+
+
+def step_product_hasse_data(step_filename):
+    """
+    Product Hasse diagram of a STEP file, or None if it has no usable
+    product structure (none at all, or a cyclic one from a malformed file).
+    """
+    products = scan_product_structure(step_filename)
+    if not products:
+        return None
+    try:
+        return generate_product_hasse_data(products)
+    except ValueError as e:
+        print(f"Product structure of {step_filename} not usable: {e}")
+        return None
+
+
+def get_hasse_data(assembly_tree, version, cache=HASSE_CACHE, build=generate_hasse_data):
+    """
+    build(assembly_tree) (generate_hasse_data by default), memoized on the
+    model version ('cache' holds one model's result; the server keeps one
+    per session and source).
+    """
+    if cache["version"] != version or cache["data"] is None:
+        cache["data"] = build(assembly_tree)
+        cache["version"] = version
+    return cache["data"]
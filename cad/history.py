@@ -0,0 +1,274 @@
+# cad/history.py
+# Undo/redo history of model edits: each edit is recorded as an operation
+# with its parameters; shapes share unchanged sub-shapes between versions,
+# periodic BRep snapshots bound replay, and a memory budget evicts old geometry.
+
+import os
+import shutil
+
+from OCC.Core.TopLoc import TopLoc_Location
+
+from .cache import write_shape, read_shape
+from .modify import (scale_shape, scale_shape_non_uniform,
+                     scale_trsf, translation_trsf, rotation_trsf,
+                     is_uniform_matrix, affine_trsf, transform_shape_affine, scale_matrix)
+from .scoped_edit import delete_solid_indexed, resize_feature_at_face
+
+HISTORY_DIR = os.getenv("HISTORY_DIR", os.path.join("assets", "history"))
+# Estimated bytes of geometry kept in memory for undo
+HISTORY_MAX_BYTES = int(os.getenv("HISTORY_MAX_BYTES", str(512 * 1024 * 1024)))
+# Write a BRep snapshot every N recorded edits
+SNAPSHOT_INTERVAL = int(os.getenv("HISTORY_SNAPSHOT_INTERVAL", "8"))
+
+
+def operation_trsf(op, params):
+    """gp_Trsf of a rigid/uniform-scale operation, None for other operations."""
+    if op == "scale":
+        return scale_trsf(params["factor"])
+    if op == "move":
+        return translation_trsf(params["dx"], params["dy"], params["dz"])
+    if op == "rotate":
+        return rotation_trsf(params["axis"], params["angle"])
+    if op == "affine" and is_uniform_matrix(params["matrix"]):
+        return affine_trsf(params["matrix"])
+    if op == "scale_non_uniform":
+        m = scale_matrix(params["fx"], params["fy"], params["fz"])
+        return affine_trsf(m) if is_uniform_matrix(m) else None
+    return None
+
+
+def _replay_scale(shape, factor):
+    return scale_shape(shape, factor)
+
+
+def _replay_move(shape, dx, dy, dz):
+    return shape.Moved(TopLoc_Location(translation_trsf(dx, dy, dz)))
+
+
+def _replay_rotate(shape, axis, angle):
+    return shape.Moved(TopLoc_Location(rotation_trsf(axis, angle)))
+
+
+def _replay_delete(shape, index):
+    return delete_solid_indexed(shape, index)[0]
+
+
+def _replay_resize_feature(shape, face, radius):
+    # 'face' is the face's row in the topology index of the input shape
+    return resize_feature_at_face(shape, face, radius)
+
+
+def _replay_scale_non_uniform(shape, fx, fy, fz):
+    return scale_shape_non_uniform(shape, fx, fy, fz)
+
+
+def _replay_affine(shape, matrix):
+    # Fused run of affine voice commands (see cad.command_fusion)
+    if _is_rigid_affine(matrix):
+        return shape.Moved(TopLoc_Location(affine_trsf(matrix)))
+    return transform_shape_affine(shape, matrix)
+
+
+def _is_rigid_affine(matrix):
+    return is_uniform_matrix(matrix) and abs(affine_trsf(matrix).ScaleFactor() - 1.0) <= 1e-12
+
+
+OPERATIONS = {
+    "scale": _replay_scale,
+    "move": _replay_move,
+    "rotate": _replay_rotate,
+    "delete": _replay_delete,
+    "resize_feature": _replay_resize_feature,
+    "scale_non_uniform": _replay_scale_non_uniform,
+    "affine": _replay_affine,
+}
+# Operations whose result reuses every sub-shape of their input
+# (a new location or a new compound of the same solids) - cheap to keep and to replay
+SHARING_OPERATIONS = {"move", "rotate", "delete"}
+
+
+class HistoryEntry:
+    def __init__(self, op, params, shape, cost):
+        self.op = op            # "load" or a key of OPERATIONS
+        self.params = params
+        self.shape = shape      # None once evicted
+        self.cost = cost        # estimated bytes of geometry this entry added
+        self.snapshot = None    # BRep path, if snapshotted
+
+
+class ShapeHistory:
+    """
+    Linear edit history with a cursor. Entry 0 is the loaded model; entry i
+    is the model after the i-th edit. Undo/redo move the cursor and return
+    that entry's shape, restoring evicted shapes from the nearest earlier
+    shape in memory or snapshot and replaying the recorded operations.
+    """
+
+    def __init__(self, directory=HISTORY_DIR, max_bytes=HISTORY_MAX_BYTES, interval=SNAPSHOT_INTERVAL):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.interval = max(interval, 1)
+        self.entries = []
+        self.cursor = -1
+        self.model_bytes = 0
+        self._serial = 0
+
+    def reset(self, shape, name=None):
+        """Start a new history from a freshly loaded model."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
+        self.entries = [HistoryEntry("load", {"name": name}, shape, 0)]
+        self.cursor = 0
+        self._snapshot(0)
+        self.entries[0].cost = self.model_bytes
+
+    def record(self, op, params, shape):
+        """
+        Add the result of an edit after the cursor, dropping any redo branch.
+        'shape' may be None while the result is still being computed (see
+        attach()). Returns the new entry's index.
+        """
+        for entry in self.entries[self.cursor + 1:]:
+            self._drop_snapshot(entry)
+        del self.entries[self.cursor + 1:]
+
+        shares = op in SHARING_OPERATIONS or (op == "affine" and _is_rigid_affine(params["matrix"]))
+        cost = 0 if shares else self.model_bytes
+        self.entries.append(HistoryEntry(op, params, shape, cost))
+        self.cursor += 1
+        if shape is not None and self.cursor % self.interval == 0:
+            self._snapshot(self.cursor)
+        self._enforce_budget()
+        return self.cursor
+
+    def attach(self, index, shape):
+        """
+        Fill in the shape of an entry recorded without one. Entries dropped
+        or already materialized by replay in the meantime are left alone.
+        """
+        if index >= len(self.entries) or self.entries[index].shape is not None:
+            return
+        self.entries[index].shape = shape
+        if index % self.interval == 0 and self.entries[index].snapshot is None:
+            self._snapshot(index)
+        self._enforce_budget()
+
+    def can_undo(self):
+        return self.cursor > 0
+
+    def can_redo(self):
+        return self.cursor + 1 < len(self.entries)
+
+    def undo(self):
+        """
+        Step back one edit. Returns (undone entry, shape) or None.
+        """
+        if not self.can_undo():
+            return None
+        undone = self.entries[self.cursor]
+        self.cursor -= 1
+        return undone, self._materialize(self.cursor)
+
+    def redo(self):
+        """
+        Step forward one edit. Returns (redone entry, shape) or None.
+        """
+        if not self.can_redo():
+            return None
+        self.cursor += 1
+        return self.entries[self.cursor], self._materialize(self.cursor)
+
+    def current(self):
+        """Shape at the cursor, read back from disk if it was persisted."""
+        return self._materialize(self.cursor)
+
+    def in_memory_bytes(self):
+        """Estimated bytes of geometry held in memory."""
+        return sum(e.cost for e in self.entries if e.shape is not None)
+
+    def persist(self):
+        """
+        Make sure the shape at the cursor has a BRep snapshot, then drop all
+        in-memory geometry. Earlier/later entries replay from snapshots.
+        """
+        if self.cursor < 0:
+            return
+        entry = self.entries[self.cursor]
+        if entry.snapshot is None:
+            self._materialize(self.cursor)
+            self._snapshot(self.cursor)
+        for e in self.entries:
+            e.shape = None
+
+    def describe(self):
+        return {
+            "cursor": self.cursor,
+            "can_undo": self.can_undo(),
+            "can_redo": self.can_redo(),
+            "entries": [
+                {
+                    "index": i,
+                    "op": entry.op,
+                    "params": entry.params,
+                    "in_memory": entry.shape is not None,
+                    "snapshot": entry.snapshot is not None,
+                }
+                for i, entry in enumerate(self.entries)
+            ],
+        }
+
+    # ---- internals ----
+
+    def _materialize(self, index):
+        entry = self.entries[index]
+        if entry.shape is not None:
+            return entry.shape
+
+        # Nearest earlier entry with a shape in memory or on disk
+        start = index
+        while self.entries[start].shape is None and self.entries[start].snapshot is None:
+            start -= 1
+        shape = self.entries[start].shape
+        if shape is None:
+            shape = read_shape(self.entries[start].snapshot)
+            self.entries[start].shape = shape
+
+        for i in range(start + 1, index + 1):
+            step = self.entries[i]
+            shape = OPERATIONS[step.op](shape, **step.params)
+            step.shape = shape
+        self._enforce_budget()
+        return shape
+
+    def _snapshot(self, index):
+        entry = self.entries[index]
+        self._serial += 1
+        path = os.path.join(self.directory, f"snapshot_{self._serial:06d}.brep")
+        write_shape(entry.shape, path)
+        entry.snapshot = path
+        self.model_bytes = os.path.getsize(path)
+
+    def _drop_snapshot(self, entry):
+        if entry.snapshot:
+            try:
+                os.remove(entry.snapshot)
+            except OSError:
+                pass
+            entry.snapshot = None
+
+    def _enforce_budget(self):
+        """
+        Evict in-memory geometry, oldest first, until the estimate fits.
+        Geometry is evicted per run - a copying edit plus the sharing edits
+        after it - since the sharing edits hold the same sub-shapes.
+        """
+        start = 0
+        while self.in_memory_bytes() > self.max_bytes and start < self.cursor:
+            end = start + 1
+            while end < len(self.entries) and self.entries[end].cost == 0:
+                end += 1
+            if end > self.cursor:
+                break  # the run holds the current model
+            for entry in self.entries[start:end]:
+                entry.shape = None
+            start = end
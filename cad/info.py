@@ -8,8 +8,15 @@ def create_cad_summary(shape) -> str:
     Convert raw CAD geometry into a human-readable summary.
     The AI will use this context to answer product questions.
     """
-    num_solids = count_solids(shape)
-    xmin, ymin, zmin, xmax, ymax, zmax, dx, dy, dz = get_bounding_box(shape)
+    return format_cad_summary(count_solids(shape), get_bounding_box(shape)[:6])
+
+
+def format_cad_summary(num_solids, bbox) -> str:
+    """
+    Summary text from a solid count and (xmin, ymin, zmin, xmax, ymax, zmax).
+    """
+    xmin, ymin, zmin, xmax, ymax, zmax = bbox
+    dx, dy, dz = xmax - xmin, ymax - ymin, zmax - zmin
 
     summary = f"""
 CAD Model Summary:
@@ -11,13 +11,26 @@ from OCC.Core.TopExp import TopExp_Explorer
 from OCC.Core.Bnd import Bnd_Box
 from OCC.Core.BRepBndLib import brepbndlib_Add
 
-def load_step_shape(filename: str):
+from . import cache
+from .step_scanner import scan_product_structure
+
+def load_step_shape(filename: str, use_cache: bool = True, count: bool = True):
     """
     Load a STEP file and return the main shape.
+    Repeat loads of the same content are served from the BRep shape cache
+    ('count' as in cache.get_cached_shape).
     """
     if not os.path.exists(filename):
         raise FileNotFoundError(f"STEP file not found: {filename}")
 
+    digest = None
+    if use_cache:
+        digest = cache.file_digest(filename)
+        shape = cache.get_cached_shape(digest, count=count)
+        if shape is not None:
+            print(f"Loaded {filename} from shape cache ({digest[:12]})")
+            return shape
+
     reader = STEPControl_Reader()
     status = reader.ReadFile(filename)
 
@@ -32,9 +45,52 @@ def load_step_shape(filename: str):
     # Get the combined shape
     shape = reader.OneShape()
     print(f"Loaded STEP file with {count_solids(shape)} solids")
+
+    if use_cache:
+        try:
+            cache.store_shape(digest, shape, parse_step_assembly(filename))
+        except (OSError, RuntimeError) as e:
+            print(f"Shape cache store failed: {e}")
     return shape
 
 
+def cache_step_file(filename: str, digest: str = None) -> str:
+    """
+    Worker: parse a STEP file into the BRep shape cache, so the process that
+    needs the shape only reads BRep (load_step_shape then hits the cache).
+    'digest', if known, saves hashing the file again. Returns the content
+    digest and this call's cache counters, for cache.record_stats in the server.
+    """
+    if digest:
+        cache.remember_digest(filename, digest)
+    before = dict(cache.CACHE_STATS)
+    load_step_shape(filename)
+    stats = {key: cache.CACHE_STATS[key] - before[key] for key in before}
+    return cache.file_digest(filename), stats
+
+
+def load_product_tree(filename: str):
+    """
+    Return the parsed product tree for a STEP file,
+    reusing the copy stored in the shape cache when there is one.
+    """
+    try:
+        digest = cache.file_digest(filename)
+    except OSError:
+        return None
+
+    found, tree = cache.get_cached_product_tree(digest)
+    if found:
+        return tree
+
+    tree = parse_step_assembly(filename)
+    try:
+        cache.store_product_tree(digest, tree)
+    except OSError:
+        pass
+    return tree
+
+
 def count_solids(shape):
     """
     Count how many SOLID bodies are in the shape.
@@ -70,31 +126,12 @@ def parse_step_assembly(filename: str):
     """
     Parse STEP file to extract assembly structure.
     Returns a dict with the tree structure.
+    Uses the single-pass streaming scanner, so the file is never held in memory.
     """
-    import re
-    
-    try:
-        with open(filename, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-    except (FileNotFoundError, IOError):
+    products = scan_product_structure(filename)
+    if products is None:
         return None
     
-    # Parse PRODUCT entities for names
-    products = {}
-    product_pattern = r'#(\d+)\s*=\s*PRODUCT\s*\(\s*\'([^\']*)\''
-    for match in re.finditer(product_pattern, content):
-        id_num = match.group(1)
-        name = match.group(2)
-        products[id_num] = {'name': name, 'children': []}
-    
-    # Parse NEXT_ASSEMBLY_USAGE_OCCURRENCE for assembly relationships
-    assembly_pattern = r'#(\d+)\s*=\s*NEXT_ASSEMBLY_USAGE_OCCURRENCE\(\s*\'[^\']*\'\s*,\s*[^,]*,\s*#(\d+)\s*,\s*#(\d+)'
-    for match in re.finditer(assembly_pattern, content):
-        parent_id = match.group(2)
-        child_id = match.group(3)
-        if parent_id in products and child_id in products:
-            products[parent_id]['children'].append(child_id)
-    
     if products:
         # Find root (product not used as child)
         all_children = set()
@@ -0,0 +1,49 @@
+# cad/lod.py
+# Level-of-detail pyramid: coarse / medium / fine tessellations of one model
+
+from OCC.Core.BRepBuilderAPI import BRepBuilderAPI_Copy
+
+from .mesh_state import MeshState, DEFAULT_DEFLECTION_RATIO
+
+# Coarse first, so the viewer has something to show as early as possible
+LOD_LEVELS = ("coarse", "medium", "fine")
+
+# Deflection as a fraction of each solid's bounding-box diagonal
+LOD_RATIOS = {
+    "coarse": 0.01,
+    "medium": 0.002,
+    "fine": DEFAULT_DEFLECTION_RATIO,
+}
+
+
+def build_lod(shape, level: str):
+    """
+    Tessellate one level of the pyramid and return its MeshState.
+    """
+    return MeshState(ratio=LOD_RATIOS[level]).rebuild(shape)
+
+
+def detached_copy(shape):
+    """
+    Copy of 'shape' with its own TShapes and no triangulation. Finer levels
+    are meshed on this in a background thread, so BRepMesh never writes the
+    triangulations of a shape that edits and topology reads still use.
+    Take the copy while holding the owner's lock.
+    """
+    return BRepBuilderAPI_Copy(shape, True, False).Shape()
+
+
+def build_lod_pyramid(shape, on_level=None, levels=LOD_LEVELS):
+    """
+    Tessellate every level from coarse to fine.
+    on_level(level, mesh_state) is called as soon as each level exists;
+    returning False from it stops the remaining (finer) levels.
+    BRepMesh only ever refines, so levels must go coarse -> fine.
+    """
+    states = {}
+    for level in levels:
+        state = build_lod(shape, level)
+        states[level] = state
+        if on_level is not None and on_level(level, state) is False:
+            break
+    return states
@@ -0,0 +1,197 @@
+# cad/mass.py
+# Per-solid mass properties (volume, area, centroid, inertia), computed in
+# parallel, cached, and carried exactly through rigid moves and uniform scales.
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from OCC.Core.GProp import GProp_GProps
+from OCC.Core.BRepGProp import brepgprop_VolumeProperties, brepgprop_SurfaceProperties
+
+from .cache import write_shape, read_shape
+from .mesh import list_solids
+from . import tessellate
+
+# Unit density: mass == volume, inertia is the geometric second moment
+MASS_DTYPE = np.dtype([
+    ("volume", np.float64),
+    ("area", np.float64),
+    ("centroid", np.float64, (3,)),
+    ("inertia", np.float64, (3, 3)),  # about the solid's own centroid
+    ("tolerance", np.float64),        # relative precision used, 0 = OCC default integration
+])
+
+
+def _solid_properties(solid, tolerance):
+    """
+    One MASS_DTYPE row for a solid. tolerance > 0 uses OCC's adaptive
+    integration to that relative precision; 0 uses the default Gauss rule.
+    """
+    row = np.zeros((), dtype=MASS_DTYPE)
+    vprops = GProp_GProps()
+    sprops = GProp_GProps()
+    if tolerance > 0:
+        brepgprop_VolumeProperties(solid, vprops, tolerance)
+        brepgprop_SurfaceProperties(solid, sprops, tolerance)
+    else:
+        brepgprop_VolumeProperties(solid, vprops)
+        brepgprop_SurfaceProperties(solid, sprops)
+
+    c = vprops.CentreOfMass()
+    mat = vprops.MatrixOfInertia()
+    row["volume"] = vprops.Mass()
+    row["area"] = sprops.Mass()  # For surface props, Mass is Area
+    row["centroid"] = (c.X(), c.Y(), c.Z())
+    row["inertia"] = [[mat.Value(r, k) for k in range(1, 4)] for r in range(1, 4)]
+    row["tolerance"] = tolerance
+    return row
+
+
+def _solid_properties_file(path, tolerance):
+    """Worker: read one solid from BRep and return its properties row."""
+    return _solid_properties(read_shape(path), tolerance)
+
+
+def compute_mass_properties(shape, tolerance=0.0, workers=None, solids=None):
+    """
+    MASS_DTYPE array with one row per solid (see cad.mesh.list_solids).
+    Large assemblies are spread over the tessellation process pool.
+    """
+    if solids is None:
+        solids = list_solids(shape)
+
+    if (workers or tessellate.TESSELLATION_WORKERS) <= 1 or len(solids) < tessellate.MIN_SOLIDS_FOR_POOL:
+        rows = [_solid_properties(s, tolerance) for s in solids]
+    else:
+        spool = tempfile.mkdtemp(prefix="mass_")
+        try:
+            paths = []
+            for i, solid in enumerate(solids):
+                path = os.path.join(spool, f"solid_{i}.brep")
+                write_shape(solid, path)
+                paths.append(path)
+            from workers import CAD_POOL
+            tessellate.get_pool(workers)
+            futures = CAD_POOL.submit_batch(_solid_properties_file, [(p, tolerance) for p in paths])
+            rows = [f.result() for f in futures]
+        finally:
+            shutil.rmtree(spool, ignore_errors=True)
+
+    props = np.zeros(len(rows), dtype=MASS_DTYPE)
+    for i, row in enumerate(rows):
+        props[i] = row
+    return props
+
+
+def combine(props):
+    """
+    Totals over solids: summed volume/area, volume-weighted centroid and
+    inertia about that centroid (parallel axis theorem).
+    """
+    volume = float(props["volume"].sum())
+    area = float(props["area"].sum())
+    if volume == 0:
+        return {"volume": volume, "area": area, "centroid": [0.0, 0.0, 0.0],
+                "inertia": np.zeros((3, 3)).tolist()}
+
+    centroid = (props["volume"][:, None] * props["centroid"]).sum(axis=0) / volume
+    d = props["centroid"] - centroid
+    shift = (np.einsum("ij,ij->i", d, d)[:, None, None] * np.eye(3)
+             - d[:, :, None] * d[:, None, :])
+    inertia = (props["inertia"] + props["volume"][:, None, None] * shift).sum(axis=0)
+    return {"volume": volume, "area": area, "centroid": centroid.tolist(), "inertia": inertia.tolist()}
+
+
+class MassState:
+    """
+    Cached per-solid mass properties of the current model.
+    """
+
+    def __init__(self):
+        self.props = None
+        self.version = None
+
+    def valid_for(self, version, tolerance=0.0):
+        """
+        True if the cache describes 'version' at least as precisely as asked
+        (a cached default-rule result satisfies any tolerance).
+        """
+        if self.props is None or self.version != version:
+            return False
+        cached = self.props["tolerance"]
+        return bool(np.all((cached == 0) | ((tolerance > 0) & (cached <= tolerance))))
+
+    def get(self, shape, version, tolerance=0.0):
+        """Per-solid properties for 'shape' at 'version', computed only on a cache miss."""
+        if not self.valid_for(version, tolerance):
+            self.props = compute_mass_properties(shape, tolerance)
+            self.version = version
+        return self.props
+
+    def apply_transform(self, matrix, version):
+        """
+        Move the cached properties through a 3x4 affine matrix with a uniform
+        linear part: volume x s^3, area x s^2, centroid transformed,
+        inertia s^5 R I R^T.
+        """
+        if self.props is None:
+            return
+        m = np.asarray(matrix, dtype=np.float64)[:3]
+        linear, offset = m[:, :3], m[:, 3]
+        scale = abs(np.linalg.det(linear)) ** (1.0 / 3.0)
+        rotation = linear / scale
+
+        props = self.props.copy()
+        props["volume"] *= scale ** 3
+        props["area"] *= scale ** 2
+        props["centroid"] = props["centroid"] @ linear.T + offset
+        props["inertia"] = scale ** 5 * np.einsum("ij,njk,lk->nil", rotation, props["inertia"], rotation)
+        self.props = props
+        self.version = version
+
+    def refresh_solids(self, shape, indices, version, solids=None):
+        """
+        Recompute only the solids at 'indices' after a scoped edit; the
+        other rows stay valid.
+        """
+        if solids is None:
+            solids = list_solids(shape)
+        if self.props is None or len(solids) != len(self.props):
+            self.invalidate()
+            return
+        props = self.props.copy()
+        for i in indices:
+            props[i] = _solid_properties(solids[i], float(props["tolerance"][i]))
+        self.props = props
+        self.version = version
+
+    def remove_solid(self, index, version):
+        if self.props is None or not 0 <= index < len(self.props):
+            self.invalidate()
+            return
+        self.props = np.delete(self.props, index)
+        self.version = version
+
+    def invalidate(self):
+        self.props = None
+        self.version = None
+
+
+def part_breakdown(props):
+    """
+    JSON-ready per-solid rows plus totals.
+    """
+    parts = []
+    for i, row in enumerate(props):
+        parts.append({
+            "id": f"solid-{i + 1}",
+            "name": f"Solid {i + 1}",
+            "volume": float(row["volume"]),
+            "area": float(row["area"]),
+            "centroid": row["centroid"].tolist(),
+            "inertia": row["inertia"].tolist(),
+        })
+    return {"total": combine(props), "parts": parts}
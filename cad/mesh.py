@@ -0,0 +1,180 @@
+# cad/mesh.py
+# Pull triangulations out of meshed OCC shapes into NumPy arrays
+
+import numpy as np
+
+from OCC.Core.BRep import BRep_Tool
+from OCC.Core.BRepMesh import BRepMesh_IncrementalMesh
+from OCC.Core.TopExp import TopExp_Explorer
+from OCC.Core.TopAbs import TopAbs_SOLID, TopAbs_SHELL, TopAbs_FACE, TopAbs_REVERSED
+from OCC.Core.TopLoc import TopLoc_Location
+from OCC.Core.TopoDS import topods
+
+from .loader import get_bounding_box
+
+
+# Angular deflection (radians) passed alongside the linear deflection
+ANGULAR_DEFLECTION = 0.5
+# Floor for size-relative deflection, so degenerate bodies still mesh
+MIN_DEFLECTION = 1e-4
+# Default linear deflection as a fraction of each solid's bounding-box diagonal
+DEFAULT_DEFLECTION_RATIO = 0.0005
+
+
+def relative_deflection(shape, ratio: float):
+    """
+    Linear deflection as a fraction of the shape's bounding-box diagonal.
+    """
+    dx, dy, dz = get_bounding_box(shape)[6:]
+    diagonal = (dx * dx + dy * dy + dz * dz) ** 0.5
+    return max(diagonal * ratio, MIN_DEFLECTION)
+
+
+def mesh_shape(shape, deflection=0.01, parallel=True):
+    """
+    Triangulate a shape in place (BRepMesh stores the result on each face).
+    parallel=True lets BRepMesh mesh faces on all cores.
+    """
+    BRepMesh_IncrementalMesh(shape, deflection, False, ANGULAR_DEFLECTION, parallel)
+    return shape
+
+
+def list_solids(shape):
+    """
+    Return the solids of a shape in explorer order.
+    A shape without solids (e.g. a loose shell) is treated as a single body.
+    """
+    solids = []
+    explorer = TopExp_Explorer(shape, TopAbs_SOLID)
+    while explorer.More():
+        solids.append(topods.Solid(explorer.Current()))
+        explorer.Next()
+    if not solids and not shape.IsNull():
+        solids = [shape]
+    return solids
+
+
+def face_triangulation(face):
+    """
+    Return (vertices float64 (N,3), triangles uint32 (M,3)) for one meshed face,
+    with the face location applied and winding flipped for reversed faces.
+    """
+    loc = TopLoc_Location()
+    tri = BRep_Tool.Triangulation(face, loc)
+    if tri is None:
+        return np.zeros((0, 3), dtype=np.float64), np.zeros((0, 3), dtype=np.uint32)
+
+    n_nodes = tri.NbNodes()
+    vertices = np.empty((n_nodes, 3), dtype=np.float64)
+    for i in range(n_nodes):
+        p = tri.Node(i + 1)
+        vertices[i] = (p.X(), p.Y(), p.Z())
+
+    if not loc.IsIdentity():
+        # Apply the location as a 3x4 matrix in one go
+        trsf = loc.Transformation()
+        m = np.array([[trsf.Value(r, c) for c in range(1, 5)] for r in range(1, 4)])
+        vertices = vertices @ m[:, :3].T + m[:, 3]
+
+    n_tris = tri.NbTriangles()
+    triangles = np.empty((n_tris, 3), dtype=np.uint32)
+    for i in range(n_tris):
+        triangles[i] = tri.Triangle(i + 1).Get()
+    triangles -= 1
+
+    if face.Orientation() == TopAbs_REVERSED:
+        triangles = triangles[:, [0, 2, 1]]
+
+    return vertices, triangles
+
+
+def vertex_normals(vertices, triangles):
+    """
+    Area-weighted per-vertex normals (float32, unit length).
+    """
+    normals = np.zeros(vertices.shape, dtype=np.float64)
+    if len(triangles):
+        v0 = vertices[triangles[:, 0]]
+        face_n = np.cross(vertices[triangles[:, 1]] - v0, vertices[triangles[:, 2]] - v0)
+        for k in range(3):
+            np.add.at(normals, triangles[:, k], face_n)
+    length = np.linalg.norm(normals, axis=1, keepdims=True)
+    length[length == 0] = 1.0
+    return (normals / length).astype(np.float32)
+
+
+def _iter_shell_faces(solid):
+    """Yield (shell_index, face) in the same order cad.tree walks them."""
+    shell_explorer = TopExp_Explorer(solid, TopAbs_SHELL)
+    shell_index = 0
+    found_shell = False
+    while shell_explorer.More():
+        found_shell = True
+        face_explorer = TopExp_Explorer(shell_explorer.Current(), TopAbs_FACE)
+        while face_explorer.More():
+            yield shell_index, topods.Face(face_explorer.Current())
+            face_explorer.Next()
+        shell_explorer.Next()
+        shell_index += 1
+
+    if not found_shell:
+        face_explorer = TopExp_Explorer(solid, TopAbs_FACE)
+        while face_explorer.More():
+            yield 0, topods.Face(face_explorer.Current())
+            face_explorer.Next()
+
+
+def extract_solid_mesh(solid, name=None):
+    """
+    Collect the triangulation of every face of a solid into one indexed mesh.
+
+    Returns a dict:
+      vertices     float32 (N,3)
+      normals      float32 (N,3)
+      indices      uint32  (M,3)  - vertices are shared within each face
+      face_ranges  int64   (F,2)  - (first triangle, triangle count) per face
+      face_shells  int64   (F,)   - shell index of each face
+    """
+    all_vertices = []
+    all_triangles = []
+    face_ranges = []
+    face_shells = []
+    n_vertices = 0
+    n_triangles = 0
+
+    for shell_index, face in _iter_shell_faces(solid):
+        vertices, triangles = face_triangulation(face)
+        face_ranges.append((n_triangles, len(triangles)))
+        face_shells.append(shell_index)
+        if len(triangles):
+            all_vertices.append(vertices)
+            all_triangles.append(triangles + n_vertices)
+            n_vertices += len(vertices)
+            n_triangles += len(triangles)
+
+    if all_vertices:
+        vertices = np.concatenate(all_vertices)
+        indices = np.concatenate(all_triangles).astype(np.uint32)
+    else:
+        vertices = np.zeros((0, 3), dtype=np.float64)
+        indices = np.zeros((0, 3), dtype=np.uint32)
+
+    return {
+        "name": name,
+        "vertices": vertices.astype(np.float32),
+        "normals": vertex_normals(vertices, indices),
+        "indices": indices,
+        "face_ranges": np.array(face_ranges, dtype=np.int64).reshape(-1, 2),
+        "face_shells": np.array(face_shells, dtype=np.int64),
+    }
+
+
+def extract_meshes(shape):
+    """
+    Return one indexed mesh dict per solid (see extract_solid_mesh).
+    The shape must already be triangulated.
+    """
+    return [
+        extract_solid_mesh(solid, name=f"Solid {i + 1}")
+        for i, solid in enumerate(list_solids(shape))
+    ]
@@ -0,0 +1,120 @@
+# cad/mesh_state.py
+# Keeps the per-solid tessellation of the current model so rigid edits
+# move the cached vertices instead of re-meshing the whole shape.
+
+import numpy as np
+
+from .mesh import mesh_shape, list_solids, extract_solid_mesh, relative_deflection, DEFAULT_DEFLECTION_RATIO
+from .tessellate import tessellate_solids
+from .export import write_binary_stl, write_glb
+
+
+def trsf_to_matrix(trsf):
+    """
+    Convert a gp_Trsf into a 3x4 NumPy matrix [R*s | t].
+    """
+    return np.array([[trsf.Value(r, c) for c in range(1, 5)] for r in range(1, 4)], dtype=np.float64)
+
+
+class MeshState:
+    """
+    Cached tessellation of the current model, one indexed mesh per solid.
+
+    Deflection is relative to each solid's size, so a 2 m frame and a 5 mm
+    clip get the same visual quality.
+
+    - apply_transform(): rigid moves and uniform scales are applied to the
+      cached vertex arrays. A uniform scale scales both the mesh and the
+      solid's size-relative target deflection, so nothing needs re-meshing.
+      Non-uniform matrices give a preview of the exact (GTransform) result.
+    - remove_solid(): drops a solid's mesh, nothing else is touched.
+    - refresh_solids(): re-meshes only the listed solids.
+    """
+
+    def __init__(self, ratio=DEFAULT_DEFLECTION_RATIO):
+        self.ratio = ratio
+        self.meshes = []
+        self.stats = {"rebuilds": 0, "transforms": 0, "solids_remeshed": 0}
+
+    @property
+    def deflections(self):
+        return [mesh["deflection"] for mesh in self.meshes]
+
+    def rebuild(self, shape):
+        """
+        Tessellate the whole shape from scratch.
+        """
+        self.meshes = tessellate_solids(shape, ratio=self.ratio)
+        self.stats["rebuilds"] += 1
+        return self
+
+    def _remesh(self, solid, index):
+        deflection = relative_deflection(solid, self.ratio)
+        mesh_shape(solid, deflection)
+        mesh = extract_solid_mesh(solid, name=f"Solid {index + 1}")
+        mesh["deflection"] = deflection
+        self.meshes[index] = mesh
+        self.stats["solids_remeshed"] += 1
+
+    def refresh_solids(self, shape, indices, solids=None):
+        """
+        Re-mesh only the solids at 'indices' (explorer order of 'shape').
+        'solids' may pass in an existing solid list.
+        """
+        if solids is None:
+            solids = list_solids(shape)
+        if len(solids) != len(self.meshes):
+            # Solid layout changed underneath us - fall back to a full rebuild
+            return self.rebuild(shape)
+        for i in indices:
+            if 0 <= i < len(solids):
+                self._remesh(solids[i], i)
+        return self
+
+    def apply_transform(self, matrix):
+        """
+        Apply a 3x4 (or 4x4) affine matrix to every cached mesh. Uniform
+        linear parts (rotation, translation, uniform scale) are exact; for
+        non-uniform ones normals go through the inverse transpose and the
+        deflection grows with the largest stretch.
+        """
+        m = np.asarray(matrix, dtype=np.float64)[:3]
+        linear, offset = m[:, :3], m[:, 3]
+        det = np.linalg.det(linear)
+        scale = abs(det) ** (1.0 / 3.0)
+        if scale < 1e-12:
+            raise ValueError("Degenerate transform")
+        stretch = np.linalg.svd(linear, compute_uv=False)
+        uniform = stretch[0] - stretch[-1] <= 1e-9 * stretch[0]
+        normal_matrix = linear / scale if uniform else np.linalg.inv(linear).T
+
+        for mesh in self.meshes:
+            mesh["vertices"] = (mesh["vertices"] @ linear.T + offset).astype(np.float32)
+            normals = mesh["normals"] @ normal_matrix.T
+            if not uniform:
+                lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+                normals /= np.where(lengths > 0, lengths, 1.0)
+            mesh["normals"] = normals.astype(np.float32)
+            mesh["deflection"] *= scale if uniform else stretch[0]
+            if det < 0:
+                # Mirroring flips triangle winding
+                mesh["indices"] = mesh["indices"][:, [0, 2, 1]]
+
+        self.stats["transforms"] += 1
+        return self
+
+    def remove_solid(self, index):
+        """
+        Drop the mesh of a deleted solid.
+        """
+        if 0 <= index < len(self.meshes):
+            del self.meshes[index]
+            for i, mesh in enumerate(self.meshes):
+                mesh["name"] = f"Solid {i + 1}"
+        return self
+
+    def write_stl(self, filename: str):
+        return write_binary_stl(self.meshes, filename)
+
+    def write_glb(self, filename: str, quantize=False):
+        return write_glb(self.meshes, filename, quantize=quantize)
@@ -1,6 +1,8 @@
 # cad/modify.py
 # Basic CAD modification functions: scale, translate, rotate, save, delete
 
+import numpy as np
+
 from OCC.Core.GProp import GProp_GProps
 from OCC.Core.BRepGProp import brepgprop_VolumeProperties, brepgprop_SurfaceProperties
 from OCC.Core.gp import gp_Trsf, gp_Vec, gp_Ax1, gp_Pnt, gp_Dir, gp_Mat
@@ -32,6 +34,11 @@ def scale_shape_non_uniform(shape, fx: float, fy: float, fz: float):
     if abs(fx) < 1e-9 or abs(fy) < 1e-9 or abs(fz) < 1e-9:
         raise ValueError("Scale factors must be non-zero.")
 
+    m = scale_matrix(fx, fy, fz)
+    if is_uniform_matrix(m):
+        # Really a uniform scale (or a mirror): gp_Trsf keeps the analytic surfaces
+        return BRepBuilderAPI_Transform(shape, affine_trsf(m), True).Shape()
+
     gtrsf = gp_GTrsf(mat, gp_Vec(0,0,0))
     
     # GTransform is required for non-uniform (affinity)
@@ -39,9 +46,9 @@ def scale_shape_non_uniform(shape, fx: float, fy: float, fz: float):
     return transformer.Shape()
 
 
-def rotate_shape(shape, axis_char: str, angle_degrees: float):
+def rotation_trsf(axis_char: str, angle_degrees: float):
     """
-    Rotate shape around global X, Y, or Z axis.
+    Rotation around global X, Y, or Z axis as a gp_Trsf.
     """
     import math
     rad = math.radians(angle_degrees)
@@ -54,8 +61,63 @@ def rotate_shape(shape, axis_char: str, angle_degrees: float):
     
     trsf = gp_Trsf()
     trsf.SetRotation(ax1, rad)
-    
-    transformer = BRepBuilderAPI_Transform(shape, trsf, True)
+    return trsf
+
+
+def scale_matrix(fx: float, fy: float, fz: float):
+    """
+    3x4 affine matrix of a per-axis scale about the origin.
+    """
+    m = np.zeros((3, 4))
+    m[:, :3] = np.diag([fx, fy, fz])
+    return m
+
+
+def is_uniform_matrix(matrix, tol: float = 1e-9):
+    """
+    True if the 3x4 (or 4x4) affine matrix is a rotation/reflection times a
+    uniform scale, i.e. representable as a gp_Trsf.
+    """
+    linear = np.asarray(matrix, dtype=np.float64)[:3, :3]
+    gram = linear @ linear.T
+    s2 = np.trace(gram) / 3.0
+    return s2 > tol and np.allclose(gram, s2 * np.eye(3), atol=tol * max(s2, 1.0))
+
+
+def affine_trsf(matrix):
+    """
+    gp_Trsf from a uniform 3x4 (or 4x4) affine matrix.
+    """
+    m = np.asarray(matrix, dtype=np.float64)[:3]
+    trsf = gp_Trsf()
+    trsf.SetValues(*[float(v) for v in m.reshape(-1)])
+    return trsf
+
+
+def transform_shape_affine(shape, matrix):
+    """
+    Apply a 3x4 (or 4x4) affine matrix in one pass: BRepBuilderAPI_Transform
+    when it is uniform, BRepBuilderAPI_GTransform otherwise.
+    """
+    from OCC.Core.gp import gp_GTrsf, gp_XYZ
+    from OCC.Core.BRepBuilderAPI import BRepBuilderAPI_GTransform
+
+    m = np.asarray(matrix, dtype=np.float64)[:3]
+    if is_uniform_matrix(m):
+        return BRepBuilderAPI_Transform(shape, affine_trsf(m), True).Shape()
+
+    if abs(np.linalg.det(m[:, :3])) < 1e-12:
+        raise ValueError("Degenerate transform")
+    mat = gp_Mat(*[float(v) for v in m[:, :3].reshape(-1)])
+    gtrsf = gp_GTrsf(mat, gp_XYZ(*[float(v) for v in m[:, 3]]))
+    return BRepBuilderAPI_GTransform(shape, gtrsf, True).Shape()
+
+
+def rotate_shape(shape, axis_char: str, angle_degrees: float):
+    """
+    Rotate shape around global X, Y, or Z axis.
+    """
+    transformer = BRepBuilderAPI_Transform(shape, rotation_trsf(axis_char, angle_degrees), True)
     return transformer.Shape()
 
 def get_mass_properties(shape):
@@ -71,27 +133,40 @@ def get_mass_properties(shape):
     
     return {"volume": vol, "area": area}
 
-def scale_shape(shape, scale_factor: float):
+def scale_trsf(scale_factor: float):
     """
-    Uniformly scale the entire shape around the origin.
+    Uniform scale around the origin as a gp_Trsf.
     """
     if abs(scale_factor) < 1e-9:
         raise ValueError("Scale factor must be non-zero.")
         
     trsf = gp_Trsf()
     trsf.SetScale(gp_Pnt(0,0,0), scale_factor)
-    transformer = BRepBuilderAPI_Transform(shape, trsf, True)
+    return trsf
+
+
+def scale_shape(shape, scale_factor: float):
+    """
+    Uniformly scale the entire shape around the origin.
+    """
+    transformer = BRepBuilderAPI_Transform(shape, scale_trsf(scale_factor), True)
     return transformer.Shape()
 
 
+def translation_trsf(dx: float, dy: float, dz: float):
+    """
+    Translation by dx, dy, dz as a gp_Trsf.
+    """
+    trsf = gp_Trsf()
+    trsf.SetTranslation(gp_Vec(dx, dy, dz))
+    return trsf
+
+
 def translate_shape(shape, dx: float, dy: float, dz: float):
     """
     Translate (move) the shape by dx, dy, dz.
     """
-    vec = gp_Vec(dx, dy, dz)
-    trsf = gp_Trsf()
-    trsf.SetTranslation(vec)
-    transformer = BRepBuilderAPI_Transform(shape, trsf, True)
+    transformer = BRepBuilderAPI_Transform(shape, translation_trsf(dx, dy, dz), True)
     return transformer.Shape()
 
 
@@ -133,6 +208,17 @@ def resize_cylindrical_feature(shape, face, new_radius):
 
     return modified_shape
 
+def normalize_solid_index(index: int, count: int):
+    """
+    Map a spoken solid index onto the solid that will actually be deleted.
+    """
+    if index < 0 or index >= count:
+        # If user says "delete part" but we have 5 parts, maybe delete the LAST one?
+        # Or if index is -1, maybe delete the largest?
+        # For safety/simplicity, if index is invalid (-1), let's delete the FIRST one (index 0).
+        return 0
+    return index
+
 def delete_solid(shape, index: int):
     """
     Remove a specific solid from the compound shape.
@@ -154,13 +240,7 @@ def delete_solid(shape, index: int):
         else:
              return shape # Nothing to delete
 
-    if index < 0 or index >= len(solids):
-        # If user says "delete part" but we have 5 parts, maybe delete the LAST one?
-        # Or if index is -1, maybe delete the largest?
-        # For safety/simplicity, if index is invalid (-1), let's delete the FIRST one (index 0).
-        to_delete = 0
-    else:
-        to_delete = index
+    to_delete = normalize_solid_index(index, len(solids))
 
     # Rebuild compound without the deleted solid
     builder = BRep_Builder()
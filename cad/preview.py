@@ -4,9 +4,11 @@
 import os
 import tempfile
 
-from OCC.Core.BRepMesh import BRepMesh_IncrementalMesh
 from OCC.Core.StlAPI import StlAPI_Writer
 
+from .mesh import mesh_shape, relative_deflection
+from .lod import LOD_RATIOS
+
 import pyvista as pv
 
 
@@ -25,9 +27,8 @@ def create_preview_image(shape, image_path: str | None = None) -> str:
 
     stl_path = image_path.replace(".png", ".stl")
 
-    # Mesh the shape for STL export
-    # 0.5 is a decent deflection for medium-sized models; adjust if needed.
-    BRepMesh_IncrementalMesh(shape, 0.5)
+    # Mesh the shape for STL export; a thumbnail needs no more than the medium LOD
+    mesh_shape(shape, relative_deflection(shape, LOD_RATIOS["medium"]))
 
     writer = StlAPI_Writer()
     writer.Write(shape, stl_path)
@@ -0,0 +1,276 @@
+# cad/recognition.py
+# Hole/boss recognition: group coaxial cylindrical faces into features with stable IDs.
+# Only reading a model needs OCC (through cad.topology); feature tables and
+# ID matching work on the NumPy arrays alone.
+
+import numpy as np
+
+KIND_HOLE, KIND_BOSS = 0, 1
+KIND_NAMES = ("hole", "boss")
+
+# Clustering tolerances: axis directions are compared after rounding to
+# ANGULAR_TOL, positions and radii to LINEAR_TOL (model units)
+ANGULAR_TOL = 1e-6
+LINEAR_TOL = 1e-4
+
+FEATURE_DTYPE = np.dtype([
+    ("kind", np.uint8),            # KIND_HOLE / KIND_BOSS
+    ("through", np.bool_),         # no cap face at either end
+    ("solid", np.int32),           # owning solid, -1 for free faces
+    ("radius", np.float64),
+    ("axis", np.float64, (3,)),    # unit axis, sign fixed so the first non-zero component is positive
+    ("origin", np.float64, (3,)),  # point of the axis closest to the world origin
+    ("t_range", np.float64, (2,)), # extent along the axis, measured from 'origin'
+    ("face_start", np.int32),      # range into FeatureTable.face_rows
+    ("face_count", np.int32),
+])
+
+
+def _canonical_axes(axes):
+    """
+    Flip axes so the first non-negligible component is positive.
+    Returns (axes, sign) with sign = +1/-1 per row.
+    """
+    axes = axes / np.maximum(np.linalg.norm(axes, axis=1, keepdims=True), 1e-300)
+    significant = np.abs(axes) > ANGULAR_TOL
+    first = np.argmax(significant, axis=1)
+    sign = np.where(axes[np.arange(len(axes)), first] < 0, -1.0, 1.0)
+    return axes * sign[:, None], sign
+
+
+def _axis_foot(origins, axes):
+    """Point of each axis line closest to the world origin."""
+    return origins - np.sum(origins * axes, axis=1, keepdims=True) * axes
+
+
+class FeatureTable:
+    """
+    Recognized hole/boss features of one model.
+
+    Every feature has an ID such as "hole-3" that is kept across edits:
+    a re-recognized feature inherits the ID of the previous feature it
+    matches (same kind, solid and axis), new features get the next free
+    number of their kind.
+    """
+
+    def __init__(self, features, face_rows, ids, index=None):
+        self.features = features    # FEATURE_DTYPE array
+        self.face_rows = face_rows  # int64 topology face rows, grouped per feature
+        self.ids = ids              # feature id per row
+        self.index = index          # TopologyIndex the face rows refer to
+        self.by_id = {feature_id: row for row, feature_id in enumerate(ids)}
+
+    def __len__(self):
+        return len(self.features)
+
+    def get(self, feature_id: str):
+        """Row for a feature id, or None."""
+        return self.by_id.get(feature_id)
+
+    def lookup(self, kind: str, number: int):
+        """Row of e.g. hole 3 (numbers start at 1), or None."""
+        return self.by_id.get(f"{kind}-{number}")
+
+    def faces(self, row: int):
+        start = int(self.features["face_start"][row])
+        return self.face_rows[start:start + int(self.features["face_count"][row])]
+
+    def rows_of_kind(self, kind: int):
+        return np.flatnonzero(self.features["kind"] == kind)
+
+    def describe(self, row: int):
+        f = self.features[row]
+        depth = "through" if f["through"] else "blind"
+        length = f["t_range"][1] - f["t_range"][0]
+        axis = tuple(round(float(v), 3) + 0.0 for v in f["axis"])
+        label = self.ids[row].replace("-", " ").capitalize()
+        return (f"{label} ({depth}): radius = {f['radius']:.2f}, length = {length:.2f}, "
+                f"axis direction = {axis}, solid {int(f['solid']) + 1}")
+
+    def transformed(self, matrix):
+        """
+        Copy with the geometry moved by a 3x4 affine matrix with a uniform
+        linear part (see cad.mesh_state.MeshState.apply_transform). IDs and
+        face rows are kept, so the next recognition can match against it.
+        """
+        m = np.asarray(matrix, dtype=np.float64)[:3]
+        linear, offset = m[:, :3], m[:, 3]
+        scale = abs(np.linalg.det(linear)) ** (1.0 / 3.0)
+
+        f = self.features.copy()
+        # Two points per axis, mapped through the transform
+        p0 = f["origin"] + f["t_range"][:, :1] * f["axis"]
+        p1 = f["origin"] + f["t_range"][:, 1:] * f["axis"]
+        p0 = p0 @ linear.T + offset
+        p1 = p1 @ linear.T + offset
+        axes, sign = _canonical_axes((f["axis"] @ linear.T))
+        origins = _axis_foot(p0, axes)
+        t = np.stack([np.sum((p0 - origins) * axes, axis=1), np.sum((p1 - origins) * axes, axis=1)], axis=1)
+
+        f["axis"] = axes
+        f["origin"] = origins
+        f["t_range"] = np.sort(t, axis=1)
+        f["radius"] *= scale
+        return FeatureTable(f, self.face_rows, list(self.ids), index=None)
+
+
+def cap_rows(index, solid, axis, origin, radius, t):
+    """
+    Rows of small planar/conical faces of the solid centred on the axis at
+    axial position t (the bottom of a blind hole or the top of a boss).
+    """
+    from .topology import SURFACE_PLANE, SURFACE_CONE
+
+    faces = index.faces
+    candidates = (faces["solid"] == solid) & (
+        (faces["surface"] == SURFACE_PLANE) | (faces["surface"] == SURFACE_CONE))
+    candidates &= faces["area"] <= 2.0 * np.pi * radius * radius
+    rows = np.flatnonzero(candidates)
+    if not len(rows):
+        return rows
+    rel = faces["centroid"][rows] - origin
+    along = rel @ axis
+    radial = np.linalg.norm(rel - along[:, None] * axis, axis=1)
+    # Drill-point cones sit past the end of the cylinder by up to ~radius
+    close = (radial <= max(LINEAR_TOL, radius * 1e-3)) & (np.abs(along - t) <= radius + LINEAR_TOL)
+    return rows[close]
+
+
+def feature_caps(table, row):
+    """(cap rows at the start, cap rows at the end) of a feature's axial range."""
+    f = table.features[row]
+    return tuple(cap_rows(table.index, f["solid"], f["axis"], f["origin"], f["radius"], t)
+                 for t in f["t_range"])
+
+
+def _match_previous(features, previous):
+    """
+    Previous feature row for every new feature (-1 where none matches).
+
+    Candidates share kind, solid and axis line. A unique candidate matches
+    whatever its radius, so resized features keep their IDs; where several
+    coaxial features compete (a counterbore, a stepped boss) the pairs with
+    the nearest radius and axial range are matched first. A feature that
+    only shares a face position with an old one is new (face rows are
+    renumbered by most edits, so they say nothing about identity).
+    """
+    matched = np.full(len(features), -1, dtype=np.int64)
+    if previous is None or not len(previous) or not len(features):
+        return matched
+
+    old = previous.features
+    same = (features["kind"][:, None] == old["kind"][None, :]) & (features["solid"][:, None] == old["solid"][None, :])
+    coaxial = np.abs(features["axis"] @ old["axis"].T) >= 1.0 - ANGULAR_TOL
+    dist = np.linalg.norm(features["origin"][:, None, :] - old["origin"][None, :, :], axis=2)
+    tol = np.maximum(LINEAR_TOL, 1e-6 * np.abs(old["origin"]).max(initial=1.0))
+    candidates = same & coaxial & (dist <= tol)
+
+    rows, prevs = np.nonzero(candidates)
+    cost = (np.abs(features["radius"][rows] - old["radius"][prevs])
+            + np.abs(features["t_range"][rows] - old["t_range"][prevs]).sum(axis=1))
+    taken = set()
+    # Cheapest pairs first, ties in row order
+    for k in np.lexsort((prevs, rows, cost)):
+        row, prev = int(rows[k]), int(prevs[k])
+        if matched[row] < 0 and prev not in taken:
+            matched[row] = prev
+            taken.add(prev)
+    return matched
+
+
+def recognize_features(index, previous=None):
+    """
+    Group the cylindrical faces of a TopologyIndex into hole/boss features.
+
+    Faces are clustered on (solid, axis, axis position, radius), so a hole
+    split into two half-cylinders is one feature. Cylinder faces whose
+    normal points towards the axis (material outside the cylinder) are
+    holes, others bosses. A feature is 'through' when neither end is closed
+    by a cap face.
+    """
+    from .topology import SURFACE_CYLINDER
+
+    faces = index.faces
+    rows = index.rows_of_surface(SURFACE_CYLINDER)
+    if not len(rows):
+        return FeatureTable(np.zeros(0, dtype=FEATURE_DTYPE), np.zeros(0, dtype=np.int64), [], index=index)
+
+    cyl = faces[rows]
+    axes, sign = _canonical_axes(cyl["axis"])
+    origins = _axis_foot(cyl["origin"], axes)
+    # Axial extent of each face: v runs along the face's own axis from its origin
+    base = np.sum(cyl["origin"] * axes, axis=1)
+    t = base[:, None] + sign[:, None] * cyl["v_range"]
+    t.sort(axis=1)
+
+    key = np.column_stack([
+        cyl["solid"],
+        cyl["inward"],
+        np.round(axes / ANGULAR_TOL),
+        np.round(origins / LINEAR_TOL),
+        np.round(cyl["radius"] / LINEAR_TOL),
+    ])
+    _, first, group = np.unique(key, axis=0, return_index=True, return_inverse=True)
+    group = group.reshape(-1)
+    # Number groups in face order (solid by solid, explorer order), not key order
+    order = np.argsort(first, kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    group = rank[group]
+    n = len(order)
+
+    by_group = np.argsort(group, kind="stable")
+    counts = np.bincount(group, minlength=n)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    features = np.zeros(n, dtype=FEATURE_DTYPE)
+    lead = by_group[starts]  # first face of each group
+    features["kind"] = np.where(cyl["inward"][lead], KIND_HOLE, KIND_BOSS)
+    features["solid"] = cyl["solid"][lead]
+    features["radius"] = cyl["radius"][lead]
+    features["axis"] = axes[lead]
+    features["origin"] = origins[lead]
+    features["t_range"][:, 0] = np.minimum.reduceat(t[by_group, 0], starts)
+    features["t_range"][:, 1] = np.maximum.reduceat(t[by_group, 1], starts)
+    features["face_start"] = starts
+    features["face_count"] = counts
+    face_rows = rows[by_group].astype(np.int64)
+
+    for i, f in enumerate(features):
+        capped = [len(cap_rows(index, f["solid"], f["axis"], f["origin"], f["radius"], t_end))
+                  for t_end in f["t_range"]]
+        features["through"][i] = not any(capped)
+
+    # Stable IDs: inherit from the matching previous feature, else next free number
+    matched = _match_previous(features, previous)
+    next_number = {name: 1 for name in KIND_NAMES}
+    if previous is not None:
+        for feature_id in previous.ids:
+            name, _, number = feature_id.partition("-")
+            next_number[name] = max(next_number[name], int(number) + 1)
+    ids = []
+    for i in range(n):
+        if matched[i] >= 0:
+            ids.append(previous.ids[matched[i]])
+        else:
+            name = KIND_NAMES[int(features["kind"][i])]
+            ids.append(f"{name}-{next_number[name]}")
+            next_number[name] += 1
+
+    return FeatureTable(features, face_rows, ids, index=index)
+
+
+def get_feature_table(shape, previous=None, topology=None):
+    """
+    Feature table of 'shape'. 'previous' is the table the caller keeps for
+    the model (cad.session.Session.features): returned as is while it was
+    recognized on the same topology index, otherwise its IDs carry over
+    (it may have been moved along with transforms via FeatureTable.transformed).
+    'topology' may pass in the shape's TopologyIndex.
+    """
+    from .topology import get_topology_index
+
+    index = get_topology_index(shape, topology)
+    if previous is not None and previous.index is index:
+        return previous
+    return recognize_features(index, previous=previous)
@@ -0,0 +1,138 @@
+# cad/scoped_edit.py
+# Edits scoped to one solid of the compound: the solid is looked up in the
+# topology index, modified on its own and spliced back, so every other
+# solid (and everything cached for it) stays untouched.
+
+import numpy as np
+
+from OCC.Core.gp import gp_Ax2, gp_Pnt, gp_Dir
+from OCC.Core.BRep import BRep_Builder
+from OCC.Core.TopoDS import TopoDS_Compound, topods
+from OCC.Core.TopAbs import TopAbs_SOLID
+from OCC.Core.BRepAlgoAPI import BRepAlgoAPI_Defeaturing, BRepAlgoAPI_Cut, BRepAlgoAPI_Fuse
+from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeCylinder
+
+from .mesh import list_solids
+from .modify import normalize_solid_index, resize_cylindrical_feature
+from .topology import get_topology_index
+from .recognition import KIND_HOLE, feature_caps, recognize_features
+
+# Tool cylinders stick out of open feature ends by this fraction of their
+# length, so booleans never see coincident faces
+TOOL_OVERSHOOT = 1e-2
+
+
+def indexed_solids(shape, topology=None):
+    """
+    Solids of 'shape' by index, from the topology index's solid map
+    (same order as cad.mesh.list_solids). 'topology' may pass in that index.
+    """
+    solid_map = get_topology_index(shape, topology).maps["solid"]
+    return [topods.Solid(solid_map.FindKey(i + 1)) for i in range(solid_map.Size())]
+
+
+def splice_solids(solids, replacements=None, removed=()):
+    """
+    New compound of 'solids' with solids replaced ({index: shape}) or removed.
+    Untouched solids are added as-is, sharing their geometry with the input.
+    """
+    replacements = replacements or {}
+    builder = BRep_Builder()
+    comp = TopoDS_Compound()
+    builder.MakeCompound(comp)
+    for i, solid in enumerate(solids):
+        if i in removed:
+            continue
+        builder.Add(comp, replacements.get(i, solid))
+    return comp
+
+
+def delete_solid_indexed(shape, index: int, topology=None):
+    """
+    Remove one solid, using the solid index instead of re-exploring.
+    Returns (new shape, deleted solid index or None if nothing was deleted).
+    """
+    solids = indexed_solids(shape, topology)
+    if not solids:
+        return shape, None
+    deleted = normalize_solid_index(index, len(solids))
+    return splice_solids(solids, removed=(deleted,)), deleted
+
+
+def _single_solid(shape):
+    solids = [s for s in list_solids(shape) if s.ShapeType() == TopAbs_SOLID]
+    return solids[0] if len(solids) == 1 else None
+
+
+def _rebuild_cylinder(solid, table, row, new_radius):
+    """
+    Remove the feature's faces with BRepAlgoAPI_Defeaturing, then cut (hole)
+    or fuse (boss) a cylinder of the new radius over the same axial range.
+    Returns the new solid or None if OCC could not do it.
+    """
+    index = table.index
+    f = table.features[row]
+    caps = feature_caps(table, row)
+    faces = list(table.faces(row)) + [int(r) for end in caps for r in end]
+
+    defeaturing = BRepAlgoAPI_Defeaturing()
+    defeaturing.SetShape(solid)
+    for face_row in faces:
+        defeaturing.AddFaceToRemove(index.face(face_row))
+    defeaturing.SetRunParallel(True)
+    defeaturing.Build()
+    if not defeaturing.IsDone() or defeaturing.HasErrors():
+        return None
+
+    axis = np.asarray(f["axis"])
+    t0, t1 = (float(t) for t in f["t_range"])
+    overshoot = TOOL_OVERSHOOT * (t1 - t0)
+    # Open ends get some overshoot: a through hole at both ends, a blind hole
+    # at its mouth, a boss at its foot (into the part)
+    if not len(caps[0]):
+        t0 -= overshoot
+    if not len(caps[1]):
+        t1 += overshoot
+
+    start = np.asarray(f["origin"]) + t0 * axis
+    tool = BRepPrimAPI_MakeCylinder(gp_Ax2(gp_Pnt(*start), gp_Dir(*axis)), new_radius, t1 - t0).Shape()
+
+    base = defeaturing.Shape()
+    op = BRepAlgoAPI_Cut(base, tool) if f["kind"] == KIND_HOLE else BRepAlgoAPI_Fuse(base, tool)
+    if not op.IsDone() or op.HasErrors():
+        return None
+    return _single_solid(op.Shape())
+
+
+def resize_feature_local(shape, table, row, new_radius):
+    """
+    Resize a recognized hole/boss (see cad.recognition) by editing only its
+    owning solid. Falls back to the radial scaling of resize_cylindrical_feature,
+    still limited to that solid, when defeaturing or the boolean fails.
+    Returns (new shape, index of the edited solid).
+    """
+    solids = indexed_solids(shape, table.index)
+    owner = int(table.features["solid"][row])
+    face = table.index.face(table.faces(row)[0])
+    if not 0 <= owner < len(solids):
+        # Free faces: no owning solid to scope the edit to
+        return resize_cylindrical_feature(shape, face, new_radius), None
+
+    solid = solids[owner]
+    new_solid = _rebuild_cylinder(solid, table, row, new_radius)
+    if new_solid is None:
+        new_solid = resize_cylindrical_feature(solid, face, new_radius)
+    return splice_solids(solids, replacements={owner: new_solid}), owner
+
+
+def resize_feature_at_face(shape, face_row: int, new_radius):
+    """
+    resize_feature_local for the feature containing topology face 'face_row'
+    (used to replay history).
+    """
+    index = get_topology_index(shape)
+    table = recognize_features(index)
+    for row in range(len(table)):
+        if face_row in table.faces(row):
+            return resize_feature_local(shape, table, row, new_radius)[0]
+    return resize_cylindrical_feature(shape, index.face(face_row), new_radius)
@@ -0,0 +1,187 @@
+# cad/session.py
+# Per-user model sessions: each session owns its shape, tree, caches and
+# history. Idle sessions are persisted to BRep and dropped from memory when
+# the estimated footprint exceeds a budget, then rehydrated on their next request.
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from .history import ShapeHistory
+from .transform_stack import TransformStack
+from .mesh_state import MeshState
+from .mass import MassState
+from .atlas import build_mesh_atlas
+from .tree import build_tree_columns
+from .topology import get_topology_index
+from .lod import LOD_LEVELS, LOD_RATIOS
+
+SESSIONS_DIR = os.getenv("SESSIONS_DIR", os.path.join("assets", "sessions"))
+# Estimated bytes of geometry and meshes kept in memory across all sessions
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+# Used when a request names no session (single-user setups, old clients)
+DEFAULT_SESSION = "default"
+_SESSION_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class Session:
+    """
+    One user's model and everything derived from it.
+
+    lock serializes requests on the session; mesh_lock guards the viewer
+    mesh, version and LOD list against background LOD builds; exact_lock
+    guards pending_exact.
+    """
+
+    def __init__(self, session_id, root=SESSIONS_DIR):
+        self.id = session_id
+        self.directory = os.path.join(root, session_id)
+        os.makedirs(self.directory, exist_ok=True)
+        self.lock = threading.RLock()
+        self.mesh_lock = threading.Lock()
+        self.exact_lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+        self.model_name = "model"   # base name of the uploaded STEP file
+        self.step_path = None
+        self.version = 0            # bumped on every upload/modification
+        self.history = ShapeHistory(os.path.join(self.directory, "history"))
+        self.stl_path = os.path.join(self.directory, "model.stl")
+        self.glb_path = os.path.join(self.directory, "model.glb")
+        self.lod_paths = {level: os.path.join(self.directory, f"model_{level}.glb") for level in LOD_LEVELS}
+        self.lod_ready = []         # levels of 'version' on disk, coarse first
+        self.mesh_revision = 0      # bumped whenever the viewer files are rewritten (edits and LODs)
+        self.persisted = False
+        self._clear()
+
+    def _clear(self):
+        self.shape = None           # current model, a located view of stack.base while transforms are pending
+        self.stack = TransformStack()
+        self.mesh = MeshState()
+        self.mass = MassState()
+        self.atlas = None           # cad.atlas mesh atlas over mesh.meshes
+        self.topology = None        # cad.topology.TopologyIndex, see topology_index()
+        self.tree = None            # cad.columnar_tree.ColumnarTree
+        self.features = None        # cad.recognition.FeatureTable, carried across edits for stable IDs
+        self.summary_cache = {"version": None, "summary": None}
+        self.hasse_cache = {"version": None, "data": None}
+        self.product_hasse_cache = {"version": None, "data": None}
+        self.pending_exact = None   # cad.exact_transform.ExactTransform
+
+    def topology_index(self):
+        """Topology index of the current shape, rebuilt only after the shape changed."""
+        self.topology = get_topology_index(self.shape, self.topology)
+        return self.topology
+
+    def touch(self):
+        self.last_used = time.monotonic()
+
+    def estimated_bytes(self):
+        """Geometry held by the history plus the viewer mesh arrays."""
+        mesh_bytes = sum(m["vertices"].nbytes + m["normals"].nbytes + m["indices"].nbytes
+                         for m in self.mesh.meshes)
+        return self.history.in_memory_bytes() + mesh_bytes
+
+    def persist(self):
+        """
+        Put the model on disk (as the history's BRep snapshot) and drop it
+        and its derived state from memory. Returns False if it cannot be
+        persisted right now.
+        """
+        if self.shape is None or self.pending_exact is not None:
+            return False
+        self.history.persist()
+        self._clear()
+        self.persisted = True
+        print(f"Session {self.id} persisted to disk")
+        return True
+
+    def rehydrate(self):
+        """Read a persisted model back and rebuild its viewer mesh, atlas and tree."""
+        if not self.persisted:
+            return
+        self.shape = self.history.current()
+        self.stack.reset(self.shape)
+        self.mesh = MeshState(ratio=LOD_RATIOS["fine"]).rebuild(self.shape)
+        self.atlas = build_mesh_atlas(self.mesh.meshes)
+        self.tree = build_tree_columns(self.shape, self.step_path, topology=self.topology_index())
+        self.persisted = False
+        print(f"Session {self.id} rehydrated")
+
+    def describe(self):
+        return {
+            "id": self.id,
+            "model": self.model_name if self.shape is not None or self.persisted else None,
+            "version": self.version,
+            "persisted": self.persisted,
+            "bytes": self.estimated_bytes(),
+            "idle_seconds": round(time.monotonic() - self.last_used, 1),
+        }
+
+
+class SessionRegistry:
+    """
+    Sessions by id, least recently used first.
+    """
+
+    def __init__(self, max_bytes=SESSION_MAX_BYTES, root=SESSIONS_DIR):
+        self.max_bytes = max_bytes
+        self.root = root
+        self.sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id=None):
+        """
+        The session for 'session_id' (created on first use, rehydrated if
+        it was persisted), marked as most recently used.
+        Raises ValueError for ids that are not [A-Za-z0-9_-]{1,64}.
+        """
+        session_id = session_id or DEFAULT_SESSION
+        if not _SESSION_ID.match(session_id):
+            raise ValueError(f"Invalid session id: {session_id!r}")
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                session = self.sessions[session_id] = Session(session_id, self.root)
+            self.sessions.move_to_end(session_id)
+            session.touch()
+        if session.persisted:
+            with session.lock:
+                session.rehydrate()
+        return session
+
+    def estimated_bytes(self):
+        with self._lock:
+            sessions = list(self.sessions.values())
+        return sum(s.estimated_bytes() for s in sessions)
+
+    def enforce_budget(self, keep=None):
+        """
+        Persist least recently used sessions until the estimate fits.
+        'keep' (the caller's session) and sessions busy with a request are skipped.
+        """
+        with self._lock:
+            sessions = list(self.sessions.values())
+        sizes = {s.id: s.estimated_bytes() for s in sessions}
+        total = sum(sizes.values())
+        for session in sessions:
+            if total <= self.max_bytes:
+                break
+            if session is keep or not session.lock.acquire(blocking=False):
+                continue
+            try:
+                if session.persist():
+                    total -= sizes[session.id]
+            finally:
+                session.lock.release()
+
+    def describe(self):
+        with self._lock:
+            sessions = list(self.sessions.values())
+        return {
+            "max_bytes": self.max_bytes,
+            "bytes": sum(s.estimated_bytes() for s in sessions),
+            "sessions": [s.describe() for s in reversed(sessions)],
+        }
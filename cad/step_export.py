@@ -0,0 +1,165 @@
+# cad/step_export.py
+# Background STEP export: the shape goes to the process pool as BRep and is
+# translated (and optionally gzipped) there, so a save never blocks requests.
+
+import os
+import gzip
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from OCC.Core.TopLoc import TopLoc_Location
+from OCC.Core.BRepBuilderAPI import BRepBuilderAPI_Transform
+
+from .cache import write_shape, read_shape
+from .modify import save_step
+
+EXPORT_DIR = os.getenv("EXPORT_DIR", os.path.join("assets", "exports"))
+# Finished exports kept on disk per session (oldest files are removed)
+EXPORT_KEEP = int(os.getenv("EXPORT_KEEP", "4"))
+# Finished exports older than this (seconds) are removed whoever owns them
+EXPORT_MAX_AGE = float(os.getenv("EXPORT_MAX_AGE", str(3600)))
+# Bytes per chunk when streaming an export
+STREAM_CHUNK = 64 * 1024
+
+EXPORT_JOBS = OrderedDict()
+_JOBS_LOCK = threading.Lock()
+
+
+def _baked(shape):
+    """'shape' with its location applied to the geometry (STEP gets identity placements)."""
+    loc = shape.Location()
+    if loc.IsIdentity():
+        return shape
+    return BRepBuilderAPI_Transform(shape.Located(TopLoc_Location()), loc.Transformation(), True).Shape()
+
+
+def _export_file(src, dst, compress):
+    """Worker: read a BRep, write it as STEP (gzipped if asked). Returns the file size."""
+    shape = _baked(read_shape(src))
+    if not compress:
+        save_step(shape, dst)
+        return os.path.getsize(dst)
+
+    plain = dst[:-len(".gz")]
+    save_step(shape, plain)
+    with open(plain, "rb") as f_in, gzip.open(dst, "wb", compresslevel=6) as f_out:
+        shutil.copyfileobj(f_in, f_out, STREAM_CHUNK)
+    os.remove(plain)
+    return os.path.getsize(dst)
+
+
+class ExportJob:
+    """
+    One STEP export. status goes queued -> snapshot -> translating -> done
+    (or error); progress is the fraction of those stages completed.
+    """
+
+    def __init__(self, version, name="model", compress=False, owner=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.owner = owner      # session that requested the export
+        self.version = version
+        self.compress = compress
+        self.filename = f"{name}.step" + (".gz" if compress else "")
+        self.path = os.path.join(EXPORT_DIR, f"{self.id}_{self.filename}")
+        self.status = "queued"
+        self.progress = 0.0
+        self.size = None
+        self.error = None
+        self.finished_at = None
+        self._done = threading.Event()
+
+    @property
+    def media_type(self):
+        return "application/gzip" if self.compress else "model/step"
+
+    def describe(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "progress": self.progress,
+            "version": self.version,
+            "filename": self.filename,
+            "compressed": self.compress,
+            "size": self.size,
+            "error": self.error,
+        }
+
+    def wait(self, timeout=None):
+        """Block until the export finished; True if it succeeded."""
+        self._done.wait(timeout)
+        return self.status == "done"
+
+    def iter_bytes(self):
+        """The exported file in STREAM_CHUNK pieces."""
+        with open(self.path, "rb") as f:
+            while True:
+                chunk = f.read(STREAM_CHUNK)
+                if not chunk:
+                    break
+                yield chunk
+
+    def _run(self, shape):
+        from workers import CAD_POOL
+        spool = tempfile.mkdtemp(prefix="export_")
+        try:
+            self.status, self.progress = "snapshot", 0.05
+            src = os.path.join(spool, "model.brep")
+            write_shape(shape, src)
+            self.status, self.progress = "translating", 0.2
+            future = CAD_POOL.submit(_export_file, src, self.path, self.compress)
+            self.size = future.result()
+            self.status, self.progress = "done", 1.0
+            print(f"Exported {self.filename} ({self.size} bytes) for model version {self.version}")
+        except Exception as e:
+            self.status, self.error = "error", str(e)
+            print(f"STEP export failed: {e}")
+        finally:
+            shutil.rmtree(spool, ignore_errors=True)
+            self.finished_at = time.monotonic()
+            self._done.set()
+
+
+def _prune_jobs(owner):
+    """
+    Drop finished exports beyond the newest EXPORT_KEEP of 'owner', and
+    those of any owner older than EXPORT_MAX_AGE, so one busy session never
+    deletes a file another one is about to download.
+    """
+    now = time.monotonic()
+    finished = [job for job in EXPORT_JOBS.values() if job._done.is_set()]
+    mine = [job for job in finished if job.owner == owner]
+    stale = mine[:max(0, len(mine) - EXPORT_KEEP)]
+    stale += [job for job in finished if now - job.finished_at > EXPORT_MAX_AGE and job not in stale]
+    for job in stale:
+        del EXPORT_JOBS[job.id]
+        try:
+            os.remove(job.path)
+        except OSError:
+            pass
+
+
+def start_export(shape, version, name="model", compress=False, owner=None):
+    """
+    Start exporting 'shape' in the background and return its ExportJob.
+    A finished (or running) export of the same owner, model version and
+    format is reused.
+    """
+    with _JOBS_LOCK:
+        for job in reversed(EXPORT_JOBS.values()):
+            if (job.owner == owner and job.version == version and job.compress == compress
+                    and job.status != "error"):
+                return job
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        job = ExportJob(version, name, compress, owner)
+        EXPORT_JOBS[job.id] = job
+        _prune_jobs(owner)
+    threading.Thread(target=job._run, args=(shape,), daemon=True).start()
+    return job
+
+
+def get_export_job(job_id):
+    return EXPORT_JOBS.get(job_id)
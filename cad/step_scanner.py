@@ -0,0 +1,232 @@
+# cad/step_scanner.py
+# Single-pass, mmap-backed scanner for the DATA section of STEP (ISO 10303-21) files
+
+import mmap
+import re
+from collections import namedtuple
+
+# One instance line: #id = KEYWORD ( ... ) ;
+# Strings ('' is an escaped quote) and /* comments */ may contain ';'.
+# Complex instances "#id = ( A(..) B(..) );" have an empty keyword.
+# Comments between instances match the first alternative (no groups) and are
+# skipped, so an instance inside a comment is never read as a live one.
+_ENTITY_RE = re.compile(
+    rb"/\*.*?\*/|"
+    rb"#(\d+)\s*=\s*([A-Za-z_][A-Za-z0-9_]*)?\s*"
+    rb"((?:[^;'/]++|'(?:[^']|'')*+'|/\*.*?\*/|/)*+);",
+    re.S,
+)
+_DATA_RE = re.compile(rb"(?m)^\s*DATA\s*(?:\([^;]*\))?\s*;")
+
+_TOKEN_RE = re.compile(
+    rb"\s*(?:"
+    rb"'((?:[^']|'')*)'"                     # 1 string
+    rb"|#(\d+)"                              # 2 entity reference
+    rb"|(\()"                                # 3 open
+    rb"|(\))"                                # 4 close
+    rb"|(,)"                                 # 5 separator
+    rb"|([$*])"                              # 6 unset / derived
+    rb"|\.([A-Za-z0-9_]+)\."                 # 7 enumeration / logical
+    rb"|([-+]?(?:\d+\.?\d*|\.\d+)(?:[Ee][-+]?\d+)?)"  # 8 number
+    rb"|([A-Za-z_][A-Za-z0-9_]*)"            # 9 typed parameter keyword
+    rb"|\"([0-9A-Fa-f]*)\""                  # 10 binary
+    rb"|/\*.*?\*/"                           # comment
+    rb")",
+    re.S,
+)
+
+# Typed record for one DATA instance. 'params' is the raw parameter text;
+# use parse_params() to turn it into Python values.
+StepEntity = namedtuple("StepEntity", ["entity_id", "keyword", "params"])
+
+# A '#123' reference inside parsed parameters
+StepRef = namedtuple("StepRef", ["id"])
+
+_X2_RE = re.compile(r"\\X2\\((?:[0-9A-Fa-f]{4})*)\\X0\\")
+_X4_RE = re.compile(r"\\X4\\((?:[0-9A-Fa-f]{8})*)\\X0\\")
+_X_RE = re.compile(r"\\X\\([0-9A-Fa-f]{2})")
+
+
+def decode_string(raw: bytes) -> str:
+    """
+    Decode a STEP string literal body: '' escapes and \\X\\ / \\X2\\ / \\X4\\ encodings.
+    """
+    text = raw.decode("utf-8", errors="replace").replace("''", "'")
+    if "\\X" not in text:
+        return text
+    text = _X2_RE.sub(lambda m: bytes.fromhex(m.group(1)).decode("utf-16-be", errors="replace"), text)
+    text = _X4_RE.sub(lambda m: bytes.fromhex(m.group(1)).decode("utf-32-be", errors="replace"), text)
+    text = _X_RE.sub(lambda m: bytes.fromhex(m.group(1)).decode("latin-1"), text)
+    return text.replace("\\\\", "\\")
+
+
+def iter_entities(filename: str, keywords=None):
+    """
+    Yield StepEntity records from the DATA section(s) in one pass.
+
+    The file is memory-mapped, so only the current instance is ever copied
+    into Python memory. If 'keywords' is given, only those entity types are
+    yielded (matching is still a single scan).
+    """
+    wanted = None
+    if keywords is not None:
+        wanted = {k.upper().encode("ascii") for k in keywords}
+
+    with open(filename, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file
+            return
+        try:
+            data = _DATA_RE.search(mm)
+            if data is None:
+                return
+            start = data.end()
+            end = mm.rfind(b"ENDSEC", start)
+            if end < 0:
+                end = len(mm)
+
+            for match in _ENTITY_RE.finditer(mm, start, end):
+                if match.group(1) is None:
+                    continue  # comment
+                keyword = (match.group(2) or b"").upper()
+                if wanted is not None and keyword not in wanted:
+                    continue
+                yield StepEntity(int(match.group(1)), keyword.decode("ascii"), match.group(3))
+        finally:
+            mm.close()
+
+
+def parse_params(raw: bytes):
+    """
+    Parse the raw parameter text of an entity into Python values.
+
+    strings -> str, '#12' -> StepRef(12), numbers -> int/float,
+    '.T.' -> 'T', '$' / '*' -> None, lists -> list,
+    typed parameters such as LENGTH_MEASURE(1.0) -> (keyword, [values]).
+    The outer parentheses are removed, so a simple entity yields its argument list.
+    """
+    stack = [[]]
+    pending_keyword = []
+    pos = 0
+    n = len(raw)
+
+    while pos < n:
+        m = _TOKEN_RE.match(raw, pos)
+        if m is None or m.end() == pos:
+            if raw[pos:].strip() == b"":
+                break
+            raise ValueError(f"Unexpected STEP parameter text at offset {pos}: {raw[pos:pos + 20]!r}")
+        pos = m.end()
+        group = m.lastindex
+
+        if group == 1:
+            stack[-1].append(decode_string(m.group(1)))
+        elif group == 2:
+            stack[-1].append(StepRef(int(m.group(2))))
+        elif group == 3:
+            stack.append([])
+            pending_keyword.append(None)
+        elif group == 4:
+            if len(stack) == 1:
+                raise ValueError("Unbalanced ')' in STEP parameters")
+            values = stack.pop()
+            keyword = pending_keyword.pop()
+            stack[-1].append((keyword, values) if keyword else values)
+        elif group == 6:
+            stack[-1].append(None)
+        elif group == 7:
+            stack[-1].append(m.group(7).decode("ascii"))
+        elif group == 8:
+            text = m.group(8)
+            if b"." in text or b"E" in text or b"e" in text:
+                stack[-1].append(float(text))
+            else:
+                stack[-1].append(int(text))
+        elif group == 9:
+            # Keyword applies to the parenthesised list that follows it
+            keyword = m.group(9).decode("ascii").upper()
+            nxt = _TOKEN_RE.match(raw, pos)
+            if nxt is None or nxt.lastindex != 3:
+                stack[-1].append(keyword)
+                continue
+            pos = nxt.end()
+            stack.append([])
+            pending_keyword.append(keyword)
+        elif group == 10:
+            stack[-1].append(m.group(10).decode("ascii"))
+        # separators and comments carry no value
+
+    if len(stack) != 1:
+        raise ValueError("Unbalanced '(' in STEP parameters")
+
+    values = stack[0]
+    # Simple entities are "( a, b, c )" - unwrap the outer list
+    if len(values) == 1 and isinstance(values[0], list):
+        return values[0]
+    return values
+
+
+def _ref_id(value):
+    return value.id if isinstance(value, StepRef) else None
+
+
+def scan_product_structure(filename: str):
+    """
+    Scan a STEP file once and return its product structure as
+    {product_id: {'name': str, 'children': [product_id, ...]}} (ids are strings).
+
+    NEXT_ASSEMBLY_USAGE_OCCURRENCE links product definitions, so the chain
+    PRODUCT_DEFINITION -> PRODUCT_DEFINITION_FORMATION -> PRODUCT is resolved
+    after the scan. Returns None if the file cannot be read.
+    """
+    products = {}          # product id -> name
+    pd_formation = {}      # product_definition id -> formation id
+    formation_product = {} # formation id -> product id
+    usages = []            # (relating pd, related pd)
+
+    keywords = (
+        "PRODUCT",
+        "PRODUCT_DEFINITION",
+        "PRODUCT_DEFINITION_FORMATION",
+        "PRODUCT_DEFINITION_FORMATION_WITH_SPECIFIED_SOURCE",
+        "NEXT_ASSEMBLY_USAGE_OCCURRENCE",
+    )
+
+    try:
+        for entity in iter_entities(filename, keywords):
+            try:
+                args = parse_params(entity.params)
+            except ValueError:
+                continue
+
+            if entity.keyword == "PRODUCT":
+                name = args[0] if args and isinstance(args[0], str) else ""
+                products[entity.entity_id] = name
+            elif entity.keyword == "PRODUCT_DEFINITION":
+                if len(args) > 2 and _ref_id(args[2]) is not None:
+                    pd_formation[entity.entity_id] = _ref_id(args[2])
+            elif entity.keyword.startswith("PRODUCT_DEFINITION_FORMATION"):
+                if len(args) > 2 and _ref_id(args[2]) is not None:
+                    formation_product[entity.entity_id] = _ref_id(args[2])
+            elif entity.keyword == "NEXT_ASSEMBLY_USAGE_OCCURRENCE":
+                if len(args) > 4:
+                    usages.append((_ref_id(args[3]), _ref_id(args[4])))
+    except OSError:
+        return None
+
+    def to_product(ref):
+        # Well-formed files reference PRODUCT_DEFINITIONs; tolerate direct PRODUCT refs
+        if ref in products:
+            return ref
+        return formation_product.get(pd_formation.get(ref))
+
+    structure = {str(pid): {"name": name, "children": []} for pid, name in products.items()}
+    for parent_ref, child_ref in usages:
+        parent_id = to_product(parent_ref)
+        child_id = to_product(child_ref)
+        if parent_id is not None and child_id is not None:
+            structure[str(parent_id)]["children"].append(str(child_id))
+
+    return structure
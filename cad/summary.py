@@ -0,0 +1,81 @@
+# cad/summary.py
+# CAD summary for the AI, cached per model version and updated analytically under transforms
+
+import numpy as np
+
+from .loader import count_solids, get_bounding_box
+from .info import format_cad_summary
+from .topology import get_topology_index, SURFACE_CYLINDER
+from .recognition import get_feature_table
+from .features import format_feature_summary
+
+# Summary of a model and the model version it describes (the default cache;
+# the server keeps one per session)
+SUMMARY_CACHE = {"version": None, "summary": None}
+
+
+class CadSummary:
+    """
+    The facts behind the summary text: solid count, bounding box, face and
+    cylinder counts and the recognized features.
+    """
+
+    def __init__(self, solid_count, bbox, face_count, cylinder_count, features):
+        self.solid_count = solid_count
+        self.bbox = np.asarray(bbox, dtype=np.float64)  # xmin, ymin, zmin, xmax, ymax, zmax
+        self.face_count = face_count
+        self.cylinder_count = cylinder_count
+        self.features = features  # cad.recognition.FeatureTable
+
+    def transformed(self, matrix):
+        """
+        Summary after a 3x4 affine transform with a uniform linear part:
+        the box is re-fitted around its transformed corners, radii scale
+        with the features, counts stay the same.
+        """
+        m = np.asarray(matrix, dtype=np.float64)[:3]
+        lo, hi = self.bbox[:3], self.bbox[3:]
+        corners = np.array([[x, y, z] for x in (lo[0], hi[0]) for y in (lo[1], hi[1]) for z in (lo[2], hi[2])])
+        corners = corners @ m[:, :3].T + m[:, 3]
+        bbox = np.concatenate([corners.min(axis=0), corners.max(axis=0)])
+        return CadSummary(self.solid_count, bbox, self.face_count, self.cylinder_count,
+                          self.features.transformed(m))
+
+    def text(self):
+        basic_sum = format_cad_summary(self.solid_count, self.bbox)
+        feat_sum = format_feature_summary(self.face_count, self.cylinder_count, self.features)
+        return basic_sum + "\n\nFEATURES:\n" + feat_sum
+
+
+def build_cad_summary(shape, features=None, topology=None):
+    index = get_topology_index(shape, topology)
+    return CadSummary(
+        count_solids(shape),
+        get_bounding_box(shape)[:6],
+        index.face_count,
+        len(index.rows_of_surface(SURFACE_CYLINDER)),
+        features if features is not None else get_feature_table(shape, topology=index),
+    )
+
+
+def get_cad_summary(shape, version, cache=SUMMARY_CACHE, features=None, topology=None):
+    """
+    Summary text for the model at 'version', built only when no cached
+    summary describes that version. 'features' and 'topology' may pass in
+    the model's feature table and topology index.
+    """
+    if cache["version"] != version or cache["summary"] is None:
+        cache["summary"] = build_cad_summary(shape, features, topology)
+        cache["version"] = version
+    return cache["summary"].text()
+
+
+def transform_summary(matrix, old_version, new_version, cache=SUMMARY_CACHE):
+    """
+    Carry the cached summary of 'old_version' through a transform to
+    'new_version'. Anything else (deletes, resizes, non-uniform scales)
+    leaves the cache stale, so the next get_cad_summary rebuilds it.
+    """
+    if cache["version"] == old_version and cache["summary"] is not None:
+        cache["summary"] = cache["summary"].transformed(matrix)
+        cache["version"] = new_version
@@ -0,0 +1,114 @@
+# cad/tessellate.py
+# Multi-core tessellation: BRepMesh in-mesher parallelism for single bodies,
+# plus a process pool that meshes independent solids side by side.
+
+import os
+import shutil
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from .cache import write_shape, read_shape
+from .mesh import mesh_shape, list_solids, extract_solid_mesh, relative_deflection
+
+# Worker processes for solid-level parallelism (1 disables the pool)
+TESSELLATION_WORKERS = int(os.getenv("TESSELLATION_WORKERS", str(os.cpu_count() or 1)))
+# Below this many solids the BRep round trip costs more than it saves
+MIN_SOLIDS_FOR_POOL = int(os.getenv("TESSELLATION_MIN_SOLIDS", "8"))
+
+_POOL = None
+_POOL_WORKERS = 0
+
+
+def get_pool(workers=None):
+    """
+    Return the shared tessellation pool, (re)creating it for a new worker
+    count (workers=None keeps the current pool, TESSELLATION_WORKERS at first).
+    Jobs go through workers.CAD_POOL, which bounds and counts them.
+    Workers are spawned, not forked, so no OCC state is inherited; each one
+    imports the OCC-backed modules once when it starts (see _warm_worker).
+    """
+    global _POOL, _POOL_WORKERS
+    workers = workers or _POOL_WORKERS or TESSELLATION_WORKERS
+    if _POOL is None or _POOL_WORKERS != workers:
+        if _POOL is not None:
+            _POOL.shutdown(wait=False)
+        _POOL = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                    initializer=_warm_worker)
+        _POOL_WORKERS = workers
+    return _POOL
+
+
+def _warm_worker():
+    """Pool initializer: load the OCC toolkits every job needs before the first one arrives."""
+    from . import loader, modify, mass, step_export, exact_transform
+
+
+def ping():
+    """No-op task used to start a worker ahead of the first request."""
+    return os.getpid()
+
+
+def shutdown_pool():
+    global _POOL, _POOL_WORKERS
+    if _POOL is not None:
+        _POOL.shutdown(wait=True)
+    _POOL = None
+    _POOL_WORKERS = 0
+
+
+def _mesh_solid_file(path, deflection, name):
+    """
+    Worker: read one solid from BRep, mesh it and return its arrays.
+    In-mesher parallelism is off here - the pool already uses every core.
+    """
+    solid = read_shape(path)
+    mesh_shape(solid, deflection, parallel=False)
+    mesh = extract_solid_mesh(solid, name=name)
+    mesh["deflection"] = deflection
+    return mesh
+
+
+def tessellate_solids(shape, deflection=0.01, workers=None, solids=None, ratio=None):
+    """
+    Mesh every solid of 'shape' and return one mesh dict per solid, in order.
+    Each mesh carries the linear deflection it was built with.
+
+    With 'ratio', each solid gets its own deflection of ratio x its
+    bounding-box diagonal instead of the absolute 'deflection'.
+
+    Large assemblies are split across the process pool (solids travel as
+    binary BRep files); small ones are meshed in-process with BRepMesh's own
+    face-level parallelism. 'solids' may be passed to reuse an existing list.
+    """
+    if solids is None:
+        solids = list_solids(shape)
+    names = [f"Solid {i + 1}" for i in range(len(solids))]
+    if ratio is not None:
+        deflections = [relative_deflection(s, ratio) for s in solids]
+    else:
+        deflections = [deflection] * len(solids)
+
+    if (workers or TESSELLATION_WORKERS) <= 1 or len(solids) < MIN_SOLIDS_FOR_POOL:
+        meshes = []
+        for solid, name, d in zip(solids, names, deflections):
+            mesh_shape(solid, d, parallel=True)
+            mesh = extract_solid_mesh(solid, name=name)
+            mesh["deflection"] = d
+            meshes.append(mesh)
+        return meshes
+
+    spool = tempfile.mkdtemp(prefix="tess_")
+    try:
+        paths = []
+        for i, solid in enumerate(solids):
+            path = os.path.join(spool, f"solid_{i}.brep")
+            write_shape(solid, path)
+            paths.append(path)
+
+        from workers import CAD_POOL
+        get_pool(workers)  # resizes only if a worker count was asked for
+        futures = CAD_POOL.submit_batch(_mesh_solid_file, zip(paths, deflections, names))
+        return [f.result() for f in futures]
+    finally:
+        shutil.rmtree(spool, ignore_errors=True)
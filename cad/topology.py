@@ -0,0 +1,161 @@
+# cad/topology.py
+# One-pass topology index: shape maps plus per-face geometry in NumPy arrays
+
+import numpy as np
+
+from OCC.Core.TopExp import TopExp_Explorer, topexp
+from OCC.Core.TopAbs import TopAbs_SOLID, TopAbs_SHELL, TopAbs_FACE, TopAbs_EDGE, TopAbs_REVERSED
+from OCC.Core.TopTools import TopTools_IndexedMapOfShape
+from OCC.Core.TopoDS import topods
+from OCC.Core.BRepAdaptor import BRepAdaptor_Surface
+from OCC.Core.GeomAbs import GeomAbs_Plane, GeomAbs_Cylinder, GeomAbs_Cone, GeomAbs_Sphere, GeomAbs_Torus
+from OCC.Core.GProp import GProp_GProps
+from OCC.Core.BRepGProp import brepgprop_SurfaceProperties
+
+# Surface type codes stored in the "surface" column (GeomAbs_SurfaceType values)
+SURFACE_PLANE = int(GeomAbs_Plane)
+SURFACE_CYLINDER = int(GeomAbs_Cylinder)
+SURFACE_CONE = int(GeomAbs_Cone)
+SURFACE_SPHERE = int(GeomAbs_Sphere)
+SURFACE_TORUS = int(GeomAbs_Torus)
+
+# One row per face, row i = face map index i + 1
+FACE_DTYPE = np.dtype([
+    ("solid", np.int32),           # owning solid (0-based), -1 for free faces
+    ("surface", np.uint8),         # GeomAbs surface type
+    ("reversed", np.bool_),        # face orientation in the shape
+    ("inward", np.bool_),          # curved faces: the face normal points towards the axis
+    ("radius", np.float64),        # cylinder/sphere radius, cone reference radius, torus major radius; 0 otherwise
+    ("axis", np.float64, (3,)),    # axis direction (plane normal for planes); 0 otherwise
+    ("origin", np.float64, (3,)),  # point on the axis (plane origin for planes)
+    ("u_range", np.float64, (2,)), # surface parameter bounds (for cylinders u is the angle,
+    ("v_range", np.float64, (2,)), #   v the position along the axis from 'origin')
+    ("area", np.float64),
+    ("centroid", np.float64, (3,)),
+])
+
+_MAP_TYPES = {"solid": TopAbs_SOLID, "shell": TopAbs_SHELL, "face": TopAbs_FACE, "edge": TopAbs_EDGE}
+
+
+class TopologyIndex:
+    """
+    Sub-shape maps (TopExp::MapShapes, 1-based) of one shape plus the
+    FACE_DTYPE array of per-face attributes. Feature queries and summaries
+    read the arrays instead of walking the BRep again.
+    """
+
+    def __init__(self, shape, maps, faces):
+        self.shape = shape
+        self.maps = maps    # {"solid"|"shell"|"face"|"edge": TopTools_IndexedMapOfShape}
+        self.faces = faces  # FACE_DTYPE array
+
+    @property
+    def solid_count(self):
+        return self.maps["solid"].Size()
+
+    @property
+    def face_count(self):
+        return len(self.faces)
+
+    @property
+    def edge_count(self):
+        return self.maps["edge"].Size()
+
+    def face(self, row: int):
+        """TopoDS_Face for a row of the face array."""
+        return topods.Face(self.maps["face"].FindKey(int(row) + 1))
+
+    def face_row(self, face):
+        """Row of a face in the face array, or -1 if it is not in the shape."""
+        return self.maps["face"].FindIndex(face) - 1
+
+    def rows_of_surface(self, surface: int):
+        return np.flatnonzero(self.faces["surface"] == surface)
+
+    def faces_of_solid(self, solid: int):
+        return np.flatnonzero(self.faces["solid"] == solid)
+
+    def matches(self, shape):
+        return self.shape is shape or (shape is not None and self.shape.IsEqual(shape))
+
+
+def _face_row(face, row):
+    adaptor = BRepAdaptor_Surface(face, True)
+    surface = int(adaptor.GetType())
+    row["surface"] = surface
+    row["reversed"] = face.Orientation() == TopAbs_REVERSED
+
+    position = None
+    if surface == SURFACE_PLANE:
+        position = adaptor.Plane().Position()
+    elif surface == SURFACE_CYLINDER:
+        cyl = adaptor.Cylinder()
+        row["radius"] = cyl.Radius()
+        position = cyl.Position()
+    elif surface == SURFACE_CONE:
+        cone = adaptor.Cone()
+        row["radius"] = cone.RefRadius()
+        position = cone.Position()
+    elif surface == SURFACE_SPHERE:
+        sphere = adaptor.Sphere()
+        row["radius"] = sphere.Radius()
+        position = sphere.Position()
+    elif surface == SURFACE_TORUS:
+        torus = adaptor.Torus()
+        row["radius"] = torus.MajorRadius()
+        position = torus.Position()
+
+    if position is not None:
+        d, p = position.Direction(), position.Location()
+        row["axis"] = (d.X(), d.Y(), d.Z())
+        row["origin"] = (p.X(), p.Y(), p.Z())
+        # The surface normal points away from the axis for a right-handed
+        # frame and towards it otherwise; a reversed face flips it again
+        if surface != SURFACE_PLANE:
+            row["inward"] = row["reversed"] == position.Direct()
+
+    row["u_range"] = (adaptor.FirstUParameter(), adaptor.LastUParameter())
+    row["v_range"] = (adaptor.FirstVParameter(), adaptor.LastVParameter())
+
+    props = GProp_GProps()
+    brepgprop_SurfaceProperties(face, props)
+    c = props.CentreOfMass()
+    row["area"] = props.Mass()
+    row["centroid"] = (c.X(), c.Y(), c.Z())
+
+
+def build_topology_index(shape):
+    """
+    Map solids, shells, faces and edges once and fill the per-face array.
+    """
+    maps = {}
+    for name, topabs in _MAP_TYPES.items():
+        shape_map = TopTools_IndexedMapOfShape()
+        topexp.MapShapes(shape, topabs, shape_map)
+        maps[name] = shape_map
+
+    face_map = maps["face"]
+    faces = np.zeros(face_map.Size(), dtype=FACE_DTYPE)
+    faces["solid"] = -1
+    for i in range(face_map.Size()):
+        _face_row(topods.Face(face_map.FindKey(i + 1)), faces[i])
+
+    solid_map = maps["solid"]
+    for s in range(solid_map.Size()):
+        explorer = TopExp_Explorer(solid_map.FindKey(s + 1), TopAbs_FACE)
+        while explorer.More():
+            faces["solid"][face_map.FindIndex(explorer.Current()) - 1] = s
+            explorer.Next()
+
+    return TopologyIndex(shape, maps, faces)
+
+
+def get_topology_index(shape, cached=None):
+    """
+    Topology index of 'shape': 'cached' if it was built for this shape,
+    otherwise a new one. Whoever keeps the model keeps its index (see
+    cad.session.Session.topology_index); nothing is cached here.
+    """
+    if cached is not None and cached.matches(shape):
+        return cached
+    return build_topology_index(shape)
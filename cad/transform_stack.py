@@ -0,0 +1,71 @@
+# cad/transform_stack.py
+# Compose moves/rotations/uniform scales into one gp_Trsf and apply it as a
+# TopLoc_Location, copying the BRep only when a consumer needs real geometry.
+
+from OCC.Core.gp import gp_Trsf
+from OCC.Core.TopLoc import TopLoc_Location
+from OCC.Core.BRepBuilderAPI import BRepBuilderAPI_Transform
+
+# |scale factor - 1| below this counts as rigid
+RIGID_TOLERANCE = 1e-12
+
+
+class TransformStack:
+    """
+    A base shape plus the pending transform of every edit pushed since the
+    last bake.
+
+    Rigid pending transforms are exposed through view() as the base shape
+    with a location - no geometry is copied, and however many edits were
+    pushed the location holds a single composed gp_Trsf. Pending scales
+    cannot live in a location (OCC rejects scaled locations), so view()
+    bakes them with one copy covering the whole stack.
+    """
+
+    def __init__(self, shape=None):
+        self.reset(shape)
+
+    def reset(self, shape):
+        """Start over from 'shape' (after an edit that produced new geometry)."""
+        self.base = shape
+        self.pending = gp_Trsf()
+        self.depth = 0
+        self._view = shape
+
+    def push(self, trsf):
+        """
+        Apply 'trsf' after everything already pending; returns the new view.
+        """
+        self.pending = trsf.Multiplied(self.pending)
+        self.depth += 1
+        self._view = None
+        return self.view()
+
+    def is_rigid(self):
+        return abs(self.pending.ScaleFactor() - 1.0) <= RIGID_TOLERANCE
+
+    def view(self):
+        """
+        Current shape: the located base for rigid stacks, baked otherwise.
+        """
+        if self._view is None:
+            if self.depth == 0:
+                self._view = self.base
+            elif self.is_rigid():
+                self._view = self.base.Moved(TopLoc_Location(self.pending))
+            else:
+                self._view = self.bake()
+        return self._view
+
+    def bake(self):
+        """
+        Copy the geometry with the pending transform applied and make it the
+        new base. Use before handing the shape to consumers that want
+        identity-located geometry (e.g. STEP export).
+        """
+        if self.depth:
+            self.base = BRepBuilderAPI_Transform(self.base, self.pending, True).Shape()
+            self.pending = gp_Trsf()
+            self.depth = 0
+        self._view = self.base
+        return self.base
@@ -1,100 +1,93 @@
 # cad/tree.py
 # Helper to generate assembly tree JSON structure
 
-from OCC.Core.TopExp import TopExp_Explorer
-from OCC.Core.TopAbs import TopAbs_SOLID, TopAbs_SHELL, TopAbs_FACE
-import uuid
-from .loader import parse_step_assembly
+from .loader import load_product_tree
+from .columnar_tree import build_columnar_tree
+from .topology import get_topology_index
 
-# Global storage for shape references (component_id -> shape)
-SHAPE_REFS = {}
+# Trees are cad.columnar_tree.ColumnarTree objects, kept by the session that
+# owns the model. Node ids are "root" and "<kind>-<row>", e.g. "face-120".
 
-def build_assembly_tree(shape, step_filename=None):
-    """
-    Build assembly tree. Try to parse STEP file for assembly structure first,
-    then show solids under the product.
-    """
-    
+# Children returned per page when nothing else is asked for
+LAZY_PAGE_SIZE = 200
+
+
+def _root_info(step_filename):
     root_name = "Assembly"
     root_type = "Assembly"
-    
+
     if step_filename:
-        parsed_tree = parse_step_assembly(step_filename)
+        parsed_tree = load_product_tree(step_filename)
         if parsed_tree:
             # Use parsed product as root
             root_name = parsed_tree['name']
             root_type = parsed_tree['type']
-    
-    root_id = str(uuid.uuid4())
-    tree = {
-        "id": root_id,
-        "name": root_name,
-        "type": root_type,
-        "children": []
-    }
-    
-    # Clear previous shape refs
-    SHAPE_REFS.clear()
-    explorer = TopExp_Explorer(shape, TopAbs_SOLID)
-    solid_index = 1
-    while explorer.More():
-        solid_shape = explorer.Current()
-        solid_id = str(uuid.uuid4())
-        solid_name = f"Solid {solid_index}"
-        solid_node = {
-            "id": solid_id,
-            "name": solid_name,
-            "type": "Part",
-            "children": []
-        }
-        
-        # Store shape reference
-        SHAPE_REFS[solid_id] = solid_shape
-        
-        # Add shells within this solid
-        shell_explorer = TopExp_Explorer(solid_shape, TopAbs_SHELL)
-        shell_index = 1
-        while shell_explorer.More():
-            shell_shape = shell_explorer.Current()
-            shell_id = str(uuid.uuid4())
-            shell_name = f"Shell {shell_index}"
-            shell_node = {
-                "id": shell_id,
-                "name": shell_name,
-                "type": "Shell",
-                "children": []
-            }
-            
-            # Store shape reference
-            SHAPE_REFS[shell_id] = shell_shape
-            
-            # Add faces within this shell
-            face_explorer = TopExp_Explorer(shell_shape, TopAbs_FACE)
-            face_index = 1
-            while face_explorer.More():
-                face_shape = face_explorer.Current()
-                face_id = str(uuid.uuid4())
-                face_name = f"Face {face_index}"
-                face_node = {
-                    "id": face_id,
-                    "name": face_name,
-                    "type": "Face",
-                    "children": []
-                }
-                
-                # Store shape reference
-                SHAPE_REFS[face_id] = face_shape
-                shell_node["children"].append(face_node)
-                face_explorer.Next()
-                face_index += 1
-            
-            solid_node["children"].append(shell_node)
-            shell_explorer.Next()
-            shell_index += 1
-        
-        tree["children"].append(solid_node)
-        explorer.Next()
-        solid_index += 1
-    
-    print(f"Built tree with {len(tree['children'])} solids")
-    return tree
+    return root_name, root_type
+
+
+def build_tree_columns(shape, step_filename=None, topology=None):
+    """
+    Build the columnar tree for a shape ('topology' may pass in its TopologyIndex).
+    """
+    root_name, root_type = _root_info(step_filename)
+    maps = get_topology_index(shape, topology).maps
+    return build_columnar_tree(shape, root_name, root_type, maps=maps)
+
+
+def build_assembly_tree(shape, step_filename=None, tree=None):
+    """
+    Build assembly tree. Try to parse STEP file for assembly structure first,
+    then show solids under the product ('tree': columns already built for it).
+    Returns the full nested solid/shell/face tree.
+    """
+    if tree is None:
+        tree = build_tree_columns(shape, step_filename)
+    print(f"Built tree with {int(tree.child_count[0])} solids")
+    return tree.to_dict()
+
+
+def build_lazy_tree(shape, step_filename=None, depth=1, tree=None):
+    """
+    Build the assembly tree but return only its top: the root plus the first
+    page of solids (depth=1), or also their shells (depth=2). Deeper levels
+    come from get_tree_children().
+    """
+    if tree is None:
+        tree = build_tree_columns(shape, step_filename)
+    print(f"Built lazy tree with {int(tree.child_count[0])} solids ({len(tree)} nodes)")
+    return tree.to_dict(depth=depth, lazy=True, page_size=LAZY_PAGE_SIZE)
+
+
+def get_tree_children(tree, node_id: str, offset: int = 0, limit: int = LAZY_PAGE_SIZE):
+    """
+    One page of a node's children in 'tree'.
+    Returns {"node_id", "total", "offset", "limit", "children": [...]}.
+    Raises KeyError for unknown node ids (or no tree).
+    """
+    if tree is None:
+        raise KeyError(node_id)
+    return tree.page(tree.row_of(node_id), offset, limit)
+
+
+def component_path(tree, node_id: str):
+    """
+    Mesh atlas path for a node id of 'tree', or None.
+    """
+    if tree is None:
+        return None
+    try:
+        return tree.atlas_path(tree.row_of(node_id))
+    except KeyError:
+        return None
+
+
+def resolve_node_shape(tree, node_id: str):
+    """
+    Shape for a node id of 'tree', or None.
+    """
+    if tree is None:
+        return None
+    try:
+        return tree.shape_of(tree.row_of(node_id))
+    except KeyError:
+        return None
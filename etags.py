@@ -0,0 +1,31 @@
+# etags.py
+# ETags for versioned views of a session's model. The server answers a
+# matching If-None-Match with 304 (see server.conditional); these helpers
+# have no web framework dependency.
+
+import uuid
+
+# Versioned views are revalidated on every use (no-cache):
+# an unchanged view costs a 304 instead of the body
+CACHE_CONTROL = "private, no-cache"
+# Versions restart with the process; the epoch keeps ETags from an earlier run from matching
+ETAG_EPOCH = uuid.uuid4().hex[:8]
+
+
+def model_etag(session, *parts):
+    """Strong ETag for a view of the session's model at its current version."""
+    return '"' + "-".join([ETAG_EPOCH, session.id, f"v{session.version}", *map(str, parts)]) + '"'
+
+
+def mesh_etag(session):
+    """ETag for the viewer mesh and atlas, which LODs replace within a version."""
+    return model_etag(session, f"m{session.mesh_revision}")
+
+
+def etag_matches(if_none_match, etag):
+    """
+    True if an If-None-Match header value holds 'etag'. The comparison is
+    weak, as the header requires: W/"x" matches "x".
+    """
+    tags = [tag.strip().replace("W/", "", 1) for tag in (if_none_match or "").split(",")]
+    return etag in tags or "*" in tags
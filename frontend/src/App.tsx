@@ -1,5 +1,4 @@
-import React, { useState, useEffect } from 'react';
-import axios from 'axios';
+import React, { useState, useEffect, useRef } from 'react';
 import { AssemblyTree } from './components/AssemblyTree';
 import { CADViewer } from './components/CADViewer';
 import { MenuBar } from './components/MenuBar';
@@ -7,6 +6,9 @@ import { VoicePanel } from './components/VoicePanel';
 import { HasseDiagram } from './components/HasseDiagram';
 import { Move3d, Upload, Box } from 'lucide-react';
 import type { TreeNode } from './types';
+import { withSession } from './session';
+import { watchJob } from './jobs';
+import { uploadStep } from './upload';
 
 const API_BASE = "http://localhost:8000";
 
@@ -17,6 +19,16 @@ export default function App() {
   const [loading, setLoading] = useState(false);
   const [lastMessage, setLastMessage] = useState<string>("");
   const [showHasse, setShowHasse] = useState(false);
+  const meshRevision = useRef(-1);
+
+  // One URL per viewer mesh (model version + mesh revision): unchanged meshes
+  // revalidate to a 304, finer LODs of the same version get a new URL.
+  // LOD events can overtake each other, so never go back to an older revision.
+  const showMesh = (version: number, revision: number) => {
+    if (revision <= meshRevision.current) return;
+    meshRevision.current = revision;
+    setModelUrl(withSession(`${API_BASE}/api/model.stl?v=${version}&r=${revision}`));
+  };
 
   // Initial Mock Data
   useEffect(() => {
@@ -38,16 +50,31 @@ export default function App() {
     if (!e.target.files || e.target.files.length === 0) return;
 
     const file = e.target.files[0];
-    const formData = new FormData();
-    formData.append("file", file);
 
     setLoading(true);
+    meshRevision.current = -1;   // a new model (the server may also have restarted)
     try {
-      const res = await axios.post(`${API_BASE}/upload`, formData);
-      if (res.data.status === "success") {
-        setTreeData(res.data.tree);
-        setModelUrl(`${API_BASE}/api/model.stl?t=${Date.now()}`); // Force re-fetch
-        setLastMessage("File uploaded.");
+      const upload = await uploadStep(file, (fraction) =>
+        setLastMessage(`Uploading ${file.name}: ${Math.round(fraction * 100)}%`));
+      if (upload.job) {
+        // Show the coarse mesh and the top of the tree as soon as the server has them
+        const result = await watchJob(upload.job, (event) => {
+          if (event.type === "stage" && event.status === "start") {
+            setLastMessage(`Loading model: ${event.stage}...`);
+          } else if (event.type === "partial" && (event.name === "mesh" || event.name === "lod")) {
+            showMesh(event.data.version, event.data.revision);
+          } else if (event.type === "partial" && event.name === "tree") {
+            setTreeData(event.data);
+            setLoading(false);
+          }
+        });
+        if (result.status === "success") {
+          setLastMessage("File uploaded.");
+        } else {
+          throw new Error(result.message);
+        }
+      } else {
+        throw new Error(upload.message);
       }
     } catch (err) {
       console.error("Upload failed", err);
@@ -66,7 +93,7 @@ export default function App() {
     // If model modified, refresh view
     if (data.modified) {
       console.log("Model modified, refreshing...");
-      setModelUrl(`${API_BASE}/api/model.stl?t=${Date.now()}`); // Force re-fetch
+      showMesh(data.version, data.revision);
       if (data.tree) {
         setTreeData(data.tree);
       }
@@ -1,6 +1,10 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import { ChevronRight, ChevronDown, Box, Layers, Shell, Triangle } from 'lucide-react';
 import type { TreeNode } from '../types';
+import { withSession } from '../session';
+
+const API_BASE = "http://localhost:8000";
+const PAGE_SIZE = 200;
 
 interface AssemblyTreeProps {
   data: TreeNode;
@@ -9,9 +13,32 @@ interface AssemblyTreeProps {
 }
 
 const TreeNodeItem = ({ node, level, selectedId, onSelect }: { node: TreeNode, level: number, selectedId: string | null, onSelect: (id: string) => void }) => {
-  const [expanded, setExpanded] = useState(true);
+  // Lazy nodes without preloaded children start collapsed and fetch them on first expand
+  const isLazy = node.has_children !== undefined;
+  const [expanded, setExpanded] = useState(!isLazy || (node.children || []).length > 0);
+  const [children, setChildren] = useState<TreeNode[]>(node.children || []);
   const isSelected = selectedId === node.id;
-  const hasChildren = node.children && node.children.length > 0;
+  const total = node.child_count ?? children.length;
+  const hasChildren = children.length > 0 || !!node.has_children;
+
+  useEffect(() => {
+    setChildren(node.children || []);
+  }, [node]);
+
+  const loadPage = async (offset: number) => {
+    const res = await fetch(withSession(`${API_BASE}/api/tree/${node.id}/children?offset=${offset}&limit=${PAGE_SIZE}`));
+    const page = await res.json();
+    if (page.children) {
+      setChildren(prev => [...prev.slice(0, offset), ...page.children]);
+    }
+  };
+
+  const toggle = () => {
+    if (!expanded && isLazy && node.has_children && children.length === 0) {
+      loadPage(0);
+    }
+    setExpanded(!expanded);
+  };
 
   return (
     <div>
@@ -28,7 +55,7 @@ const TreeNodeItem = ({ node, level, selectedId, onSelect }: { node: TreeNode, l
           className="w-4 h-4 mr-1 flex items-center justify-center text-gray-400 hover:text-gray-600"
           onClick={(e) => {
             e.stopPropagation();
-            setExpanded(!expanded);
+            toggle();
           }}
         >
           {hasChildren && (
@@ -50,7 +77,7 @@ const TreeNodeItem = ({ node, level, selectedId, onSelect }: { node: TreeNode, l
 
       {hasChildren && expanded && (
         <div>
-          {node.children.map(child => (
+          {children.map(child => (
             <TreeNodeItem
               key={child.id}
               node={child}
@@ -59,6 +86,18 @@ const TreeNodeItem = ({ node, level, selectedId, onSelect }: { node: TreeNode, l
               onSelect={onSelect}
             />
           ))}
+          {children.length < total && (
+            <div
+              className="py-1 text-xs text-blue-500 cursor-pointer hover:underline"
+              style={{ paddingLeft: `${(level + 1) * 12 + 24}px` }}
+              onClick={(e) => {
+                e.stopPropagation();
+                loadPage(children.length);
+              }}
+            >
+              Show more ({total - children.length} remaining)
+            </div>
+          )}
         </div>
       )}
     </div>
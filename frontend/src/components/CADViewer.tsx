@@ -3,6 +3,7 @@ import { Canvas, useLoader } from '@react-three/fiber';
 import { OrbitControls, Stage, Grid, Environment } from '@react-three/drei';
 import { STLLoader } from 'three/examples/jsm/loaders/STLLoader';
 import * as THREE from 'three';
+import { withSession } from '../session';
 
 const Model = ({ url, selectedId }: { url: string, selectedId: string | null }) => {
   // Load STL
@@ -34,7 +35,7 @@ const SelectedComponent = ({ selectedId }: { selectedId: string | null }) => {
   if (!selectedId) return null;
 
   // Load the selected component STL
-  const componentUrl = `http://localhost:8000/api/component/${selectedId}`;
+  const componentUrl = withSession(`http://localhost:8000/api/component/${selectedId}`);
   const geometry = useLoader(STLLoader, componentUrl);
 
   // Center geometry
@@ -8,6 +8,7 @@ import ReactFlow, {
 } from 'reactflow';
 import dagre from 'dagre'; // Try default import again, it is standard for dagre in TS
 import 'reactflow/dist/style.css';
+import { withSession } from '../session';
 
 interface HasseDiagramProps {
   apiBase: string;
@@ -52,7 +53,7 @@ export function HasseDiagram({ apiBase, onNodeClick }: HasseDiagramProps) {
 
   // Fetch data
   React.useEffect(() => {
-    fetch(`${apiBase}/api/hasse`)
+    fetch(withSession(`${apiBase}/api/hasse`))
       .then(res => res.json())
       .then(data => {
         // Layout the graph
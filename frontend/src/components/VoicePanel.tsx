@@ -1,6 +1,8 @@
 import React, { useState, useRef } from 'react';
 import { Mic, MicOff } from 'lucide-react';
 import axios from 'axios';
+import { withSession } from '../session';
+import { watchJob } from '../jobs';
 
 interface VoicePanelProps {
   onCommandProcessed: (data: any) => void;
@@ -35,9 +37,19 @@ export const VoicePanel = ({ onCommandProcessed }: VoicePanelProps) => {
         formData.append("file", file);
 
         try {
-          const res = await axios.post("http://localhost:8000/api/voice", formData);
-          console.log("Voice Response:", res.data);
-          onCommandProcessed(res.data);
+          const res = await axios.post(withSession("http://localhost:8000/api/voice"), formData);
+          if (res.data.status === "accepted") {
+            const result = await watchJob(res.data.job, (event) => {
+              // Show what was heard while the command is still running
+              if (event.type === "partial" && event.name === "transcription") {
+                onCommandProcessed({ transcription: event.data, response: "...", modified: false });
+              }
+            });
+            console.log("Voice Response:", result);
+            onCommandProcessed(result);
+          } else {
+            onCommandProcessed(res.data);
+          }
         } catch (err: any) {
           console.error("Voice API Error", err);
           // Show error in chat instead of silent fail/alert
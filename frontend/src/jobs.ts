@@ -0,0 +1,43 @@
+// src/jobs.ts
+// Uploads and voice commands run as server-side jobs: the POST returns a job
+// id and /ws/jobs/{id} pushes stage timings, partial results and the result.
+
+import { SESSION_ID } from './session';
+
+const WS_BASE = "ws://localhost:8000";
+
+export interface JobEvent {
+  type: 'stage' | 'partial' | 'done' | 'error';
+  t: number;            // ms since the job was created
+  stage?: string;
+  status?: 'start' | 'done';
+  ms?: number;          // stage duration
+  name?: string;        // partial result name (tree, mesh, transcription, ...)
+  data?: any;
+  result?: any;
+  message?: string;
+}
+
+// Resolves with the job's result; onEvent sees every event on the way.
+export const watchJob = (jobId: string, onEvent?: (event: JobEvent) => void) =>
+  new Promise<any>((resolve, reject) => {
+    const ws = new WebSocket(`${WS_BASE}/ws/jobs/${jobId}?session=${SESSION_ID}`);
+    let settled = false;
+    ws.onmessage = (msg) => {
+      const event: JobEvent = JSON.parse(msg.data);
+      onEvent?.(event);
+      if (event.type === 'done') {
+        settled = true;
+        resolve(event.result);
+      } else if (event.type === 'error') {
+        settled = true;
+        reject(new Error(event.message || "Job failed"));
+      }
+    };
+    ws.onerror = () => {
+      if (!settled) reject(new Error("Lost connection to the job"));
+    };
+    ws.onclose = () => {
+      if (!settled) reject(new Error("Job channel closed"));
+    };
+  });
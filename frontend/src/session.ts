@@ -0,0 +1,20 @@
+// src/session.ts
+// Each browser tab works on its own server-side model: the session id lives
+// in sessionStorage and is sent as ?session= on every API request.
+
+const STORAGE_KEY = "cad-session-id";
+
+const newSessionId = () =>
+  Array.from(crypto.getRandomValues(new Uint8Array(12)), (b) => b.toString(16).padStart(2, "0")).join("");
+
+export const SESSION_ID: string = (() => {
+  let id = sessionStorage.getItem(STORAGE_KEY);
+  if (!id) {
+    id = newSessionId();
+    sessionStorage.setItem(STORAGE_KEY, id);
+  }
+  return id;
+})();
+
+export const withSession = (url: string) =>
+  `${url}${url.includes("?") ? "&" : "?"}session=${SESSION_ID}`;
@@ -4,4 +4,7 @@ export interface TreeNode {
   name: string;
   type: 'Assembly' | 'Part' | 'Shell' | 'Face';
   children: TreeNode[];
+  // Lazy tree mode: children are paged from /api/tree/{id}/children
+  has_children?: boolean;
+  child_count?: number;
 }
@@ -0,0 +1,54 @@
+// src/upload.ts
+// Resumable STEP upload: declare the file (with its SHA-256, so the server can
+// skip content it already has), then PUT it in chunks at explicit offsets.
+// A failed chunk is retried from the offset the server reports.
+
+import axios from 'axios';
+import { withSession } from './session';
+
+const API_BASE = "http://localhost:8000";
+const MAX_RETRIES = 5;
+// Hashing reads the whole file into memory; above this size the server hashes alone
+const CLIENT_HASH_LIMIT = 512 * 1024 * 1024;
+
+const sha256Hex = async (file: File) => {
+  const digest = await crypto.subtle.digest("SHA-256", await file.arrayBuffer());
+  return Array.from(new Uint8Array(digest), (b) => b.toString(16).padStart(2, "0")).join("");
+};
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// Resolves with the final server response, which carries the load job id.
+export const uploadStep = async (file: File, onProgress?: (fraction: number) => void) => {
+  const params = new URLSearchParams({ filename: file.name, size: String(file.size) });
+  if (file.size <= CLIENT_HASH_LIMIT && crypto.subtle) {
+    params.set("sha256", await sha256Hex(file));
+  }
+  let state = (await axios.post(withSession(`${API_BASE}/api/uploads?${params}`))).data;
+  if (state.status !== "uploading") return state;   // already on the server (or an error)
+
+  const url = withSession(`${API_BASE}/api/uploads/${state.upload}`);
+  let retries = 0;
+  while (state.status === "uploading") {
+    const offset: number = state.offset;
+    onProgress?.(offset / file.size);
+    try {
+      const chunk = file.slice(offset, offset + state.chunk_size);
+      state = (await axios.put(`${url}&offset=${offset}`, chunk, {
+        headers: { "Content-Type": "application/octet-stream" },
+      })).data;
+      retries = 0;
+    } catch (err: any) {
+      if (err.response?.status === 409) {
+        // Out of step with the server (e.g. a chunk landed but its reply was lost)
+        state = { ...state, offset: err.response.data.offset };
+        continue;
+      }
+      if (++retries > MAX_RETRIES || (err.response && err.response.status < 500)) throw err;
+      await sleep(1000 * retries);
+      state = (await axios.get(url)).data;
+    }
+  }
+  onProgress?.(1);
+  return state;
+};
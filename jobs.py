@@ -0,0 +1,159 @@
+# jobs.py
+# Long-running requests (upload, voice) as jobs: the POST returns a job id and
+# the work reports stage timings and partial results as events, which
+# /ws/jobs/{id} pushes to the client as they happen. Events may be published
+# from worker threads; subscribers are asyncio queues fed thread-safely.
+
+import os
+import time
+import uuid
+import asyncio
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Finished jobs kept for late subscribers and polling (oldest are dropped)
+JOBS_KEEP = int(os.getenv("JOBS_KEEP", "64"))
+
+JOBS = OrderedDict()
+_JOBS_LOCK = threading.Lock()
+# Running job tasks (the event loop only keeps weak references)
+_TASKS = set()
+
+
+class Job:
+    """
+    One upload or voice command. status goes queued -> running -> done (or
+    error). Events are dicts with a "type" of stage, partial, done or error
+    and "t", the milliseconds since the job was created.
+    """
+
+    def __init__(self, kind, owner=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.owner = owner          # session that started the job
+        self.status = "queued"
+        self.stage_name = None
+        self.stages = {}            # stage -> duration in ms
+        self.result = None
+        self.error = None
+        self.events = []
+        self._created = time.perf_counter()
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self):
+        return self.status in ("done", "error")
+
+    def _elapsed_ms(self):
+        return round((time.perf_counter() - self._created) * 1000.0, 1)
+
+    def _publish(self, event, status=None):
+        """
+        Record and deliver an event. A final 'status' is set under the same
+        lock, so a subscriber never sees a finished job without its last event.
+        """
+        event["t"] = self._elapsed_ms()
+        with self._lock:
+            if status is not None:
+                self.status = status
+            self.events.append(event)
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+    @contextmanager
+    def stage(self, name):
+        """Time a stage: emits a start event and, on success, one with its duration."""
+        self.stage_name = name
+        self._publish({"type": "stage", "stage": name, "status": "start"})
+        start = time.perf_counter()
+        yield
+        ms = round((time.perf_counter() - start) * 1000.0, 1)
+        self.stages[name] = ms
+        self._publish({"type": "stage", "stage": name, "status": "done", "ms": ms})
+
+    def partial(self, name, data):
+        """Push an intermediate result (top of the tree, coarse mesh, transcription...)."""
+        self._publish({"type": "partial", "name": name, "data": data})
+
+    def finish(self, result):
+        self.result = result
+        self._publish({"type": "done", "result": result}, status="done")
+
+    def fail(self, error):
+        self.error = error
+        self._publish({"type": "error", "stage": self.stage_name, "message": error}, status="error")
+
+    async def run(self, work, *args):
+        """Run the coroutine function work(job, *args) and finish with its result."""
+        self.status = "running"
+        try:
+            result = await work(self, *args)
+        except Exception as e:
+            print(f"{self.kind} job {self.id} failed: {e}")
+            self.fail(str(e))
+        else:
+            self.finish(result)
+
+    async def stream(self):
+        """All events so far, then new ones as they are published, until the job ends."""
+        queue = asyncio.Queue()
+        subscriber = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            backlog = list(self.events)
+            if not self.finished:
+                self._subscribers.append(subscriber)
+        try:
+            for event in backlog:
+                yield event
+            if backlog and backlog[-1]["type"] in ("done", "error"):
+                return
+            while True:
+                event = await queue.get()
+                yield event
+                if event["type"] in ("done", "error"):
+                    return
+        finally:
+            with self._lock:
+                if subscriber in self._subscribers:
+                    self._subscribers.remove(subscriber)
+
+    def describe(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage_name,
+            "stages": dict(self.stages),
+            "elapsed_ms": self._elapsed_ms(),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+def _prune_jobs():
+    for job_id in [job_id for job_id, job in JOBS.items() if job.finished][:max(0, len(JOBS) - JOBS_KEEP)]:
+        del JOBS[job_id]
+
+
+def create_job(kind, owner=None):
+    """Register a new job; start it later with start_job()."""
+    job = Job(kind, owner)
+    with _JOBS_LOCK:
+        JOBS[job.id] = job
+        _prune_jobs()
+    return job
+
+
+def start_job(job, work, *args):
+    """Run work(job, *args) as a task on the current event loop."""
+    task = asyncio.get_running_loop().create_task(job.run(work, *args))
+    _TASKS.add(task)
+    task.add_done_callback(_TASKS.discard)
+    return job
+
+
+def get_job(job_id):
+    return JOBS.get(job_id)
@@ -11,12 +11,15 @@ import os
 import shutil
 import uuid
 import threading
+import asyncio
+from concurrent.futures import Future
+import numpy as np
 # Fix for OpenMP runtime conflict (Whisper + OCC/Numpy)
 os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
 
-from fastapi import FastAPI, UploadFile, File, WebSocket
+from fastapi import FastAPI, UploadFile, File, WebSocket, WebSocketDisconnect, Depends, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.responses import FileResponse, StreamingResponse, Response, JSONResponse
 import io
 import networkx as nx
 import matplotlib
@@ -26,6 +29,12 @@ import subprocess
 import sys
 import difflib
 
+from workers import IO_POOL, MODEL_POOL, CAD_POOL, ASR_POOL, WorkerBusy, warm_up, worker_stats
+import workers
+from jobs import create_job, start_job, get_job
+from uploads import UploadError, create_upload, get_upload, find_content, store_stream
+from etags import CACHE_CONTROL, model_etag, mesh_etag, etag_matches
+
 # Global Audio State
 CURRENT_AUDIO_PROCESS = None
 LAST_SPOKEN_TEXT = ""
@@ -43,24 +52,77 @@ def stop_speaking():
 
 # CAD Logic Imports - CONDITIONAL
 if ENABLE_HEAVY:
-    from cad.loader import load_step_shape
+    from cad.loader import load_step_shape, cache_step_file
+    from cad.cache import cache_stats, remember_digest, has_cached_shape, record_stats
     from cad.export import export_to_stl
-    from cad.tree import build_assembly_tree
+    from cad.mesh_state import MeshState, trsf_to_matrix
+    from cad.atlas import build_mesh_atlas
+    from cad.lod import LOD_LEVELS, LOD_RATIOS, build_lod_pyramid, detached_copy
+    from cad.tree import build_assembly_tree, build_lazy_tree, get_tree_children, component_path
+    from cad.tree import build_tree_columns
     from cad.info import create_cad_summary
     from cad.features import find_cylindrical_faces, create_feature_summary
+    from cad.recognition import get_feature_table, KIND_NAMES
+    from cad.summary import get_cad_summary, transform_summary
+    from cad.mass import part_breakdown, combine
+    from cad.history import operation_trsf
+    from cad.session import SessionRegistry, DEFAULT_SESSION
+    from cad.command_fusion import fuse_commands, non_uniform_factors, describe_command
+    from cad.modify import is_uniform_matrix, affine_trsf, transform_shape_affine
+    from cad.scoped_edit import delete_solid_indexed, resize_feature_local
+    from cad.exact_transform import ExactTransform
+    from cad.modify import scale_matrix
+    from cad.step_export import start_export, get_export_job
     from cad.modify import scale_shape, translate_shape, delete_solid, resize_cylindrical_feature, scale_shape_non_uniform, rotate_shape, get_mass_properties
+    from cad.modify import scale_trsf, translation_trsf, rotation_trsf, normalize_solid_index
+    from cad.loader import count_solids
     from ai.cad_command_interpreter import interpret_command, answer_question
     from voice.tts_basic import speak
-    import whisper
-    WHISPER_MODEL = whisper.load_model("base")
+    from voice.asr import transcribe
 else:
     # Mock functions for demo mode
-    def load_step_shape(*args): return None
+    def load_step_shape(*args, **kwargs): return None
+    def cache_step_file(*args): return None, {}
+    def record_stats(*args): pass
+    def cache_stats(*args): return {}
+    def remember_digest(*args): pass
+    def has_cached_shape(*args): return False
     def export_to_stl(*args): pass
+    MeshState = None
+    def trsf_to_matrix(*args): return None
+    def build_mesh_atlas(*args): return None
+    LOD_LEVELS, LOD_RATIOS = (), {}
+    def build_lod_pyramid(*args, **kwargs): return {}
+    def detached_copy(shape): return shape
     def build_assembly_tree(*args): return {"id": "demo", "name": "Demo Mode", "type": "Assembly", "children": []}
+    def build_lazy_tree(*args, **kwargs): return build_assembly_tree()
+    def get_tree_children(*args): raise KeyError("demo")
+    def component_path(*args): return None
+    def build_tree_columns(*args, **kwargs): return None
     def create_cad_summary(*args): return "Demo mode - CAD features disabled"
     def find_cylindrical_faces(*args): return []
     def create_feature_summary(*args): return "Demo mode"
+    def get_feature_table(*args, **kwargs): return None
+    KIND_NAMES = ("hole", "boss")
+    def get_cad_summary(*args, **kwargs): return "Demo mode - CAD features disabled"
+    def transform_summary(*args): pass
+    def part_breakdown(*args): return {"total": {}, "parts": []}
+    def combine(*args): return {}
+    def operation_trsf(*args): return None
+    SessionRegistry = None
+    DEFAULT_SESSION = "default"
+    def fuse_commands(commands): return [("command", c) for c in commands]
+    def non_uniform_factors(cmd): return 1.0, 1.0, 1.0
+    def describe_command(cmd): return ""
+    def is_uniform_matrix(*args): return True
+    def affine_trsf(*args): return None
+    def transform_shape_affine(*args): return None
+    def delete_solid_indexed(shape, index, topology=None): return shape, None
+    def resize_feature_local(shape, *args): return shape, None
+    ExactTransform = None
+    def scale_matrix(fx, fy, fz): return np.diag([fx, fy, fz, 1.0])[:3]
+    def start_export(*args, **kwargs): return None
+    def get_export_job(*args): return None
     def scale_shape(*args): return None
     def translate_shape(*args): return None
     def delete_solid(*args): return None
@@ -68,10 +130,15 @@ else:
     def scale_shape_non_uniform(*args): return None
     def rotate_shape(*args): return None
     def get_mass_properties(*args): return {}
+    def scale_trsf(*args): return None
+    def translation_trsf(*args): return None
+    def rotation_trsf(*args): return None
+    def normalize_solid_index(index, count): return index
+    def count_solids(*args): return 0
     def interpret_command(*args): return {"response": "Demo mode - voice features disabled"}
     def answer_question(*args): return "Demo mode"
     def speak(*args): pass
-    WHISPER_MODEL = None
+    def transcribe(*args): return ""
 from cad.info import create_cad_summary
 from cad.features import find_cylindrical_faces, create_feature_summary
 from cad.modify import scale_shape, translate_shape, delete_solid, resize_cylindrical_feature, scale_shape_non_uniform, rotate_shape, get_mass_properties
@@ -101,20 +168,251 @@ def health():
 # Global State
 CURRENT_ASSETS_DIR = "assets"
 os.makedirs(CURRENT_ASSETS_DIR, exist_ok=True)
-CURRENT_SHAPE = None
-CURRENT_STL_PATH = os.path.join(CURRENT_ASSETS_DIR, "model.stl")
-WHISPER_MODEL = None
+# One model per session (see cad.session): shape, transform stack, history,
+# viewer mesh, mass cache, tree and feature table. Requests name their
+# session with the X-Session-Id header or ?session=; without one they share
+# the default session. Idle sessions go to disk under a memory budget.
+SESSIONS = SessionRegistry() if ENABLE_HEAVY else None
+# Store GLB positions/normals as int16/int8 (KHR_mesh_quantization)
+GLB_QUANTIZE = os.getenv("GLB_QUANTIZE", "true").lower() == "true"
+# Relative integration tolerance for spoken answers (0 = OCC default rule)
+VOICE_MASS_TOLERANCE = float(os.getenv("VOICE_MASS_TOLERANCE", "1e-3"))
+# "lazy": upload/voice responses carry only the top of the tree, the rest is paged
+# from /api/tree/{node_id}/children; "full": the whole solid/shell/face tree
+TREE_MODE = os.getenv("TREE_MODE", "lazy").lower()
+
+def current_session(session: str = None, x_session_id: str = Header(None)):
+    """
+    FastAPI dependency: the caller's session (None in demo mode).
+    """
+    if SESSIONS is None:
+        return None
+    try:
+        return SESSIONS.get(x_session_id or session)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def has_model(session):
+    return session is not None and session.shape is not None
+
+def conditional(request, etag, build):
+    """
+    304 if the client's If-None-Match holds 'etag', otherwise the response
+    from build(). Compute 'etag' before reading what build() serves.
+    """
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response = build()
+    if isinstance(response, dict):
+        response = JSONResponse(content=response)
+    response.headers.update(headers)
+    return response
+
+def build_tree(session, step_filename=None):
+    session.tree = build_tree_columns(session.shape, step_filename, topology=session.topology_index())
+    if TREE_MODE == "full":
+        return build_assembly_tree(session.shape, tree=session.tree)
+    return build_lazy_tree(session.shape, tree=session.tree)
+
+def feature_table(session):
+    """Feature table of the session's model; IDs carry over from its previous versions."""
+    session.features = get_feature_table(session.shape, previous=session.features,
+                                         topology=session.topology_index())
+    return session.features
+
+def bump_model_version(session):
+    with session.mesh_lock:
+        session.version += 1
+        session.lod_ready.clear()
+        return session.version
+
+def publish_viewer_mesh(session):
+    """
+    Write model.stl / model.glb and the component atlas from the session's mesh.
+    """
+    session.mesh.write_stl(session.stl_path)
+    session.mesh.write_glb(session.glb_path, quantize=GLB_QUANTIZE)
+    session.atlas = build_mesh_atlas(session.mesh.meshes)
+    session.mesh_revision += 1
+
+def refresh_viewer_mesh(session, update=None):
+    """
+    Bring the session's mesh in line with its shape and rewrite the viewer files.
+    update: ("transform", gp_Trsf) | ("delete", solid_index) | ("solids", [indices])
+            | ("affine", 3x4 matrix) (preview) | None (full re-mesh)
+    """
+    with session.mesh_lock:
+        kind = update[0] if update else "rebuild"
+        if session.mesh.ratio != LOD_RATIOS["fine"] and kind != "affine":
+            # Edited before the fine LOD arrived - mesh at full detail now
+            kind = "rebuild"
+        if kind == "transform":
+            session.mesh.apply_transform(trsf_to_matrix(update[1]))
+        elif kind == "affine":
+            # Preview of a pending exact GTransform, replaced when it lands
+            session.mesh.apply_transform(update[1])
+        elif kind == "delete":
+            session.mesh.remove_solid(update[1])
+        elif kind == "solids":
+            session.mesh.refresh_solids(session.shape, update[1])
+        else:
+            session.mesh = MeshState(ratio=LOD_RATIOS["fine"]).rebuild(session.shape)
+        publish_viewer_mesh(session)
+
+def refresh_mass_state(session, update, version):
+    """
+    Carry cached mass properties through an edit, or drop them if the edit
+    changed geometry in a way that cannot be followed exactly.
+    update: ("transform", gp_Trsf) | ("delete", solid_index) | ("solids", [indices]) | None
+    """
+    mass = session.mass
+    kind = update[0] if update else None
+    if mass.props is None or mass.version != version - 1:
+        mass.invalidate()
+    elif kind == "transform":
+        mass.apply_transform(trsf_to_matrix(update[1]), version)
+    elif kind == "delete":
+        mass.remove_solid(update[1], version)
+    elif kind == "solids":
+        mass.refresh_solids(session.shape, update[1], version)
+    else:
+        mass.invalidate()
+
+def apply_model_change(session, update=None):
+    """
+    Bring every derived view of the session's shape up to date after it changed.
+    update: ("transform", gp_Trsf) | ("delete", solid_index) | ("solids", [indices])
+            | ("affine", 3x4 matrix) | None (anything else)
+    Returns the new tree.
+    """
+    version = bump_model_version(session)
+    if update and update[0] == "transform":
+        # Keep feature IDs and the AI summary attached to the moved geometry
+        matrix = trsf_to_matrix(update[1])
+        if session.features is not None:
+            session.features = session.features.transformed(matrix)
+        transform_summary(matrix, version - 1, version, session.summary_cache)
+    else:
+        # The edit built new geometry from the located view, baking any pending transform
+        session.stack.reset(session.shape)
+    refresh_mass_state(session, update, version)
+    refresh_viewer_mesh(session, update)
+    return build_tree(session)
+
+def step_history(session, redo=False):
+    """
+    Undo (or redo) one edit. Transform edits are reverted on the cached
+    meshes/features/mass by their inverse; other edits re-derive.
+    Returns (history entry, tree) or None if there is nothing to step to.
+    """
+    stepped = session.history.redo() if redo else session.history.undo()
+    if stepped is None:
+        return None
+    entry, session.shape = stepped
+    session.stack.reset(session.shape)
+    update = None
+    trsf = operation_trsf(entry.op, entry.params)
+    if trsf is not None:
+        update = ("transform", trsf if redo else trsf.Inverted())
+    return entry, apply_model_change(session, update)
+
+def settle_exact_transform(session):
+    """
+    Wait for a pending exact GTransform and make it the session's shape,
+    replacing the mesh preview. Anything that reads the shape's geometry
+    calls this first. Returns the new tree, or None if nothing was pending.
+    """
+    with session.exact_lock:
+        job = session.pending_exact
+        if job is None:
+            return None
+        try:
+            shape = job.result()
+        except Exception as e:
+            print(f"Background GTransform failed, transforming in-process: {e}")
+            shape = transform_shape_affine(session.shape, job.matrix)
+        session.pending_exact = None
+        session.shape = shape
+        if job.history_index is not None:
+            session.history.attach(job.history_index, shape)
+        return apply_model_change(session)
+
+def settle_exact_in_background(session):
+    def run():
+        try:
+            with session.lock:
+                settle_exact_transform(session)
+        except Exception as e:
+            print(f"Exact transform failed: {e}")
+    threading.Thread(target=run, daemon=True).start()
+
+def cancel_exact_transform(session):
+    with session.exact_lock:
+        if session.pending_exact is not None:
+            session.pending_exact.cancel()
+            session.pending_exact = None
+
+def publish_lod(session, level, state, version, job=None):
+    """
+    Make a freshly built LOD the session's viewer mesh, unless the model changed meanwhile,
+    and tell the job's client (a "lod" partial) to reload it.
+    Returns False for stale versions so the pyramid build stops.
+    """
+    with session.mesh_lock:
+        if version != session.version:
+            return False
+        state.write_glb(session.lod_paths[level], quantize=GLB_QUANTIZE)
+        session.mesh = state
+        publish_viewer_mesh(session)
+        session.lod_ready.append(level)
+        revision = session.mesh_revision
+        print(f"LOD '{level}' ready for session {session.id}, model version {version}")
+    if job is not None:
+        job.partial("lod", {"level": level, "version": version, "revision": revision})
+    return True
+
+def build_lods_in_background(session, shape, version, levels, job=None):
+    """
+    Build the finer LODs of 'version' in a thread. Call with session.lock held:
+    the levels are meshed on a detached copy, never on the live shape.
+    Returns a Future that is done when the last level was published (or dropped).
+    """
+    shape = detached_copy(shape)
+    done = Future()
+    def run():
+        try:
+            build_lod_pyramid(shape, lambda level, state: publish_lod(session, level, state, version, job),
+                              levels=levels)
+        except Exception as e:
+            print(f"LOD build failed: {e}")
+        finally:
+            done.set_result(None)
+    threading.Thread(target=run, daemon=True).start()
+    return done
 
 @app.on_event("startup")
 def load_models():
     if ENABLE_HEAVY:
-        global WHISPER_MODEL
-        print("Loading Whisper Model...")
-        WHISPER_MODEL = whisper.load_model("small")
-        print("Whisper Ready.")
+        # Spawn the OCC and Whisper workers now; each loads its state once
+        print("Starting worker pools (OCC, Whisper)...")
+        warm_up()
     else:
         print("Demo mode - heavy features disabled")
 
+@app.on_event("shutdown")
+def stop_workers():
+    workers.shutdown()
+
+@app.exception_handler(WorkerBusy)
+def worker_busy(request, exc: WorkerBusy):
+    """A full worker queue: tell the client to come back instead of queueing without bound."""
+    return JSONResponse(
+        status_code=503,
+        content={"status": "busy", "message": str(exc), "pool": exc.pool},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 @app.get("/")
 def health():
     return {
@@ -122,102 +420,577 @@ def health():
         "heavy_enabled": ENABLE_HEAVY
     }
 
+def save_upload(source, path):
+    with open(path, "wb") as buffer:
+        shutil.copyfileobj(source, buffer)
+
+def load_into_session(job, session, file_path, filename, parsed=False):
+    """
+    Make a STEP file the session's model (runs in the model pool; the
+    file was already parsed into the shape cache by a cad worker, 'parsed'
+    if that happened just now and was counted there).
+    Pushes the coarse mesh and the top of the tree as soon as they exist.
+    """
+    with session.lock:
+        cancel_exact_transform(session)
+        with job.stage("mesh"):
+            print(f"Loading {file_path} into session {session.id}...")
+            session.shape = load_step_shape(file_path, count=not parsed)
+            session.stack.reset(session.shape)
+            session.history.reset(session.shape, filename)
+            session.features = None
+            session.model_name = os.path.splitext(os.path.basename(filename))[0] or "model"
+            session.step_path = file_path
+            version = bump_model_version(session)
+
+            # Coarse LOD now, so the viewer can draw immediately;
+            # medium/fine follow in the background and replace it as they finish
+            build_lod_pyramid(session.shape, lambda level, state: publish_lod(session, level, state, version), levels=LOD_LEVELS[:1])
+            refining = build_lods_in_background(session, session.shape, version, LOD_LEVELS[1:], job)
+        job.partial("mesh", {"version": version, "revision": session.mesh_revision, "lod": list(session.lod_ready)})
+
+        # Build Tree
+        with job.stage("tree"):
+            tree = build_tree(session, file_path)
+        print(f"Built tree: {tree}")
+        job.partial("tree", tree)
+
+        response = {
+            "status": "success",
+            "message": "File loaded",
+            "tree": tree,
+            "lod": list(session.lod_ready),
+            "version": version,
+            "session": session.id
+        }
+    SESSIONS.enforce_budget(keep=session)
+    return response, refining
+
+async def upload_job(job, session, file_path, filename, digest):
+    # Parse the STEP in a worker process, then load the cached BRep into the session.
+    # Content seen before (same SHA-256) is already in the shape cache: no parse at all
+    remember_digest(file_path, digest)
+    with job.stage("transfer"):
+        parsed = not has_cached_shape(digest)
+        if parsed:
+            _, stats = await CAD_POOL.run(cache_step_file, file_path, digest)
+            record_stats(stats)
+    response, refining = await MODEL_POOL.run(load_into_session, job, session, file_path, filename, parsed)
+    # Stay open while medium/fine are meshed, so their "lod" events reach the client
+    with job.stage("refine"):
+        await asyncio.wrap_future(refining)
+    response["lod"] = list(session.lod_ready)
+    return response
+
+def start_upload_job(session, file_path, filename, digest):
+    job = create_job("upload", session.id)
+    return start_job(job, upload_job, session, file_path, filename, digest)
+
 @app.post("/upload")
-async def upload_step(file: UploadFile = File(...)):
+async def upload_step(file: UploadFile = File(...), session=Depends(current_session)):
+    """
+    Accept a whole STEP file (multipart) and load it as a job: returns the
+    job id at once, progress and partial results arrive on /ws/jobs/{job_id}.
+    Large files should use the resumable /api/uploads protocol instead.
+    """
     if not ENABLE_HEAVY:
         return {
             "status": "disabled",
             "message": "STEP processing disabled on demo server"
         }
-    
-    global CURRENT_SHAPE
-    
-    # Save uploaded file
-    file_path = os.path.join(CURRENT_ASSETS_DIR, file.filename)
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-        
-    try:
-        print(f"Loading {file_path}...")
-        CURRENT_SHAPE = load_step_shape(file_path)
-        
-        # Export to STL for Frontend
-        export_to_stl(CURRENT_SHAPE, CURRENT_STL_PATH)
-        
-        # Build Tree
-        tree = build_assembly_tree(CURRENT_SHAPE, file_path)
-        print(f"Built tree: {tree}")
-        
+
+    CAD_POOL.check()
+    MODEL_POOL.check()
+
+    # Store by content while hashing (the request body does not outlive the request)
+    digest, file_path = await IO_POOL.run(store_stream, file.file, session.id)
+    job = start_upload_job(session, file_path, file.filename, digest)
+    return {"status": "accepted", "job": job.id, "session": session.id, "digest": digest}
+
+def upload_error(e: UploadError, upload=None):
+    content = {"status": "error", "message": str(e)}
+    if upload is not None:
+        content["offset"] = upload.offset
+    return JSONResponse(status_code=e.status, content=content)
+
+@app.post("/api/uploads")
+def begin_upload(filename: str, size: int, sha256: str = None, session=Depends(current_session)):
+    """
+    Start a resumable upload. If the SHA-256 is given and this session has
+    sent that content before, nothing is transferred: the model load starts
+    at once.
+    Otherwise PUT the file to /api/uploads/{upload_id}?offset=N in chunks.
+    """
+    if not ENABLE_HEAVY:
         return {
-            "status": "success", 
-            "message": "File loaded",
-            "tree": tree
+            "status": "disabled",
+            "message": "STEP processing disabled on demo server"
         }
-    except Exception as e:
-        return {"status": "error", "message": str(e)}
+    stored = find_content(sha256, session.id) if sha256 else None
+    if stored:
+        MODEL_POOL.check()
+        job = start_upload_job(session, stored, filename, sha256.lower())
+        return {"status": "complete", "digest": sha256.lower(), "job": job.id, "session": session.id}
+    try:
+        upload = create_upload(os.path.basename(filename), size, sha256, owner=session.id)
+    except UploadError as e:
+        return upload_error(e)
+    return upload.describe()
+
+def owned_upload(upload_id, session):
+    upload = get_upload(upload_id)
+    if upload is None or session is None or upload.owner != session.id:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return upload
+
+@app.get("/api/uploads/{upload_id}")
+def get_upload_status(upload_id: str, session=Depends(current_session)):
+    """Bytes received so far; a client resumes from 'offset'."""
+    return owned_upload(upload_id, session).describe()
+
+@app.put("/api/uploads/{upload_id}")
+async def put_upload_chunk(upload_id: str, offset: int, request: Request, session=Depends(current_session)):
+    """
+    Append one chunk (the raw request body) at 'offset'. A wrong offset gets
+    409 with the offset to resume from. The chunk that completes the upload
+    starts the model load; a retry of it gets the same job id back.
+    """
+    upload = owned_upload(upload_id, session)
+    data = await request.body()
+    try:
+        await IO_POOL.run(upload.write, offset, data)
+    except UploadError as e:
+        return upload_error(e, upload)
+    if not upload.complete:
+        return upload.describe()
+
+    # No await between the check and the assignment, so one load per upload
+    if upload.job is None:
+        CAD_POOL.check()
+        MODEL_POOL.check()
+        upload.job = start_upload_job(session, upload.path, upload.filename, upload.digest).id
+    return dict(upload.describe(), session=session.id)
 
 @app.get("/api/model.stl")
-def get_model():
-    if os.path.exists(CURRENT_STL_PATH):
-        return FileResponse(CURRENT_STL_PATH)
+def get_model(request: Request, session=Depends(current_session)):
+    if session is not None and os.path.exists(session.stl_path):
+        return conditional(request, mesh_etag(session), lambda: FileResponse(session.stl_path))
     return {"error": "No model loaded"}
 
+@app.get("/api/model.glb")
+def get_model_glb(request: Request, lod: str = None, session=Depends(current_session)):
+    """
+    Current viewer mesh as GLB, or a specific level (coarse/medium/fine) once it is ready.
+    """
+    if session is None:
+        return {"error": "No model loaded"}
+    if lod:
+        if lod not in session.lod_ready:
+            return {"error": f"LOD '{lod}' not ready", "ready": list(session.lod_ready)}
+        return conditional(request, model_etag(session, lod),
+                           lambda: FileResponse(session.lod_paths[lod], media_type="model/gltf-binary"))
+    if os.path.exists(session.glb_path):
+        return conditional(request, mesh_etag(session),
+                           lambda: FileResponse(session.glb_path, media_type="model/gltf-binary"))
+    return {"error": "No model loaded"}
+
+@app.get("/api/lod")
+def get_lod_status(session=Depends(current_session)):
+    """Which detail levels exist for the current model version"""
+    if session is None:
+        return {"version": 0, "levels": list(LOD_LEVELS), "ready": []}
+    return {"version": session.version, "levels": list(LOD_LEVELS), "ready": list(session.lod_ready)}
+
+@app.get("/api/cache/stats")
+def get_cache_stats():
+    """Shape cache hit/miss counters and disk usage"""
+    return cache_stats()
+
+@app.get("/api/workers")
+def get_worker_stats():
+    """Queued/running jobs per worker pool and how many requests were turned away"""
+    return worker_stats()
+
+@app.get("/api/sessions")
+def get_sessions():
+    """Open sessions, their estimated memory and whether they are on disk"""
+    if SESSIONS is None:
+        return {"sessions": []}
+    return SESSIONS.describe()
+
+@app.get("/api/mass")
+def get_mass_breakdown(tolerance: float = 0.0, session=Depends(current_session)):
+    """
+    Per-part volume, area, centroid and inertia plus assembly totals.
+    tolerance: relative integration precision (0 = OCC default rule).
+    """
+    if not has_model(session):
+        return {"error": "No model loaded"}
+    with session.lock:
+        settle_exact_transform(session)
+        version = session.version
+        data = part_breakdown(session.mass.get(session.shape, version, tolerance))
+    data["version"] = version
+    return data
+
+@app.get("/api/tree/{node_id}/children")
+def get_tree_node_children(request: Request, node_id: str, offset: int = 0, limit: int = 200,
+                           session=Depends(current_session)):
+    """One page of a lazy tree node's children"""
+    if not has_model(session):
+        return {"error": "No model loaded"}
+    etag = model_etag(session, "tree")
+    tree = session.tree
+    try:
+        return conditional(request, etag, lambda: get_tree_children(tree, node_id, offset, min(limit, 1000)))
+    except KeyError:
+        return {"error": "Node not found"}
+
+@app.get("/api/tree.bin")
+def get_tree_binary(request: Request, session=Depends(current_session)):
+    """Whole assembly tree in the binary columnar format (see cad.columnar_tree)"""
+    if not has_model(session) or session.tree is None:
+        return {"error": "No model loaded"}
+    etag = model_etag(session, "tree")
+    tree = session.tree
+    return conditional(request, etag, lambda: Response(content=tree.to_bytes(), media_type="application/octet-stream"))
+
 @app.get("/api/component/{component_id}")
-def get_component(component_id: str):
-    """Get STL for a specific component"""
-    if not CURRENT_SHAPE:
+def get_component(request: Request, component_id: str, format: str = "stl", session=Depends(current_session)):
+    """
+    Get a specific component, sliced out of the mesh atlas.
+    format=stl returns binary STL; format=range returns the triangle range
+    of the component inside /api/model.stl / the atlas buffers.
+    """
+    if not has_model(session) or session.atlas is None:
         return {"error": "No model loaded"}
-    
-    # Create component STL path
-    component_stl_path = os.path.join(CURRENT_ASSETS_DIR, f"component_{component_id}.stl")
-    
-    # Export the specific component
-    from cad.export import export_component_to_stl
-    result = export_component_to_stl(component_id, component_stl_path)
-    
-    if result and os.path.exists(component_stl_path):
-        return FileResponse(component_stl_path)
-    
-    return {"error": "Component not found"}
+    etag = mesh_etag(session)
+    atlas = session.atlas
 
-@app.post("/api/voice")
-async def process_voice(file: UploadFile = File(...)):
-    if not ENABLE_HEAVY:
-        return {
-            "status": "disabled",
-            "message": "Voice disabled on demo server"
-        }
-    
-    global CURRENT_SHAPE, WHISPER_MODEL
-    
-    if CURRENT_SHAPE is None:
-        return {"status": "error", "message": "No model loaded."}
+    path = component_path(session.tree, component_id)
+    if path is None:
+        return {"error": "Component not found"}
 
-    # Initialize variables to avoid UnboundLocalError
-    user_text = ""
+    if format == "range":
+        rng = atlas.triangle_range(path)
+        if rng is None:
+            return {"error": "Component not found"}
+        return conditional(request, etag, lambda: {"first_triangle": rng[0], "triangle_count": rng[1]})
+
+    def build():
+        data = atlas.component_stl(path)
+        if data is None:
+            return {"error": "Component not found"}
+        return Response(content=data, media_type="model/stl")
+
+    return conditional(request, etag, build)
+
+def run_command(session, cmd_data, user_text, defer_exact=False):
+    """
+    Execute one interpreted voice command against the session's shape.
+    Returns {"response", "modified", "update", "history_op"}; the caller
+    records history and refreshes derived state once per utterance.
+    defer_exact: a non-uniform scale may leave its exact BRep to the background.
+    """
+    command = cmd_data.get("command", "UNKNOWN")
     response_text = ""
     modified = False
+    mesh_update = None
+    history_op = None
+
+    if command == "SCALE":
+        factor = cmd_data.get("factor", 1.0)
+        trsf = scale_trsf(factor)
+        session.shape = session.stack.push(trsf)
+        mesh_update = ("transform", trsf)
+        history_op = ("scale", {"factor": factor})
+        modified = True
+        response_text = f"I've scaled the model by a factor of {factor}."
+
+    elif command == "MOVE":
+        dx = cmd_data.get("dx", 0.0)
+        dy = cmd_data.get("dy", 0.0)
+        dz = cmd_data.get("dz", 0.0)
+        trsf = translation_trsf(dx, dy, dz)
+        session.shape = session.stack.push(trsf)
+        mesh_update = ("transform", trsf)
+        history_op = ("move", {"dx": dx, "dy": dy, "dz": dz})
+        modified = True
+        response_text = f"I've moved the model by ({dx}, {dy}, {dz})."
+
+    elif command == "DELETE":
+        idx = cmd_data.get("index", -1)
+        session.shape, deleted = delete_solid_indexed(session.shape, idx, topology=session.topology_index())
+        if deleted is not None:
+            mesh_update = ("delete", deleted)
+        history_op = ("delete", {"index": idx})
+        modified = True
+        response_text = "I've removed that part for you."
+
+    elif command == "RESIZE_FEATURE":
+         # Features are numbered per type ("hole 3" -> id "hole-3", index 2)
+         ftype = cmd_data.get("feature_type", "hole")
+         idx = cmd_data.get("index", 0)
+         table = feature_table(session)
+         kind = "boss" if ftype in ("boss", "cylinder", "pin", "shaft") else "hole"
+         row = table.lookup(kind, idx + 1)
+
+         if row is None:
+             # Never fall back to another feature: resizing the wrong one is worse than nothing
+             if len(table.rows_of_kind(KIND_NAMES.index(kind))):
+                 response_text = f"No {ftype} {idx + 1}."
+             else:
+                 response_text = f"No {ftype}s found."
+         else:
+             feature_id = table.ids[row]
+             face_row = int(table.faces(row)[0])
+
+             if "new_radius" in cmd_data:
+                 session.shape, owner = resize_feature_local(session.shape, table, row, cmd_data["new_radius"])
+                 if owner is not None:
+                     mesh_update = ("solids", [owner])
+                 history_op = ("resize_feature", {"face": face_row, "radius": cmd_data["new_radius"]})
+                 response_text = f"Resized {feature_id.replace('-', ' ')} to radius {cmd_data['new_radius']}."
+                 modified = True
+             elif "scale" in cmd_data:
+                 curr_r = float(table.features["radius"][row])
+                 new_r = curr_r * cmd_data["scale"]
+                 session.shape, owner = resize_feature_local(session.shape, table, row, new_r)
+                 if owner is not None:
+                     mesh_update = ("solids", [owner])
+                 history_op = ("resize_feature", {"face": face_row, "radius": new_r})
+                 response_text = f"Resized {feature_id.replace('-', ' ')} by scale {cmd_data['scale']}."
+                 modified = True
+
+    elif command == "ROTATE":
+        axis = cmd_data.get("axis", "Z")
+        angle = cmd_data.get("angle_degrees", 90)
+        trsf = rotation_trsf(axis, angle)
+        session.shape = session.stack.push(trsf)
+        mesh_update = ("transform", trsf)
+        history_op = ("rotate", {"axis": axis, "angle": angle})
+        modified = True
+        response_text = f"Done. I've rotated the model {angle} degrees around the {axis} axis."
+
+    elif command == "SCALE_NON_UNIFORM":
+        fx, fy, fz = non_uniform_factors(cmd_data)
+        if min(abs(fx), abs(fy), abs(fz)) < 1e-9:
+            raise ValueError("Scale factors must be non-zero.")
+        mesh_update = apply_affine_edit(session, scale_matrix(fx, fy, fz), defer_exact)
+        history_op = ("scale_non_uniform", {"fx": fx, "fy": fy, "fz": fz})
+        if "axis" in cmd_data:
+            response_text = f"Scaled {cmd_data['axis'].upper()} axis by {cmd_data.get('axis_factor', 1.0)}."
+        else:
+            response_text = f"Scaled non-uniformly ({fx}, {fy}, {fz})."
+        modified = True
+
+    elif command == "GET_MASS_PROPS":
+        tolerance = float(cmd_data.get("tolerance", VOICE_MASS_TOLERANCE))
+        props = combine(session.mass.get(session.shape, session.version, tolerance))
+        vol = props["volume"]
+        area = props["area"]
+        response_text = f"The model's volume is {vol:.2f} cubic units, and the surface area is {area:.2f} square units."
+
+    elif command == "COLOR":
+         # This requires frontend support (metadata per ID).
+         # For now, we can't change color of STEP geometry directly in backend without Metadata wrapper.
+         # We will just respond.
+         col = cmd_data.get("color", "requested color")
+         response_text = f"Color change to {col} is simpler in the UI, but I've noted it."
+         # Logic to actually inject color into GLTF/STL export would be needed here.
+
+    elif command == "QUESTION" or command == "UNKNOWN":
+        full_summary = get_cad_summary(session.shape, session.version, session.summary_cache,
+                                       features=feature_table(session), topology=session.topology_index())
+        response_text = answer_question(full_summary, user_text)
+
+    elif command == "UNSURE":
+         response_text = "I didn't quite catch that. Could you please say it again?"
+
+    return {"response": response_text, "modified": modified, "update": mesh_update, "history_op": history_op}
+
+def apply_affine_edit(session, matrix, defer_exact=False):
+    """
+    Apply an affine matrix to the session's shape and return the mesh update.
+    Uniform matrices (including per-axis scales that are really uniform)
+    take the gp_Trsf path through the transform stack. Non-uniform ones need
+    a GTransform: with 'defer_exact' it runs in the background and the update
+    is a NumPy preview of the cached mesh, otherwise it runs here.
+    """
+    if is_uniform_matrix(matrix):
+        trsf = affine_trsf(matrix)
+        session.shape = session.stack.push(trsf)
+        return ("transform", trsf)
+    if defer_exact:
+        session.pending_exact = ExactTransform(session.shape, matrix)
+        return ("affine", np.asarray(matrix, dtype=np.float64)[:3])
+    session.shape = transform_shape_affine(session.shape, matrix)
+    return None
+
+def run_affine(session, matrix, commands, defer_exact=False):
+    """
+    Apply a fused run of affine commands (see cad.command_fusion) in one
+    geometry pass: a location/one copy when uniform, one GTransform otherwise.
+    """
+    update = apply_affine_edit(session, matrix, defer_exact)
+    parts = [describe_command(cmd) for cmd in commands]
+    return {
+        "response": f"Done. I've {', '.join(parts[:-1])} and {parts[-1]}.",
+        "modified": True,
+        "update": update,
+        "history_op": ("affine", {"matrix": np.asarray(matrix)[:3].tolist()}),
+    }
+
+def is_non_uniform_step(step):
+    """True if a fused step (see cad.command_fusion) needs a GTransform."""
+    if step[0] == "affine":
+        return not is_uniform_matrix(step[1])
+    cmd = step[1]
+    return (cmd.get("command") == "SCALE_NON_UNIFORM"
+            and not is_uniform_matrix(scale_matrix(*non_uniform_factors(cmd))))
+
+# Commands that read version-keyed caches (mass properties, AI summary)
+VERSIONED_READS = ("GET_MASS_PROPS", "QUESTION", "UNKNOWN")
+
+def merge_updates(first, second):
+    """Mesh update equivalent to 'first' followed by 'second'."""
+    if first and second and first[0] == "transform" and second[0] == "transform":
+        return ("transform", second[1].Multiplied(first[1]))
+    if first and second and first[0] == "solids" and second[0] == "solids":
+        return ("solids", sorted(set(first[1]) | set(second[1])))
+    return None
+
+def run_utterance(job, session, commands, user_text):
+    """
+    Run one utterance's commands against the session's model (runs in the
+    model pool). Returns {"response", "modified", "tree", "exports"}.
+    """
+    modified = False
+    mesh_update = None
+    history_changed = False
     tree = None
-    cmd_data = {}
+    export_jobs = []
+
+    # 4. Run them in order; adjacent affine commands are fused into one transform.
+    # The summary for Q&A context is built lazily (see the QUESTION branch)
+    responses = []
+    with session.lock:
+        with job.stage("modify"):
+            try:
+                # The previous utterance's exact GTransform, if still running, is needed now
+                settle_exact_transform(session)
+                steps = fuse_commands(commands)
+                for i, step in enumerate(steps):
+                    # Only the last step can leave its exact geometry to the background:
+                    # nothing after it in this utterance needs the BRep
+                    defer_exact = i == len(steps) - 1 and is_non_uniform_step(step)
+                    if defer_exact and modified:
+                        # The preview goes on top of a settled mesh
+                        tree = apply_model_change(session, mesh_update)
+                        modified, mesh_update = False, None
+                    if modified and step[0] == "command" and step[1].get("command") in VERSIONED_READS:
+                        # The mass and summary caches are keyed by model version:
+                        # settle this utterance's earlier edits so the version matches the shape
+                        tree = apply_model_change(session, mesh_update)
+                        modified, mesh_update = False, None
+                    if step[0] == "affine":
+                        result = run_affine(session, step[1], step[2], defer_exact)
+                    elif step[1].get("command") == "SAVE":
+                        # Export what the user has heard so far, including this utterance's edits
+                        if modified:
+                            tree = apply_model_change(session, mesh_update)
+                            modified, mesh_update = False, None
+                        export = export_current_model(session, bool(step[1].get("compress", False)))
+                        export_jobs.append(export.id)
+                        responses.append("I'm saving the model in the background. It will be ready to download in a moment.")
+                        continue
+                    elif step[1].get("command") in ("UNDO", "REDO"):
+                        # Settle earlier edits of this utterance so history has them
+                        if modified:
+                            tree = apply_model_change(session, mesh_update)
+                            modified, mesh_update = False, None
+                        redo = step[1]["command"] == "REDO"
+                        stepped = step_history(session, redo=redo)
+                        if stepped is None:
+                            responses.append("There is nothing to redo." if redo else "There is nothing to undo.")
+                        else:
+                            entry, tree = stepped
+                            responses.append(f"{'Redid' if redo else 'Undid'} the last {entry.op.replace('_', ' ')}.")
+                            history_changed = True
+                        continue
+                    else:
+                        result = run_command(session, step[1], user_text, defer_exact)
+
+                    responses.append(result["response"])
+                    if result["modified"]:
+                        if result["history_op"]:
+                            pending = session.pending_exact if result["update"] and result["update"][0] == "affine" else None
+                            index = session.history.record(*result["history_op"], None if pending else session.shape)
+                            if pending:
+                                pending.history_index = index
+                        mesh_update = merge_updates(mesh_update, result["update"]) if modified else result["update"]
+                        modified = True
+
+            except Exception as e:
+                print(f"Logic Error: {e}")
+                responses.append(f"Error: {str(e)}")
+
+        # 5. Re-export once per utterance if modified
+        with job.stage("export"):
+            if modified:
+                tree = apply_model_change(session, mesh_update)
+            if session.pending_exact is not None:
+                # The viewer has the preview; swap in the exact geometry when it lands
+                settle_exact_in_background(session)
+    if modified or history_changed:
+        job.partial("mesh", {"version": session.version, "revision": session.mesh_revision,
+                             "lod": list(session.lod_ready)})
+    if tree is not None:
+        job.partial("tree", tree)
+    SESSIONS.enforce_budget(keep=session)
+
+    return {
+        "response": " ".join(r for r in responses if r),
+        "modified": modified or history_changed,
+        "tree": tree,
+        "exports": export_jobs,
+        "version": session.version,
+        "revision": session.mesh_revision,
+    }
+
+def play_response(text):
+    """Synthesize 'text' and start the player process (runs in the io pool)."""
+    global CURRENT_AUDIO_PROCESS
+    try:
+        # Generate file
+        audio_file = speak(text)
+        if audio_file:
+             # Spawn player
+             CURRENT_AUDIO_PROCESS = subprocess.Popen([sys.executable, "voice/player.py", audio_file])
+    except Exception as e:
+        print(f"TTS Error: {e}")
+
+async def voice_job(job, session, audio_path):
+    global LAST_SPOKEN_TEXT
+
+    user_text = ""
+    response_text = ""
+    outcome = {"modified": False, "tree": None, "exports": [], "version": session.version,
+               "revision": session.mesh_revision}
 
     try:
-            # 1. Save Audio
-        audio_path = os.path.join(CURRENT_ASSETS_DIR, "voice_cmd.wav")
-        with open(audio_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
         # Stop previous speech immediately when new input is detected
-        stop_speaking()
-    
-        # 2. Transcribe
-        result = WHISPER_MODEL.transcribe(
-            audio_path, 
-            language="en", 
-            initial_prompt="CAD design, engineering, 3D modeling, scale, rotate, extrude, feature, radius, diameter"
-        )
-        user_text = result["text"].strip()
+        await IO_POOL.run(stop_speaking)
+
+        # 2. Transcribe (in a Whisper worker process)
+        with job.stage("transcribe"):
+            try:
+                user_text = await ASR_POOL.run(transcribe, audio_path)
+            finally:
+                os.remove(audio_path)
         print(f"User said: {user_text}")
-        
+        job.partial("transcription", user_text)
+
         # 2.5 Echo Cancellation
         if LAST_SPOKEN_TEXT:
             similarity = difflib.SequenceMatcher(None, user_text.lower(), LAST_SPOKEN_TEXT.lower()).ratio()
@@ -230,162 +1003,205 @@ async def process_voice(file: UploadFile = File(...)):
                     "modified": False,
                     "tree": None
                 }
-    
-        # 3. Interpret Command
-        cmd_data = interpret_command(user_text)
-        command = cmd_data.get("command", "UNKNOWN")
-        print(f"Command: {command}")
-        
-        response_text = ""
-        modified = False
-        
-        # 4. Generate Summary for Context (if needed for Q&A)
-        # We generate "on demand" or simple cache? Let's regen for now.
-        basic_sum = create_cad_summary(CURRENT_SHAPE)
-        feat_sum = create_feature_summary(CURRENT_SHAPE)
-        full_summary = basic_sum + "\n\nFEATURES:\n" + feat_sum
-        
-        try:
-            if command == "SCALE":
-                factor = cmd_data.get("factor", 1.0)
-                CURRENT_SHAPE = scale_shape(CURRENT_SHAPE, factor)
-                modified = True
-                response_text = f"I've scaled the model by a factor of {factor}."
-                
-            elif command == "MOVE":
-                dx = cmd_data.get("dx", 0.0)
-                dy = cmd_data.get("dy", 0.0)
-                dz = cmd_data.get("dz", 0.0)
-                CURRENT_SHAPE = translate_shape(CURRENT_SHAPE, dx, dy, dz)
-                modified = True
-                response_text = f"I've moved the model by ({dx}, {dy}, {dz})."
-                
-            elif command == "DELETE":
-                idx = cmd_data.get("index", -1)
-                CURRENT_SHAPE = delete_solid(CURRENT_SHAPE, idx)
-                modified = True
-                response_text = "I've removed that part for you."
-                
-            elif command == "RESIZE_FEATURE":
-                 # Simplified Logic from main.py
-                 ftype = cmd_data.get("feature_type", "hole")
-                 idx = cmd_data.get("index", 0)
-                 cyls = find_cylindrical_faces(CURRENT_SHAPE)
-                 
-                 if not cyls:
-                     response_text = f"No {ftype}s found."
-                 else:
-                     if idx >= len(cyls): idx = 0
-                     target = cyls[idx]['face']
-                     
-                     if "new_radius" in cmd_data:
-                         CURRENT_SHAPE = resize_cylindrical_feature(CURRENT_SHAPE, target, cmd_data["new_radius"])
-                         response_text = f"Resized {ftype} to radius {cmd_data['new_radius']}."
-                         modified = True
-                     elif "scale" in cmd_data:
-                         # recalc logic
-                         curr_r = cyls[idx]['radius']
-                         new_r = curr_r * cmd_data["scale"]
-                         CURRENT_SHAPE = resize_cylindrical_feature(CURRENT_SHAPE, target, new_r)
-                         response_text = f"Resized {ftype} by scale {cmd_data['scale']}."
-                         modified = True
-            
-            elif command == "ROTATE":
-                axis = cmd_data.get("axis", "Z")
-                angle = cmd_data.get("angle_degrees", 90)
-                CURRENT_SHAPE = rotate_shape(CURRENT_SHAPE, axis, angle)
-                modified = True
-                response_text = f"Done. I've rotated the model {angle} degrees around the {axis} axis."
-                
-            elif command == "SCALE_NON_UNIFORM":
-                # Check if it's axis specific scaling or direct xyz
-                if "axis" in cmd_data:
-                    axis = cmd_data["axis"].upper()
-                    val = cmd_data.get("axis_factor", 1.0)
-                    fx, fy, fz = 1.0, 1.0, 1.0
-                    if axis == "X": fx = val
-                    elif axis == "Y": fy = val
-                    elif axis == "Z": fz = val
-                    CURRENT_SHAPE = scale_shape_non_uniform(CURRENT_SHAPE, fx, fy, fz)
-                    response_text = f"Scaled {axis} axis by {val}."
-                else:
-                    fx = cmd_data.get("factor_x", 1.0)
-                    fy = cmd_data.get("factor_y", 1.0)
-                    fz = cmd_data.get("factor_z", 1.0)
-                    CURRENT_SHAPE = scale_shape_non_uniform(CURRENT_SHAPE, fx, fy, fz)
-                    response_text = f"Scaled non-uniformly ({fx}, {fy}, {fz})."
-                modified = True
-                
-            elif command == "GET_MASS_PROPS":
-                props = get_mass_properties(CURRENT_SHAPE)
-                vol = props["volume"]
-                area = props["area"]
-                response_text = f"The model's volume is {vol:.2f} cubic units, and the surface area is {area:.2f} square units."
-                
-            elif command == "COLOR":
-                 # This requires frontend support (metadata per ID).
-                 # For now, we can't change color of STEP geometry directly in backend without Metadata wrapper.
-                 # We will just respond.
-                 col = cmd_data.get("color", "requested color")
-                 response_text = f"Color change to {col} is simpler in the UI, but I've noted it."
-                 # Logic to actually inject color into GLTF/STL export would be needed here.
-            
-            elif command == "QUESTION" or command == "UNKNOWN":
-                response_text = answer_question(full_summary, user_text)
-
-            elif command == "UNSURE":
-                 response_text = "I didn't quite catch that. Could you please say it again?"
-                
-        except Exception as e:
-            print(f"Logic Error: {e}")
-            response_text = f"Error: {str(e)}"
-            
+
+        # 3. Interpret Command (one utterance may hold several commands)
+        with job.stage("interpret"):
+            cmd_data = await IO_POOL.run(interpret_command, user_text)
+        commands = cmd_data.get("commands") or [cmd_data]
+        print(f"Commands: {[c.get('command', 'UNKNOWN') for c in commands]}")
+        job.partial("commands", [c.get("command", "UNKNOWN") for c in commands])
+
+        # 4-5. Edit the model off the event loop
+        outcome = await MODEL_POOL.run(run_utterance, job, session, commands, user_text)
+        response_text = outcome["response"]
+
+    except WorkerBusy:
+        raise
     except Exception as e:
         print(f"Server Error: {e}")
         response_text = f"System Error: {str(e)}"
         # Ensure user_text is not empty if it failed before transcription
         if not user_text: user_text = "(Audio Processing Failed)"
 
-    # 5. Re-export if modified
-    tree = None
-    if modified:
-        export_to_stl(CURRENT_SHAPE, CURRENT_STL_PATH)
-        tree = build_assembly_tree(CURRENT_SHAPE)
-
     # 6. Speak Response (Async Subprocess)
     if response_text:
         LAST_SPOKEN_TEXT = response_text
         try:
-            # Generate file
-            audio_file = speak(response_text)
-            if audio_file:
-                 # Spawn player
-                 CURRENT_AUDIO_PROCESS = subprocess.Popen([sys.executable, "voice/player.py", audio_file])
-        except Exception as e:
+            IO_POOL.submit(play_response, response_text)
+        except WorkerBusy as e:
             print(f"TTS Error: {e}")
-        
+
     return {
         "status": "success",
         "transcription": user_text,
         "response": response_text,
-        "modified": modified,
-        "tree": tree
+        "modified": outcome["modified"],
+        "tree": outcome["tree"],
+        "exports": outcome["exports"],
+        "version": outcome["version"],
+        "revision": outcome["revision"]
     }
 
+@app.post("/api/voice")
+async def process_voice(file: UploadFile = File(...), session=Depends(current_session)):
+    """
+    Accept a recorded voice command as a job: returns the job id at once,
+    the transcription, edits and final response arrive on /ws/jobs/{job_id}.
+    """
+    if not ENABLE_HEAVY:
+        return {
+            "status": "disabled",
+            "message": "Voice disabled on demo server"
+        }
+
+    if not has_model(session):
+        return {"status": "error", "message": "No model loaded."}
+
+    ASR_POOL.check()
+    job = create_job("voice", session.id)
+
+    # 1. Save Audio
+    audio_path = os.path.join(session.directory, f"voice_{job.id}.wav")
+    try:
+        with job.stage("read"):
+            await IO_POOL.run(save_upload, file.file, audio_path)
+    except Exception as e:
+        job.fail(str(e))
+        raise
+
+    start_job(job, voice_job, session, audio_path)
+    return {"status": "accepted", "job": job.id, "session": session.id}
+
+@app.get("/api/jobs/{job_id}")
+def get_job_status(job_id: str, session=Depends(current_session)):
+    """Stage timings and, once done, the result of an upload or voice job"""
+    job = get_job(job_id)
+    if job is None or session is None or job.owner != session.id:
+        return {"error": "Job not found"}
+    return job.describe()
+
+@app.websocket("/ws/jobs/{job_id}")
+async def job_events(websocket: WebSocket, job_id: str, session: str = None):
+    """
+    Push a job's events: every event so far, then new ones as they happen,
+    until the job is done. Browsers cannot set headers on a WebSocket, so
+    the session comes from ?session=.
+    """
+    await websocket.accept()
+    job = get_job(job_id)
+    if job is None or job.owner != (session or DEFAULT_SESSION):
+        await websocket.send_json({"type": "error", "message": "Job not found"})
+        await websocket.close()
+        return
+    try:
+        async for event in job.stream():
+            await websocket.send_json(event)
+    except WebSocketDisconnect:
+        return
+    await websocket.close()
+
+@app.post("/api/undo")
+def undo_edit(session=Depends(current_session)):
+    if not has_model(session):
+        return {"error": "No model loaded"}
+    with session.lock:
+        settle_exact_transform(session)
+        stepped = step_history(session, redo=False)
+        if stepped is None:
+            return {"status": "unchanged", "history": session.history.describe()}
+        return {"status": "success", "undone": stepped[0].op, "version": session.version,
+                "tree": stepped[1], "history": session.history.describe()}
+
+@app.post("/api/redo")
+def redo_edit(session=Depends(current_session)):
+    if not has_model(session):
+        return {"error": "No model loaded"}
+    with session.lock:
+        settle_exact_transform(session)
+        stepped = step_history(session, redo=True)
+        if stepped is None:
+            return {"status": "unchanged", "history": session.history.describe()}
+        return {"status": "success", "redone": stepped[0].op, "version": session.version,
+                "tree": stepped[1], "history": session.history.describe()}
+
+def export_current_model(session, compress=False):
+    """Start (or reuse) a background STEP export of the session's current model version."""
+    with session.lock:
+        settle_exact_transform(session)
+        return start_export(session.shape, session.version, f"{session.model_name}_modified",
+                            compress, owner=session.id)
+
+@app.post("/api/export")
+def request_export(gzip: bool = False, session=Depends(current_session)):
+    """Start a background STEP export; poll /api/export/{job_id} for progress."""
+    if not has_model(session):
+        return {"error": "No model loaded"}
+    return export_current_model(session, gzip).describe()
+
+@app.get("/api/export/{job_id}")
+def get_export_status(job_id: str, session=Depends(current_session)):
+    job = get_export_job(job_id)
+    if job is None or session is None or job.owner != session.id:
+        return {"error": "Export not found"}
+    return job.describe()
+
+@app.get("/api/export.step")
+def download_export(gzip: bool = False, job: str = None, session=Depends(current_session)):
+    """
+    Stream a STEP export of the current model (or of a finished job) in
+    chunks. Waits for the export if it is still running; the event loop
+    is not blocked meanwhile.
+    """
+    if job:
+        export = get_export_job(job)
+        if export is None or session is None or export.owner != session.id:
+            return {"error": "Export not found"}
+    else:
+        if not has_model(session):
+            return {"error": "No model loaded"}
+        export = export_current_model(session, gzip)
+    if not export.wait():
+        return {"error": export.error or "Export failed", "job": export.id}
+    return StreamingResponse(
+        export.iter_bytes(),
+        media_type=export.media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{export.filename}"',
+            "Content-Length": str(export.size),
+        },
+    )
+
+@app.get("/api/history")
+def get_history(session=Depends(current_session)):
+    if not has_model(session):
+        return {"error": "No model loaded"}
+    return session.history.describe()
+
 @app.get("/api/hasse")
-def get_hasse_diagram():
-    global CURRENT_SHAPE
-    from cad.hasse import generate_hasse_data
-    
-    if CURRENT_SHAPE is None:
+def get_hasse_diagram(request: Request, source: str = "topology", session=Depends(current_session)):
+    """
+    Hasse diagram of the model. source=topology: the solid/shell/face tree;
+    source=products: the STEP product structure, where shared sub-assemblies
+    make it a DAG (falls back to the topology for files without products).
+    """
+    from cad.hasse import get_hasse_data, step_product_hasse_data
+
+    if not has_model(session):
         # Return empty structure or dummy
         return {
-            "nodes": [{"id": "nodata", "data": {"label": "No Model Loaded"}, "position": {"x": 0, "y": 0}}], 
+            "nodes": [{"id": "nodata", "data": {"label": "No Model Loaded"}, "position": {"x": 0, "y": 0}}],
             "edges": []
         }
     else:
-        # Build graph from assembly tree
-        # Re-build tree to ensure fresh data
-        tree_json = build_assembly_tree(CURRENT_SHAPE)
-        data = generate_hasse_data(tree_json)
-        return data
+        # Build graph from the session's assembly tree; cached until the model version changes
+        def build():
+            with session.lock:
+                if source == "products" and session.step_path:
+                    data = get_hasse_data(session.step_path, session.version, session.product_hasse_cache,
+                                          build=step_product_hasse_data)
+                    if data is not None:
+                        return data
+                if session.tree is None:
+                    session.tree = build_tree_columns(session.shape, topology=session.topology_index())
+                return get_hasse_data(session.tree, session.version, session.hasse_cache)
+        return conditional(request, model_etag(session, "hasse", source), build)
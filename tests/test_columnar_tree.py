@@ -0,0 +1,92 @@
+# tests/test_columnar_tree.py
+# Columnar tree ids, paging and the binary wire format (no OCC needed)
+
+import numpy as np
+import pytest
+
+from cad.columnar_tree import ColumnarTree, KIND_FACE
+
+
+def sample_tree():
+    """
+    root
+      solid-1 -> shell-3 -> faces 6, 7, 8
+      solid-2 -> shell-4 -> face 9
+              -> shell-5 -> faces 10, 11
+    Rows 9 and 10 are the same face (shape index 4) shared by two shells.
+    """
+    n = 12
+    parent = np.array([-1, 0, 0, 1, 2, 2, 3, 3, 3, 4, 5, 5], dtype=np.int32)
+    kind = np.array([0, 1, 1, 2, 2, 2, 3, 3, 3, 3, 3, 3], dtype=np.uint8)
+    shape_index = np.array([0, 1, 2, 1, 2, 3, 1, 2, 3, 4, 4, 5], dtype=np.int32)
+    child_start = np.array([1, 3, 4, 6, 9, 10] + [n] * 6, dtype=np.int32)
+    child_count = np.array([2, 1, 2, 3, 1, 2] + [0] * 6, dtype=np.int32)
+    names = "Robot-EBOM".encode("utf-8")
+    name_offset = np.full(n, -1, dtype=np.int32)
+    name_length = np.zeros(n, dtype=np.int32)
+    name_offset[0], name_length[0] = 0, len(names)
+    return ColumnarTree(parent, kind, name_offset, name_length, shape_index,
+                        child_start, child_count, names)
+
+
+def test_ids_are_unique_per_row_even_for_shared_faces():
+    tree = sample_tree()
+    ids = [tree.node_id(row) for row in range(len(tree))]
+    assert len(set(ids)) == len(ids)
+    assert ids[:3] == ["root", "solid-1", "solid-2"]
+    assert ids[9] == "face-9" and ids[10] == "face-10"
+    assert all(tree.row_of(node_id) == row for row, node_id in enumerate(ids))
+
+
+@pytest.mark.parametrize("node_id", ["shell-9", "face-12", "face-", "edge-3", "solid-x", "face-0"])
+def test_unknown_ids_raise_key_error(node_id):
+    with pytest.raises(KeyError):
+        sample_tree().row_of(node_id)
+
+
+def test_generated_names_follow_sibling_position():
+    tree = sample_tree()
+    assert tree.name(0) == "Robot-EBOM"
+    assert [tree.name(r) for r in (1, 2, 4, 5, 10, 11)] == [
+        "Solid 1", "Solid 2", "Shell 1", "Shell 2", "Face 1", "Face 2"]
+    assert tree.node_type(0) == "Assembly" and tree.node_type(6) == "Face"
+
+
+def test_page_of_children():
+    tree = sample_tree()
+    page = tree.page(tree.row_of("shell-3"), offset=1, limit=5)
+    assert page["node_id"] == "shell-3"
+    assert page["total"] == 3
+    assert [child["id"] for child in page["children"]] == ["face-7", "face-8"]
+    assert page["children"][0]["has_children"] is False
+
+    page = tree.page(0, offset=0, limit=1)
+    assert [(c["id"], c["child_count"]) for c in page["children"]] == [("solid-1", 1)]
+    assert tree.page(0, offset=10, limit=5)["children"] == []
+
+
+def test_lazy_dict_stops_at_depth_and_page_size():
+    node = sample_tree().to_dict(depth=1, lazy=True, page_size=1)
+    assert node["child_count"] == 2
+    assert [child["id"] for child in node["children"]] == ["solid-1"]
+    assert node["children"][0]["children"] == []
+
+
+def test_traversal_helpers():
+    tree = sample_tree()
+    assert tree.descendants(2).tolist() == [4, 5, 9, 10, 11]
+    assert tree.depths().tolist() == [0, 1, 1, 2, 2, 2, 3, 3, 3, 3, 3, 3]
+    assert tree.rows_of_kind(KIND_FACE).tolist() == list(range(6, 12))
+    assert tree.atlas_path(10) == ("face", 1, 1)
+    assert tree.atlas_path(5) == ("shell", 1, 1)
+
+
+def test_binary_round_trip():
+    tree = sample_tree()
+    copy = ColumnarTree.from_bytes(tree.to_bytes())
+    for column in ("parent", "kind", "name_offset", "name_length", "shape_index", "child_start", "child_count"):
+        assert np.array_equal(getattr(copy, column), getattr(tree, column))
+    assert copy.names == tree.names
+    assert copy.to_dict() == tree.to_dict()
+    with pytest.raises(ValueError):
+        ColumnarTree.from_bytes(b"XXXX" + tree.to_bytes()[4:])
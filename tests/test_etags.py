@@ -0,0 +1,38 @@
+# tests/test_etags.py
+# ETags of versioned model views and If-None-Match matching
+
+from types import SimpleNamespace
+
+import etags
+from etags import model_etag, mesh_etag, etag_matches
+
+
+def session(version=3, mesh_revision=7, session_id="abc"):
+    return SimpleNamespace(id=session_id, version=version, mesh_revision=mesh_revision)
+
+
+def test_etag_names_epoch_session_version_and_view():
+    tag = model_etag(session(), "tree")
+    assert tag == f'"{etags.ETAG_EPOCH}-abc-v3-tree"'
+    assert model_etag(session(), "hasse", "products") != model_etag(session(), "hasse", "topology")
+
+
+def test_etag_changes_with_what_the_view_depends_on():
+    base = session()
+    assert model_etag(session(version=4), "tree") != model_etag(base, "tree")
+    assert model_etag(session(session_id="xyz"), "tree") != model_etag(base, "tree")
+    # A finer LOD rewrites the mesh without a new model version
+    assert mesh_etag(session(mesh_revision=8)) != mesh_etag(base)
+    assert model_etag(session(mesh_revision=8), "tree") == model_etag(base, "tree")
+
+
+def test_if_none_match():
+    tag = mesh_etag(session())
+    assert etag_matches(tag, tag)
+    assert etag_matches(f"W/{tag}", tag)
+    assert etag_matches(f'"other", {tag}', tag)
+    assert etag_matches("*", tag)
+    assert not etag_matches('"other"', tag)
+    assert not etag_matches("", tag)
+    assert not etag_matches(None, tag)
+    assert not etag_matches(mesh_etag(session(mesh_revision=8)), tag)
@@ -0,0 +1,78 @@
+# tests/test_hasse.py
+# Transitive reduction of product DAGs and layer ranks
+
+import pytest
+
+from cad.hasse import reduce_dag, layer_ranks, generate_hasse_data, generate_product_hasse_data, step_product_hasse_data
+
+
+def test_tree_input_is_returned_unchanged():
+    edges = [(1, 0), (2, 0), (3, 1)]
+    reduced, order = reduce_dag(4, edges)
+    assert reduced == edges
+    assert order.index(3) < order.index(1) < order.index(0)
+
+
+def test_redundant_edges_through_shared_parts_are_removed():
+    # 3 is used by 1 and 2 and directly by 0, which already contains 1 and 2
+    edges = [(1, 0), (2, 0), (3, 0), (3, 1), (3, 2)]
+    reduced, order = reduce_dag(4, edges)
+    assert sorted(reduced) == [(1, 0), (2, 0), (3, 1), (3, 2)]
+    assert layer_ranks(4, reduced, order) == [2, 1, 1, 0]
+
+
+def test_long_chains_keep_only_covering_edges():
+    n = 70  # past 64, so the ancestor bitsets are multi-word integers
+    edges = [(i + 1, i) for i in range(n - 1)] + [(n - 1, 0), (n - 1, 10), (40, 3)]
+    reduced, order = reduce_dag(n, edges)
+    assert sorted(reduced) == [(i + 1, i) for i in range(n - 1)]
+    assert layer_ranks(n, reduced, order)[0] == n - 1
+
+
+def test_cycles_are_rejected():
+    with pytest.raises(ValueError):
+        reduce_dag(3, [(1, 0), (2, 1), (0, 2)])
+
+
+def test_nested_tree_with_repeated_ids_becomes_one_node():
+    bolt = {"id": "bolt", "name": "Bolt", "type": "Part", "children": []}
+    tree = {"id": "top", "name": "Top", "type": "Assembly", "children": [
+        {"id": "arm", "name": "Arm", "type": "Assembly", "children": [bolt]},
+        {"id": "base", "name": "Base", "type": "Assembly", "children": [bolt]},
+        bolt,
+    ]}
+    data = generate_hasse_data(tree)
+    assert [node["id"] for node in data["nodes"]] == ["top", "arm", "bolt", "base"]
+    assert sorted((e["source"], e["target"]) for e in data["edges"]) == [
+        ("arm", "top"), ("base", "top"), ("bolt", "arm"), ("bolt", "base")]
+    ranks = {node["id"]: node["data"]["rank"] for node in data["nodes"]}
+    assert ranks == {"top": 2, "arm": 1, "base": 1, "bolt": 0}
+
+
+def test_product_structure_diagram():
+    products = {
+        "10": {"name": "Robot", "children": ["20", "30", "40"]},
+        "20": {"name": "Arm", "children": ["40", "40"]},
+        "30": {"name": "", "children": ["40", "99"]},
+        "40": {"name": "Bolt", "children": []},
+    }
+    data = generate_product_hasse_data(products)
+    labels = {node["id"]: node["data"]["label"] for node in data["nodes"]}
+    assert labels == {"product-10": "Robot (Assembly)", "product-20": "Arm (Assembly)",
+                      "product-30": "Component 30 (Assembly)", "product-40": "Bolt (Part)"}
+    assert sorted((e["source"], e["target"]) for e in data["edges"]) == [
+        ("product-20", "product-10"), ("product-30", "product-10"),
+        ("product-40", "product-20"), ("product-40", "product-30")]
+
+
+def test_cyclic_product_structure_falls_back(tmp_path):
+    path = tmp_path / "cycle.stp"
+    path.write_bytes(b"""ISO-10303-21;
+DATA;
+#1=PRODUCT('A','','',());
+#2=PRODUCT('B','','',());
+#3=NEXT_ASSEMBLY_USAGE_OCCURRENCE('1','','',#1,#2,$);
+#4=NEXT_ASSEMBLY_USAGE_OCCURRENCE('2','','',#2,#1,$);
+ENDSEC;
+""")
+    assert step_product_hasse_data(str(path)) is None
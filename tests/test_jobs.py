@@ -0,0 +1,114 @@
+# tests/test_jobs.py
+# Job event stream: replay for late subscribers, live delivery, failures
+
+import asyncio
+import threading
+
+import jobs
+
+
+async def collect(job, timeout=5.0):
+    async def drain():
+        return [event async for event in job.stream()]
+    return await asyncio.wait_for(drain(), timeout)
+
+
+async def two_stages(job):
+    with job.stage("parse"):
+        job.partial("tree", {"id": "root"})
+    with job.stage("mesh"):
+        await asyncio.sleep(0)
+    return {"status": "success"}
+
+
+def event_kinds(events):
+    return [(e["type"], e.get("stage") or e.get("name")) for e in events]
+
+
+def test_late_subscriber_gets_the_whole_backlog():
+    async def main():
+        job = jobs.create_job("upload", owner="s1")
+        await job.run(two_stages)
+        return job, await collect(job)
+
+    job, events = asyncio.run(main())
+    assert job.status == "done"
+    assert job.result == {"status": "success"}
+    assert set(job.stages) == {"parse", "mesh"}
+    assert event_kinds(events) == [
+        ("stage", "parse"), ("partial", "tree"), ("stage", "parse"),
+        ("stage", "mesh"), ("stage", "mesh"), ("done", None),
+    ]
+    assert [e["t"] for e in events] == sorted(e["t"] for e in events)
+
+
+def test_live_subscriber_sees_events_as_they_happen():
+    async def main():
+        job = jobs.create_job("voice")
+        release = asyncio.Event()
+
+        async def work(job):
+            job.partial("transcription", "scale by two")
+            await release.wait()
+            return "ok"
+
+        jobs.start_job(job, work)
+        stream = job.stream()
+        first = await asyncio.wait_for(stream.__anext__(), 5.0)
+        assert job.status == "running"
+        release.set()
+        rest = [event async for event in stream]
+        return [first] + rest
+
+    events = asyncio.run(main())
+    assert event_kinds(events) == [("partial", "transcription"), ("done", None)]
+    assert events[-1]["result"] == "ok"
+
+
+def test_failure_reports_the_stage():
+    async def main():
+        job = jobs.create_job("upload")
+
+        async def work(job):
+            with job.stage("transfer"):
+                raise RuntimeError("bad STEP")
+
+        await job.run(work)
+        return job, await collect(job)
+
+    job, events = asyncio.run(main())
+    assert job.status == "error"
+    assert job.error == "bad STEP"
+    assert events[-1] == {"type": "error", "stage": "transfer", "message": "bad STEP", "t": events[-1]["t"]}
+
+
+def test_finish_from_another_thread_ends_the_stream():
+    async def main():
+        job = jobs.create_job("upload")
+        job.status = "running"
+        worker = threading.Thread(target=lambda: (job.partial("mesh", {}), job.finish("done")))
+        consumer = asyncio.ensure_future(collect(job))
+        await asyncio.sleep(0)
+        worker.start()
+        events = await consumer
+        worker.join()
+        return events
+
+    events = asyncio.run(main())
+    assert event_kinds(events)[-1] == ("done", None)
+
+
+def test_finished_jobs_are_pruned(monkeypatch):
+    monkeypatch.setattr(jobs, "JOBS_KEEP", 2)
+    monkeypatch.setattr(jobs, "JOBS", type(jobs.JOBS)())
+    running = jobs.create_job("voice")
+    running.status = "running"
+    done = []
+    for _ in range(3):
+        job = jobs.create_job("voice")
+        job.finish(None)
+        done.append(job)
+    latest = jobs.create_job("voice")
+    # Only finished jobs are dropped, oldest first, down to JOBS_KEEP
+    assert list(jobs.JOBS) == [running.id, latest.id]
+    assert all(jobs.get_job(job.id) is None for job in done)
@@ -0,0 +1,62 @@
+# tests/test_recognition.py
+# Stable feature IDs: matching re-recognized features to the previous table
+
+import numpy as np
+
+from cad.recognition import FEATURE_DTYPE, FeatureTable, KIND_HOLE, KIND_BOSS, _match_previous
+
+
+def feature_rows(*specs):
+    """specs: (kind, radius, (t0, t1), axis, origin), all on solid 0."""
+    features = np.zeros(len(specs), dtype=FEATURE_DTYPE)
+    for i, (kind, radius, t_range, axis, origin) in enumerate(specs):
+        features[i]["kind"] = kind
+        features[i]["radius"] = radius
+        features[i]["t_range"] = t_range
+        features[i]["axis"] = axis
+        features[i]["origin"] = origin
+        features[i]["face_start"] = i
+        features[i]["face_count"] = 1
+    return features
+
+
+Z, X = (0.0, 0.0, 1.0), (1.0, 0.0, 0.0)
+AT_ORIGIN, ELSEWHERE = (0.0, 0.0, 0.0), (20.0, 0.0, 0.0)
+
+
+def table(features, ids):
+    return FeatureTable(features, np.arange(len(features), dtype=np.int64), ids)
+
+
+def test_counterbore_keeps_ids_when_rows_come_in_another_order():
+    # hole-1: the counterbore (r 5, top 2 units), hole-2: the through hole (r 3)
+    previous = table(feature_rows((KIND_HOLE, 5.0, (8.0, 10.0), Z, AT_ORIGIN),
+                                  (KIND_HOLE, 3.0, (0.0, 10.0), Z, AT_ORIGIN)), ["hole-1", "hole-2"])
+    # hole 2 resized to r 4, and recognized first this time
+    new = feature_rows((KIND_HOLE, 4.0, (0.0, 10.0), Z, AT_ORIGIN),
+                       (KIND_HOLE, 5.0, (8.0, 10.0), Z, AT_ORIGIN))
+    assert _match_previous(new, previous).tolist() == [1, 0]
+
+
+def test_stepped_boss_with_both_radii_changed():
+    previous = table(feature_rows((KIND_BOSS, 2.0, (0.0, 5.0), Z, AT_ORIGIN),
+                                  (KIND_BOSS, 1.0, (5.0, 9.0), Z, AT_ORIGIN)), ["boss-1", "boss-2"])
+    new = feature_rows((KIND_BOSS, 1.5, (5.0, 9.0), Z, AT_ORIGIN),
+                       (KIND_BOSS, 2.5, (0.0, 5.0), Z, AT_ORIGIN))
+    assert _match_previous(new, previous).tolist() == [1, 0]
+
+
+def test_unique_match_ignores_radius():
+    previous = table(feature_rows((KIND_HOLE, 3.0, (0.0, 10.0), Z, AT_ORIGIN),
+                                  (KIND_HOLE, 3.0, (0.0, 10.0), X, ELSEWHERE)), ["hole-1", "hole-2"])
+    new = feature_rows((KIND_HOLE, 3.0, (0.0, 10.0), X, ELSEWHERE),
+                       (KIND_HOLE, 9.0, (0.0, 10.0), Z, AT_ORIGIN))
+    assert _match_previous(new, previous).tolist() == [1, 0]
+
+
+def test_no_geometric_match_is_a_new_feature():
+    previous = table(feature_rows((KIND_HOLE, 3.0, (0.0, 10.0), Z, AT_ORIGIN)), ["hole-1"])
+    new = feature_rows((KIND_HOLE, 3.0, (0.0, 10.0), Z, ELSEWHERE),
+                       (KIND_BOSS, 3.0, (0.0, 10.0), Z, AT_ORIGIN))
+    assert _match_previous(new, previous).tolist() == [-1, -1]
+    assert _match_previous(new, None).tolist() == [-1, -1]
@@ -0,0 +1,69 @@
+# tests/test_step_scanner.py
+# Streaming STEP scanner: instance boundaries, comments, strings, product structure
+
+from cad.step_scanner import iter_entities, parse_params, scan_product_structure, StepRef
+
+SAMPLE = b"""ISO-10303-21;
+HEADER;
+FILE_NAME('robot;v2.stp','2024-01-01',('a'),(''),'','','');
+ENDSEC;
+DATA;
+#1=PRODUCT('Robot','Robot; rev ''B''','',(#2));
+#2=PRODUCT_CONTEXT('',#3,'mechanical');
+#10=PRODUCT('O''Ring','','',(#2));
+#11=PRODUCT_DEFINITION_FORMATION('','',#1);
+#12=PRODUCT_DEFINITION_FORMATION('','',#10);
+#30=PRODUCT_DEFINITION('design','',#11,#4);
+#32=PRODUCT_DEFINITION('design','',#12,#4);
+/* #43=NEXT_ASSEMBLY_USAGE_OCCURRENCE('9','','',#32,#30,$); */
+#44=NEXT_ASSEMBLY_USAGE_OCCURRENCE('1','Seal;1','',
+  #30, /* parent */
+  #32,$);
+ENDSEC;
+END-ISO-10303-21;
+"""
+
+
+def write_sample(tmp_path, data=SAMPLE):
+    path = tmp_path / "sample.stp"
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_commented_out_instances_are_skipped(tmp_path):
+    ids = [entity.entity_id for entity in iter_entities(write_sample(tmp_path))]
+    assert ids == [1, 2, 10, 11, 12, 30, 32, 44]
+
+
+def test_keyword_filter(tmp_path):
+    entities = list(iter_entities(write_sample(tmp_path), ["next_assembly_usage_occurrence"]))
+    assert [(e.entity_id, e.keyword) for e in entities] == [(44, "NEXT_ASSEMBLY_USAGE_OCCURRENCE")]
+
+
+def test_multi_line_instance_with_comment_and_semicolon_in_string(tmp_path):
+    entity = next(iter_entities(write_sample(tmp_path), ["NEXT_ASSEMBLY_USAGE_OCCURRENCE"]))
+    assert parse_params(entity.params) == ["1", "Seal;1", "", StepRef(30), StepRef(32), None]
+
+
+def test_escaped_quotes(tmp_path):
+    products = {e.entity_id: parse_params(e.params) for e in iter_entities(write_sample(tmp_path), ["PRODUCT"])}
+    assert products[1][:2] == ["Robot", "Robot; rev 'B'"]
+    assert products[10][0] == "O'Ring"
+
+
+def test_product_structure_has_no_phantom_edges(tmp_path):
+    assert scan_product_structure(write_sample(tmp_path)) == {
+        "1": {"name": "Robot", "children": ["10"]},
+        "10": {"name": "O'Ring", "children": []},
+    }
+
+
+def test_files_without_data_or_products(tmp_path):
+    assert list(iter_entities(write_sample(tmp_path, b""))) == []
+    assert list(iter_entities(write_sample(tmp_path, b"ISO-10303-21;\nHEADER;\nENDSEC;\n"))) == []
+    assert scan_product_structure(str(tmp_path / "missing.stp")) is None
+
+
+def test_typed_parameters_and_enumerations():
+    assert parse_params(b"('x',LENGTH_MEASURE(2.5),.T.,*,(1,2))") == [
+        "x", ("LENGTH_MEASURE", [2.5]), "T", None, [1, 2]]
@@ -0,0 +1,106 @@
+# tests/test_uploads.py
+# Chunked uploads: offsets, hashing, content addressing and per-session dedupe
+
+import hashlib
+
+import pytest
+
+import uploads
+from uploads import UploadError
+
+
+@pytest.fixture(autouse=True)
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(uploads, "UPLOADS", {})
+    monkeypatch.setattr(uploads, "CONTENT_OWNERS", {})
+    return tmp_path
+
+
+DATA = b"ISO-10303-21;\n" + bytes(range(256)) * 40
+DIGEST = hashlib.sha256(DATA).hexdigest()
+
+
+def send(upload, data, chunk=1000):
+    for offset in range(0, len(data), chunk):
+        upload.write(offset, data[offset:offset + chunk])
+
+
+def test_chunks_complete_at_the_content_address(upload_dir):
+    upload = uploads.create_upload("part.step", len(DATA), owner="s1")
+    assert upload.write(0, DATA[:1000]) == 1000
+    assert not upload.complete
+    for offset in range(1000, len(DATA), 1000):
+        upload.write(offset, DATA[offset:offset + 1000])
+    assert upload.complete
+    assert upload.digest == DIGEST
+    assert upload.path == str(upload_dir / f"{DIGEST}.step")
+    assert open(upload.path, "rb").read() == DATA
+    assert not (upload_dir / f"{upload.id}.part").exists()
+    assert upload.describe()["status"] == "complete"
+
+
+def test_wrong_offset_is_a_conflict_with_the_resume_point():
+    upload = uploads.create_upload("part.step", len(DATA))
+    upload.write(0, DATA[:500])
+    with pytest.raises(UploadError) as exc:
+        upload.write(1000, DATA[1000:1500])
+    assert exc.value.status == 409
+    assert upload.offset == 500
+
+
+def test_retried_final_chunk_is_accepted_once():
+    upload = uploads.create_upload("part.step", len(DATA))
+    send(upload, DATA[:-100])
+    assert upload.write(len(DATA) - 100, DATA[-100:]) == len(DATA)
+    # The reply was lost and the client sends the last chunk again
+    assert upload.write(len(DATA) - 100, DATA[-100:]) == len(DATA)
+    assert upload.digest == DIGEST
+
+
+def test_overlong_and_mismatched_uploads_are_rejected():
+    upload = uploads.create_upload("part.step", 10)
+    with pytest.raises(UploadError) as exc:
+        upload.write(0, b"x" * 11)
+    assert exc.value.status == 413
+
+    wrong = hashlib.sha256(b"something else").hexdigest()
+    upload = uploads.create_upload("part.step", len(DATA), sha256=wrong)
+    with pytest.raises(UploadError) as exc:
+        send(upload, DATA)
+    assert exc.value.status == 422
+    assert uploads.get_upload(upload.id) is None
+
+
+def test_declared_size_and_hash_are_validated():
+    with pytest.raises(UploadError):
+        uploads.create_upload("empty.step", 0)
+    with pytest.raises(UploadError) as exc:
+        uploads.create_upload("huge.step", uploads.UPLOAD_MAX_BYTES + 1)
+    assert exc.value.status == 413
+    with pytest.raises(UploadError):
+        uploads.create_upload("part.step", 10, sha256="../../etc/passwd")
+
+
+def test_content_is_found_only_by_a_session_that_sent_it():
+    upload = uploads.create_upload("part.step", len(DATA), sha256=DIGEST.upper(), owner="s1")
+    send(upload, DATA)
+    assert uploads.find_content(DIGEST, "s1") == upload.path
+    assert uploads.find_content(DIGEST.upper(), "s1") == upload.path
+    assert uploads.find_content(DIGEST, "s2") is None
+    assert uploads.find_content("not-a-digest", "s1") is None
+
+
+def test_store_stream_shares_the_content_address(tmp_path):
+    source = tmp_path / "input.step"
+    source.write_bytes(DATA)
+    with open(source, "rb") as f:
+        digest, path = uploads.store_stream(f, owner="s2")
+    assert digest == DIGEST
+    assert uploads.find_content(DIGEST, "s2") == path
+
+    # The same bytes again as a chunked upload land on the same file
+    upload = uploads.create_upload("again.step", len(DATA), owner="s3")
+    send(upload, DATA)
+    assert upload.path == path
+    assert uploads.find_content(DIGEST, "s3") == path
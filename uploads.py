@@ -0,0 +1,189 @@
+# uploads.py
+# Chunked, resumable STEP uploads. The client declares the file, then sends
+# it in pieces at explicit offsets; a dropped connection resumes from the
+# last offset the server acknowledged. The SHA-256 is computed as the bytes
+# arrive and files are stored by content (uploads/<sha256>.step), so a file
+# a session has already sent is never transferred twice. Knowing a hash is
+# not enough to load content someone else uploaded.
+
+import os
+import re
+import time
+import uuid
+import hashlib
+import threading
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", os.path.join("assets", "uploads"))
+# Chunk size suggested to clients (each PUT body is held in memory once)
+UPLOAD_CHUNK = int(os.getenv("UPLOAD_CHUNK", str(8 * 1024 * 1024)))
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(2 * 1024 ** 3)))
+# Unfinished uploads idle for longer than this are discarded
+UPLOAD_TTL = float(os.getenv("UPLOAD_TTL", str(24 * 3600)))
+
+UPLOADS = {}
+# sha256 -> sessions that have sent that content
+CONTENT_OWNERS = {}
+_LOCK = threading.Lock()
+_COPY_CHUNK = 1024 * 1024
+_SHA256 = re.compile(r"^[0-9a-fA-F]{64}$")
+
+
+class UploadError(Exception):
+    """A chunk that cannot be accepted; 'status' is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def content_path(digest):
+    return os.path.join(UPLOAD_DIR, f"{digest}.step")
+
+
+def find_content(digest, owner):
+    """Path of stored content with this SHA-256 that 'owner' has sent before, or None."""
+    if not _SHA256.match(digest or ""):
+        return None
+    digest = digest.lower()
+    with _LOCK:
+        if owner not in CONTENT_OWNERS.get(digest, ()):
+            return None
+    path = content_path(digest)
+    return path if os.path.exists(path) else None
+
+
+def _store_part(part_path, digest, owner=None):
+    """Move a finished part file to its content address (dropping it if that content exists)."""
+    path = content_path(digest)
+    if os.path.exists(path):
+        os.remove(part_path)
+    else:
+        os.replace(part_path, path)
+    if owner is not None:
+        with _LOCK:
+            CONTENT_OWNERS.setdefault(digest, set()).add(owner)
+    return path
+
+
+class ChunkedUpload:
+    """
+    One file being uploaded in chunks. Chunks must arrive in order at
+    'offset'; the hash is updated as they are written.
+    """
+
+    def __init__(self, filename, size, sha256=None, owner=None):
+        self.id = uuid.uuid4().hex[:16]
+        self.owner = owner
+        self.filename = filename
+        self.size = size
+        self.expected = sha256.lower() if sha256 else None
+        self.offset = 0
+        self.digest = None          # set when complete
+        self.path = None            # content-addressed file when complete
+        self.job = None             # id of the model load started by the last chunk
+        self.part_path = os.path.join(UPLOAD_DIR, f"{self.id}.part")
+        self.last_active = time.monotonic()
+        self._hasher = hashlib.sha256()
+        self._lock = threading.Lock()
+        open(self.part_path, "wb").close()
+
+    @property
+    def complete(self):
+        return self.digest is not None
+
+    def write(self, offset, data):
+        """
+        Append 'data' at 'offset' (which must equal the bytes received so
+        far) and return the new offset. The last chunk completes the upload.
+        """
+        with self._lock:
+            self.last_active = time.monotonic()
+            if self.complete:
+                return self.offset
+            if offset != self.offset:
+                raise UploadError(f"Expected offset {self.offset}, got {offset}", status=409)
+            if self.offset + len(data) > self.size:
+                raise UploadError(f"Chunk runs past the declared size of {self.size} bytes", status=413)
+            with open(self.part_path, "ab") as f:
+                f.write(data)
+            self._hasher.update(data)
+            self.offset += len(data)
+            if self.offset == self.size:
+                self._finish()
+            return self.offset
+
+    def _finish(self):
+        digest = self._hasher.hexdigest()
+        if self.expected and digest != self.expected:
+            self.discard()
+            raise UploadError("Uploaded content does not match the declared SHA-256", status=422)
+        self.path = _store_part(self.part_path, digest, self.owner)
+        self.digest = digest
+        print(f"Upload {self.id} complete: {self.filename} ({self.size} bytes, {digest[:12]})")
+
+    def discard(self):
+        with _LOCK:
+            UPLOADS.pop(self.id, None)
+        try:
+            os.remove(self.part_path)
+        except OSError:
+            pass
+
+    def describe(self):
+        return {
+            "upload": self.id,
+            "status": "complete" if self.complete else "uploading",
+            "filename": self.filename,
+            "size": self.size,
+            "offset": self.offset,
+            "chunk_size": UPLOAD_CHUNK,
+            "digest": self.digest,
+            "job": self.job,
+        }
+
+
+def _prune_stale():
+    now = time.monotonic()
+    stale = [u for u in UPLOADS.values() if now - u.last_active > UPLOAD_TTL]
+    for upload in stale:
+        del UPLOADS[upload.id]
+        try:
+            os.remove(upload.part_path)
+        except OSError:
+            pass
+
+
+def create_upload(filename, size, sha256=None, owner=None):
+    """Start a chunked upload. Raises UploadError for sizes over UPLOAD_MAX_BYTES."""
+    if size <= 0:
+        raise UploadError("Empty upload")
+    if size > UPLOAD_MAX_BYTES:
+        raise UploadError(f"Uploads are limited to {UPLOAD_MAX_BYTES} bytes", status=413)
+    if sha256 and not _SHA256.match(sha256):
+        raise UploadError("sha256 must be 64 hex digits")
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    upload = ChunkedUpload(filename, size, sha256, owner)
+    with _LOCK:
+        _prune_stale()
+        UPLOADS[upload.id] = upload
+    return upload
+
+
+def get_upload(upload_id):
+    return UPLOADS.get(upload_id)
+
+
+def store_stream(source, owner=None):
+    """
+    Store a whole file object by content, hashing while copying.
+    Returns (sha256, path).
+    """
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    part_path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4().hex[:16]}.part")
+    hasher = hashlib.sha256()
+    with open(part_path, "wb") as f:
+        for chunk in iter(lambda: source.read(_COPY_CHUNK), b""):
+            hasher.update(chunk)
+            f.write(chunk)
+    digest = hasher.hexdigest()
+    return digest, _store_part(part_path, digest, owner)
@@ -0,0 +1,33 @@
+# voice/asr.py
+# Whisper speech recognition for worker processes: each worker loads the
+# model once (the pool initializer) and keeps it for every later request.
+
+import os
+
+WHISPER_MODEL_NAME = os.getenv("WHISPER_MODEL", "small")
+CAD_PROMPT = "CAD design, engineering, 3D modeling, scale, rotate, extrude, feature, radius, diameter"
+
+_MODEL = None
+
+
+def init_worker(model_name=WHISPER_MODEL_NAME):
+    """Pool initializer: load Whisper into this worker process."""
+    global _MODEL
+    # Same OpenMP workaround as the server (Whisper + OCC/NumPy)
+    os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
+    import whisper
+    print(f"Loading Whisper model '{model_name}' in worker {os.getpid()}...")
+    _MODEL = whisper.load_model(model_name)
+
+
+def transcribe(audio_path, prompt=CAD_PROMPT):
+    """Transcribe an English voice command; returns the stripped text."""
+    if _MODEL is None:
+        init_worker()
+    result = _MODEL.transcribe(audio_path, language="en", initial_prompt=prompt)
+    return result["text"].strip()
+
+
+def ping():
+    """No-op task used to start (and warm) a worker ahead of the first request."""
+    return os.getpid()
@@ -0,0 +1,175 @@
+# workers.py
+# Execution layer for the API: blocking work runs in bounded pools instead of
+# on the asyncio event loop, and a full queue is reported as "busy" right away.
+#
+#   io     threads    LLM calls, TTS, file copies
+#   model  threads    edits on a session's in-memory shape (under session.lock)
+#   cad    processes  CPU-bound OCC work (cad.tessellate pool, warm OCC imports)
+#   asr    processes  Whisper transcription (model loaded once per worker)
+
+import os
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+IO_WORKERS = int(os.getenv("IO_WORKERS", "8"))
+MODEL_WORKERS = int(os.getenv("MODEL_WORKERS", "4"))
+ASR_WORKERS = int(os.getenv("ASR_WORKERS", "1"))
+# Jobs waiting or running per pool before new requests get a busy response
+IO_MAX_PENDING = int(os.getenv("IO_MAX_PENDING", "64"))
+MODEL_MAX_PENDING = int(os.getenv("MODEL_MAX_PENDING", "16"))
+CAD_MAX_PENDING = int(os.getenv("CAD_MAX_PENDING", "8"))
+ASR_MAX_PENDING = int(os.getenv("ASR_MAX_PENDING", "4"))
+# Seconds a client is asked to wait before retrying a busy request
+RETRY_AFTER = int(os.getenv("WORKER_RETRY_AFTER", "2"))
+
+
+class WorkerBusy(Exception):
+    """A pool's queue is full; the request should be retried later."""
+
+    def __init__(self, pool):
+        super().__init__(f"The {pool} workers are busy, please retry shortly.")
+        self.pool = pool
+        self.retry_after = RETRY_AFTER
+
+
+class WorkerPool:
+    """
+    An executor with a limit on queued plus running jobs.
+    'factory' creates the executor on first use; with shared=True it returns
+    an executor owned elsewhere and is asked again on every submit.
+    """
+
+    def __init__(self, name, factory, max_pending, shared=False):
+        self.name = name
+        self.shared = shared
+        self.max_pending = max_pending
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._factory = factory
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def executor(self):
+        if self.shared:
+            return self._factory()
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._factory()
+            return self._executor
+
+    def check(self):
+        """Raise WorkerBusy now if the queue is full (before accepting work that will need this pool)."""
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise WorkerBusy(self.name)
+
+    def submit(self, fn, *args, **kwargs):
+        """Submit a job and return its concurrent Future; raises WorkerBusy if the queue is full."""
+        executor = self.executor()
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise WorkerBusy(self.name)
+            self.pending += 1
+        try:
+            future = executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._finished(None)
+            raise
+        future.add_done_callback(self._finished)
+        return future
+
+    def submit_batch(self, fn, arg_lists):
+        """
+        Submit the pieces of one job (e.g. one task per solid) and return
+        their Futures. The batch is admitted as a whole: WorkerBusy is raised
+        only if the queue is already full, never halfway through, but every
+        piece counts as pending so later requests see the load.
+        """
+        self.check()
+        executor = self.executor()
+        futures = []
+        for args in arg_lists:
+            with self._lock:
+                self.pending += 1
+            try:
+                future = executor.submit(fn, *args)
+            except Exception:
+                self._finished(None)
+                for f in futures:
+                    f.cancel()
+                raise
+            future.add_done_callback(self._finished)
+            futures.append(future)
+        return futures
+
+    def _finished(self, future):
+        with self._lock:
+            self.pending -= 1
+            if future is not None:
+                self.completed += 1
+
+    async def run(self, fn, *args, **kwargs):
+        """Await a job from the event loop."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def describe(self):
+        return {
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+def _cad_executor():
+    from cad import tessellate
+    return tessellate.get_pool()
+
+
+def _asr_executor():
+    from voice import asr
+    return ProcessPoolExecutor(max_workers=ASR_WORKERS, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=asr.init_worker, initargs=(asr.WHISPER_MODEL_NAME,))
+
+
+IO_POOL = WorkerPool("io", lambda: ThreadPoolExecutor(IO_WORKERS, thread_name_prefix="io"), IO_MAX_PENDING)
+MODEL_POOL = WorkerPool("model", lambda: ThreadPoolExecutor(MODEL_WORKERS, thread_name_prefix="model"),
+                        MODEL_MAX_PENDING)
+CAD_POOL = WorkerPool("cad", _cad_executor, CAD_MAX_PENDING, shared=True)
+ASR_POOL = WorkerPool("asr", _asr_executor, ASR_MAX_PENDING)
+POOLS = (IO_POOL, MODEL_POOL, CAD_POOL, ASR_POOL)
+
+
+def warm_up(asr=True):
+    """
+    Start the process pools now, so worker start-up (OCC imports, loading
+    Whisper) happens at server start and not in the first request.
+    """
+    from cad import tessellate
+    futures = [CAD_POOL.executor().submit(tessellate.ping) for _ in range(tessellate.TESSELLATION_WORKERS)]
+    if asr:
+        from voice import asr as asr_worker
+        futures += [ASR_POOL.executor().submit(asr_worker.ping) for _ in range(ASR_WORKERS)]
+    return futures
+
+
+def worker_stats():
+    return {pool.name: pool.describe() for pool in POOLS}
+
+
+def shutdown():
+    from cad import tessellate
+    for pool in POOLS:
+        pool.shutdown()
+    tessellate.shutdown_pool()